@@ -0,0 +1,130 @@
+"""
+Author cards for listings.
+
+Post cards and comment lists show each author's avatar and rarity badge.
+Resolving those per row would cost a profile query plus two count queries
+per author, so ``attach_author_cards`` loads them for every author on the
+page at once: one query for profiles and one per activity count.
+``aattach_author_cards`` does the same with the async ORM for async views.
+"""
+
+from django.db.models import Count
+
+from blog.models import BlogPost, Comment
+
+from .models import UserProfile
+
+# Thumbnail size used for the small avatars next to author names
+AUTHOR_CARD_AVATAR_SIZE = 48
+
+
+def rarity_for_counts(post_count, comment_count):
+    """Simple 'rarity' badge based on activity volume."""
+    total = post_count + comment_count
+    if total >= 30 or post_count >= 15:
+        return "Legendary"
+    if total >= 15 or post_count >= 8:
+        return "Epic"
+    return "Common"
+
+
+class AuthorCard:
+    """Display data for one author: avatar URL and activity tier."""
+
+    __slots__ = ("user_id", "avatar_url", "post_count",
+                 "comment_count", "rarity")
+
+    def __init__(self, user_id, avatar_url, post_count, comment_count):
+        self.user_id = user_id
+        self.avatar_url = avatar_url
+        self.post_count = post_count
+        self.comment_count = comment_count
+        self.rarity = rarity_for_counts(post_count, comment_count)
+
+    @property
+    def rarity_slug(self):
+        return self.rarity.lower()
+
+
+def _count_rows(model, user_ids):
+    return (
+        model.objects.filter(author_id__in=user_ids)
+        .order_by()
+        .values("author_id")
+        .annotate(total=Count("id"))
+    )
+
+
+def _counts_by_author(model, user_ids):
+    return {row["author_id"]: row["total"] for row in _count_rows(model, user_ids)}
+
+
+async def _acounts_by_author(model, user_ids):
+    return {row["author_id"]: row["total"] async for row in _count_rows(model, user_ids)}
+
+
+def _cards(user_ids, profiles, post_counts, comment_counts, avatar_size):
+    cards = {}
+    for uid in user_ids:
+        # Profiles are created at signup; an unsaved one still yields the default avatar
+        profile = profiles.get(uid) or UserProfile(user_id=uid)
+        cards[uid] = AuthorCard(
+            user_id=uid,
+            avatar_url=profile.get_avatar_url(avatar_size),
+            post_count=post_counts.get(uid, 0),
+            comment_count=comment_counts.get(uid, 0),
+        )
+    return cards
+
+
+def build_author_cards(user_ids, avatar_size=AUTHOR_CARD_AVATAR_SIZE):
+    """Return {user_id: AuthorCard} for the given users in three queries."""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return {}
+
+    profiles = {
+        profile.user_id: profile
+        for profile in UserProfile.objects.filter(user_id__in=user_ids)
+    }
+    post_counts = _counts_by_author(BlogPost, user_ids)
+    comment_counts = _counts_by_author(Comment, user_ids)
+    return _cards(user_ids, profiles, post_counts, comment_counts, avatar_size)
+
+
+async def abuild_author_cards(user_ids, avatar_size=AUTHOR_CARD_AVATAR_SIZE):
+    """``build_author_cards`` for async views, with the async ORM."""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return {}
+
+    profiles = {
+        profile.user_id: profile
+        async for profile in UserProfile.objects.filter(user_id__in=user_ids)
+    }
+    post_counts = await _acounts_by_author(BlogPost, user_ids)
+    comment_counts = await _acounts_by_author(Comment, user_ids)
+    return _cards(user_ids, profiles, post_counts, comment_counts, avatar_size)
+
+
+def attach_author_cards(objects, avatar_size=AUTHOR_CARD_AVATAR_SIZE):
+    """Set ``obj.author_card`` on every post/comment in ``objects``."""
+    objects = list(objects)
+    cards = build_author_cards(
+        (obj.author_id for obj in objects), avatar_size)
+    for obj in objects:
+        obj.author_card = cards.get(obj.author_id)
+    return objects
+
+
+async def aattach_author_cards(objects, avatar_size=AUTHOR_CARD_AVATAR_SIZE):
+    """``attach_author_cards`` for async views; ``objects`` may be a queryset."""
+    if hasattr(objects, "__aiter__"):
+        objects = [obj async for obj in objects]
+    else:
+        objects = list(objects)
+    cards = await abuild_author_cards(
+        (obj.author_id for obj in objects), avatar_size)
+    for obj in objects:
+        obj.author_card = cards.get(obj.author_id)
+    return objects
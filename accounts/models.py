@@ -1,6 +1,29 @@
+import logging
+import posixpath
+
 from django.conf import settings
+from django.core.files.base import ContentFile
 from django.db import models
 from django.templatetags.static import static
+from django.utils import timezone
+
+from core.images import open_image, render_webp
+
+logger = logging.getLogger(__name__)
+
+# Square thumbnail sizes (px) generated for uploaded avatars.
+# Matching WebP files for the default avatar live in static/images/.
+AVATAR_SIZES = (48, 96, 240)
+
+
+def _pick_size(size):
+    """Smallest generated size that covers ``size`` (largest if none does)."""
+    if size is None:
+        return AVATAR_SIZES[-1]
+    for candidate in AVATAR_SIZES:
+        if candidate >= int(size):
+            return candidate
+    return AVATAR_SIZES[-1]
 
 
 class UserProfile(models.Model):
@@ -19,6 +42,11 @@ class UserProfile(models.Model):
         blank=True,
         null=True,
     )
+    # Maps thumbnail size ("48", "96", ...) to its stored file name
+    avatar_thumbnails = models.JSONField(
+        default=dict, blank=True, editable=False)
+    # Moves with every change, so pages listing many authors can validate cheaply
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "User Profile"
@@ -27,13 +55,91 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Profile for {self.user}" if self.user_id else "Profile"
 
+    def save(self, *args, **kwargs):
+        """Save, then regenerate thumbnails when the avatar file changes."""
+        previous_avatar = None
+        if self.pk:
+            previous_avatar = (
+                UserProfile.objects.filter(pk=self.pk)
+                .values_list("avatar", flat=True)
+                .first()
+            )
+
+        super().save(*args, **kwargs)
+
+        if (self.avatar.name or None) != (previous_avatar or None):
+            self.refresh_avatar_thumbnails()
+
+    def refresh_avatar_thumbnails(self):
+        """Resize the avatar into WebP thumbnails and store their names."""
+        storage = self._meta.get_field("avatar").storage
+        for name in self.avatar_thumbnails.values():
+            try:
+                storage.delete(name)
+            except Exception as exc:  # a leftover file must not fail the save
+                logger.warning(
+                    "Could not delete avatar thumbnail %s: %s", name, exc)
+
+        thumbnails = {}
+        if self.avatar:
+            try:
+                source = open_image(self.avatar)
+                stem = posixpath.splitext(
+                    posixpath.basename(self.avatar.name))[0]
+                for size in AVATAR_SIZES:
+                    thumbnails[str(size)] = storage.save(
+                        f"avatars/thumbs/{stem}-{size}.webp",
+                        ContentFile(render_webp(source, (size, size))),
+                    )
+            except Exception as exc:  # keep the original avatar usable
+                logger.warning(
+                    "Could not build avatar thumbnails for %s: %s", self, exc)
+
+        self.avatar_thumbnails = thumbnails
+        self.updated_at = timezone.now()
+        UserProfile.objects.filter(pk=self.pk).update(
+            avatar_thumbnails=thumbnails, updated_at=self.updated_at)
+
     @property
     def has_avatar(self):
         """Return True when a custom avatar is uploaded."""
         return bool(self.avatar)
 
-    def get_avatar_url(self):
-        """Return the avatar URL or a static fallback image."""
+    def get_avatar_url(self, size=None):
+        """Return the avatar URL for ``size`` px, or a size-matched static fallback."""
+        chosen = _pick_size(size)
         if self.avatar:
+            thumbnail = self.avatar_thumbnails.get(str(chosen))
+            if thumbnail:
+                return self._meta.get_field("avatar").storage.url(thumbnail)
             return self.avatar.url
-        return static("images/default-avatar.png")
+        return static(f"images/default-avatar-{chosen}.webp")
+
+
+class Follow(models.Model):
+    """``follower`` receives ``followed``'s newly approved posts in their feed."""
+
+    follower = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="following",
+    )
+    followed = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="followers",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Follow"
+        verbose_name_plural = "Follows"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "followed"], name="unique_follow_pair"),
+            models.CheckConstraint(
+                condition=~models.Q(follower=models.F("followed")), name="no_self_follow"),
+        ]
+
+    def __str__(self):
+        return f"{self.follower} follows {self.followed}"
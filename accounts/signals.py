@@ -7,6 +7,8 @@ from django.db.models import Q
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .models import UserProfile
+
 User = get_user_model()
 
 
@@ -28,6 +30,14 @@ def _notify_staff(subject, message, exclude_user_ids=None):
     send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipients)
 
 
+@receiver(post_save, sender=User, dispatch_uid="accounts_user_created_profile")
+def create_profile_for_new_user(sender, instance, created, **kwargs):
+    """Guarantee every account has a profile so views never need get_or_create."""
+    if not created:
+        return
+    UserProfile.objects.get_or_create(user=instance)
+
+
 @receiver(post_save, sender=User, dispatch_uid="accounts_user_created_notify")
 def notify_staff_user_registered(sender, instance, created, **kwargs):
     """Notify staff when a new user account is created."""
@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def avatar_url(profile, size=None):
+    """
+    Return a size-matched avatar URL for a UserProfile.
+    Example:
+      <img src="{{ profile|avatar_url:96 }}" width="48" height="48">
+    """
+    if not profile:
+        return ''
+    return profile.get_avatar_url(size)
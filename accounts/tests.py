@@ -1,3 +1,148 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .authors import build_author_cards
+from .models import AVATAR_SIZES, Follow, UserProfile
+
+
+def _avatar_upload(name="avatar.png", size=(640, 480)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class AvatarThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create_user(
+            username="pilot", password="pass"
+        )
+
+    def test_default_avatar_uses_size_matched_webp(self):
+        profile = UserProfile(user=self.user)
+        self.assertTrue(profile.get_avatar_url(40).endswith(
+            "images/default-avatar-48.webp"))
+        self.assertTrue(profile.get_avatar_url(120).endswith(
+            "images/default-avatar-240.webp"))
+
+    def test_upload_generates_square_webp_thumbnails(self):
+        profile = self.user.profile
+        profile.avatar = _avatar_upload()
+        profile.save()
+
+        profile.refresh_from_db()
+        self.assertEqual(
+            sorted(profile.avatar_thumbnails, key=int),
+            [str(size) for size in AVATAR_SIZES],
+        )
+        storage = profile.avatar.storage
+        with storage.open(profile.avatar_thumbnails["96"]) as fh:
+            thumb = Image.open(fh)
+            self.assertEqual(thumb.format, "WEBP")
+            self.assertEqual(thumb.size, (96, 96))
+        self.assertTrue(profile.get_avatar_url(96).endswith("-96.webp"))
+
+    def test_replacing_avatar_removes_old_thumbnails(self):
+        profile = self.user.profile
+        profile.avatar = _avatar_upload("first.png")
+        profile.save()
+        old_thumbs = list(profile.avatar_thumbnails.values())
+
+        profile.avatar = _avatar_upload("second.png")
+        profile.save()
+
+        storage = profile.avatar.storage
+        for name in old_thumbs:
+            self.assertFalse(storage.exists(name))
+        self.assertIn("second", profile.avatar_thumbnails["48"])
+
+    def test_failed_thumbnail_cleanup_does_not_fail_the_save(self):
+        profile = self.user.profile
+        profile.avatar = _avatar_upload("first.png")
+        profile.save()
+
+        storage = profile.avatar.storage
+        with mock.patch.object(storage, "delete", side_effect=OSError("busy")), \
+                self.assertLogs("accounts.models", "WARNING"):
+            profile.avatar = _avatar_upload("second.png")
+            profile.save()
+        self.assertIn("second", profile.avatar_thumbnails["48"])
+
+
+class AuthorCardTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="navigator", password="pass"
+        )
+
+    def test_profile_created_at_signup(self):
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+
+    def test_cards_load_in_constant_queries(self):
+        User = get_user_model()
+        others = [
+            User.objects.create_user(username=f"crew{i}", password="pass")
+            for i in range(5)
+        ]
+        ids = [self.user.pk] + [u.pk for u in others]
+        with self.assertNumQueries(3):
+            cards = build_author_cards(ids)
+        self.assertEqual(set(cards), set(ids))
+        self.assertEqual(cards[self.user.pk].rarity, "Common")
+        self.assertTrue(
+            cards[self.user.pk].avatar_url.endswith("default-avatar-48.webp"))
+
+    def test_profile_view_shows_rarity_badge(self):
+        response = self.client.get(
+            reverse("accounts:profile", args=[self.user.username]))
+        self.assertContains(response, "comp-rarity-badge--common")
+
+
+class FollowTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.fan = User.objects.create_user(username="fan", password="pass")
+        self.star = User.objects.create_user(username="star", password="pass")
+        self.client.login(username="fan", password="pass")
+
+    def test_follow_button_toggles(self):
+        url = reverse("accounts:toggle_follow", args=["star"])
+        self.client.post(url)
+        self.assertTrue(Follow.objects.filter(follower=self.fan, followed=self.star).exists())
+        response = self.client.get(reverse("accounts:profile", args=["star"]))
+        self.assertTrue(response.context["is_following"])
+        self.assertContains(response, "Following")
+
+        self.client.post(url)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_cannot_follow_self(self):
+        self.client.post(reverse("accounts:toggle_follow", args=["fan"]))
+        self.assertFalse(Follow.objects.exists())
+
+
+class ProfileConditionalGetTests(TestCase):
+    def test_profile_revalidates_until_content_changes(self):
+        user = get_user_model().objects.create_user(username="quiet", password="pass")
+        url = reverse("accounts:profile", args=["quiet"])
+        first = self.client.get(url)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        profile = user.profile
+        profile.bio = "Now with a bio"
+        profile.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
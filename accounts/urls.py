@@ -18,6 +18,9 @@ urlpatterns = [
     # Delete user profile + cascade delete posts and comments
     path("profile/delete/", views.profile_delete, name="profile_delete"),
 
+    # Follow / unfollow (POST)
+    path("profile/<str:username>/follow/", views.toggle_follow, name="toggle_follow"),
+
     # Public profile by username
     path("profile/<str:username>/", views.profile, name="profile"),
 ]
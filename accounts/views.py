@@ -2,33 +2,29 @@ from django.contrib import messages
 from django.contrib.auth import get_user_model, logout
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db.models import Count, Max
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import require_POST
 
 from blog.models import BlogPost, Comment, CommentReport
+from core.conditional import conditional_page, make_etag
+from core.ratelimit import ratelimit
 
+from .authors import rarity_for_counts
 from .forms import ProfileForm
-from .models import UserProfile
+from .models import Follow, UserProfile
 
 User = get_user_model()
 
 
 def _get_profile(user):
-    """Return the user's profile, creating it if missing."""
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    return profile
-
-
-def _rarity_for_user(user):
-    """Simple 'rarity' badge based on activity volume."""
-    post_count = user.blog_posts.count()
-    comment_count = user.comments.count()
-    total = post_count + comment_count
-    if total >= 30 or post_count >= 15:
-        return "Legendary"
-    if total >= 15 or post_count >= 8:
-        return "Epic"
-    return "Common"
+    """Return the user's profile (created at signup; repaired here if missing)."""
+    try:
+        return user.profile
+    except UserProfile.DoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        return profile
 
 
 def _build_stats(user):
@@ -57,9 +53,37 @@ def _build_stats(user):
     }
 
 
+def _profile_validators(request, username):
+    """Counts and latest edits of everything the public profile shows."""
+    row = (
+        User.objects.filter(username=username)
+        .values("pk", "first_name", "last_name", "profile__bio", "profile__avatar",
+                "profile__avatar_thumbnails")
+        .first()
+    )
+    if row is None:
+        return None
+    posts = BlogPost.objects.filter(author_id=row["pk"]).aggregate(
+        n=Count("pk"), last=Max("updated_at"))
+    comments = Comment.objects.filter(author_id=row["pk"]).aggregate(
+        n=Count("pk"), last=Max("updated_at"))
+    reports = (
+        CommentReport.objects.filter(comment__author_id=row["pk"]).count(),
+        CommentReport.objects.filter(reported_by_id=row["pk"]).count(),
+    )
+    followers = Follow.objects.filter(followed_id=row["pk"]).count()
+    last_modified = max(filter(None, (posts["last"], comments["last"])), default=None)
+    etag = make_etag(
+        *row.values(), *posts.values(), *comments.values(), *reports, followers,
+        request.GET.urlencode())
+    return etag, last_modified
+
+
+@conditional_page(_profile_validators)
 def profile(request, username):
     """Public profile page (self-view shows private data and pending items)."""
-    profile_user = get_object_or_404(User.objects.all(), username=username)
+    profile_user = get_object_or_404(
+        User.objects.select_related("profile"), username=username)
     profile_obj = _get_profile(profile_user)
 
     is_self = request.user.is_authenticated and request.user.pk == profile_user.pk
@@ -108,6 +132,13 @@ def profile(request, username):
             "comments": reverse("admin:blog_comment_changelist"),
         }
 
+    stats = _build_stats(profile_user)
+    is_following = (
+        request.user.is_authenticated
+        and not is_self
+        and Follow.objects.filter(follower=request.user, followed=profile_user).exists()
+    )
+
     context = {
         "profile_user": profile_user,
         "profile": profile_obj,
@@ -121,8 +152,10 @@ def profile(request, username):
         "quick_posts": quick_posts,
         "quick_comments": quick_comments,
         "admin_links": admin_links,
-        "stats": _build_stats(profile_user),
-        "rarity": _rarity_for_user(profile_user),
+        "stats": stats,
+        "is_following": is_following,
+        "follower_count": profile_user.followers.count(),
+        "rarity": rarity_for_counts(stats["total_posts"], stats["total_comments"]),
     }
     return render(request, "accounts/profile.html", context)
 
@@ -169,6 +202,27 @@ def profile_delete(request):
     return render(request, "accounts/profile_delete.html")
 
 
+@login_required
+@require_POST
+@ratelimit("follows")
+def toggle_follow(request, username):
+    """Follow or unfollow ``username``; their new posts then show up in /blog/feed/."""
+    target = get_object_or_404(User, username=username)
+    if target.pk == request.user.pk:
+        messages.error(request, "You cannot follow yourself.")
+        return redirect("accounts:profile", username)
+
+    follow = Follow.objects.filter(follower=request.user, followed=target).first()
+    if follow:
+        follow.delete()
+        messages.info(request, f"You stopped following {target.username}.")
+    else:
+        Follow.objects.get_or_create(follower=request.user, followed=target)
+        messages.success(
+            request, f"Following {target.username}. Their new posts will appear in your feed.")
+    return redirect("accounts:profile", username)
+
+
 @login_required
 def my_profile_redirect(request):
     """Shortcut: /profile/ -> /profile/<username>/ for the logged-in user."""
@@ -1,19 +1,74 @@
 # blog/admin.py
 from django.contrib import admin
+from django.db.models import Count, Q
+from django.utils import timezone
 from django.utils.html import format_html
 
+from .exports import streaming_export_response
 from .forms import BlogPostForm
+from .purge import purge_engagement
 from .models import (
     BlogPost,
     Comment,
     CommentReaction,
     CommentReport,
+    ModerationDecision,
     PostReaction,
 )
 
 
+class ExportActionsMixin:
+    """Admin actions that stream the selected rows as CSV or JSONL."""
+    export_kind = None
+
+    def export_csv(self, request, queryset):
+        return streaming_export_response(self.export_kind, 'csv', queryset)
+    export_csv.short_description = 'Export selected rows as CSV'
+
+    def export_jsonl(self, request, queryset):
+        return streaming_export_response(self.export_kind, 'jsonl', queryset)
+    export_jsonl.short_description = 'Export selected rows as JSONL'
+
+
+class DuplicateFilter(admin.SimpleListFilter):
+    """Show only originals (one row per spam wave) or only the copies."""
+    title = 'near-duplicates'
+    parameter_name = 'duplicates'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('originals', 'Originals only'),
+            ('copies', 'Near-duplicates only'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'originals':
+            return queryset.filter(duplicate_of__isnull=True)
+        if self.value() == 'copies':
+            return queryset.filter(duplicate_of__isnull=False)
+        return queryset
+
+
+class DuplicateCountMixin:
+    """Annotate each row with the number of near-duplicates collapsed into it."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            duplicate_total=Count('duplicates', distinct=True))
+
+    def duplicate_count(self, obj):
+        return obj.duplicate_total
+    duplicate_count.short_description = 'Copies'
+    duplicate_count.admin_order_field = 'duplicate_total'
+
+    def with_duplicates(self, queryset):
+        """The selected rows plus every near-duplicate pointing at them."""
+        ids = list(queryset.values_list('pk', flat=True))
+        return self.model.objects.filter(Q(pk__in=ids) | Q(duplicate_of__in=ids))
+
+
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
+class BlogPostAdmin(DuplicateCountMixin, ExportActionsMixin, admin.ModelAdmin):
     """Moderation console for BlogPost - quick actions to approve, reject, and feature."""
     list_display = (
         'title',
@@ -22,8 +77,9 @@ class BlogPostAdmin(admin.ModelAdmin):
         'featured',
         'published_at',
         'updated_at',
+        'duplicate_count',
     )
-    list_filter = ('status', 'author', 'published_at', 'featured')
+    list_filter = ('status', 'author', 'published_at', 'featured', DuplicateFilter)
     search_fields = ('title', 'body', 'excerpt', 'tags')
     prepopulated_fields = {'slug': ('title',)}
     readonly_fields = (
@@ -34,12 +90,14 @@ class BlogPostAdmin(admin.ModelAdmin):
         'published_at',
         'updated_at',
         'author',
+        'duplicate_of',
     )
     date_hierarchy = 'published_at'
     ordering = ('-published_at',)
 
     actions = ['mark_pending', 'mark_approved', 'mark_rejected',
-               'mark_featured', 'mark_unfeatured']
+               'mark_featured', 'mark_unfeatured', 'export_csv', 'export_jsonl']
+    export_kind = 'posts'
     form = BlogPostForm
 
     def save_model(self, request, obj, form, change):
@@ -120,8 +178,9 @@ class BlogPostAdmin(admin.ModelAdmin):
     mark_approved.short_description = 'Approve selected posts'
 
     def mark_rejected(self, request, queryset):
+        """Rejecting an original also rejects its near-duplicates."""
         updated = 0
-        for post in queryset:
+        for post in self.with_duplicates(queryset):
             post.status = BlogPost.STATUS_REJECTED
             post.save()
             updated += 1
@@ -135,7 +194,7 @@ class BlogPostAdmin(admin.ModelAdmin):
         for post in queryset:
             if not post.featured:
                 post.featured = True
-                post.save(update_fields=['featured'])
+                post.save(update_fields=['featured', 'updated_at'])
                 updated += 1
         self.message_user(request, f"Marked {updated} post(s) as Featured ⭐")
     mark_featured.short_description = 'Mark selected posts as featured'
@@ -145,7 +204,7 @@ class BlogPostAdmin(admin.ModelAdmin):
         for post in queryset:
             if post.featured:
                 post.featured = False
-                post.save(update_fields=['featured'])
+                post.save(update_fields=['featured', 'updated_at'])
                 updated += 1
         self.message_user(
             request, f"Removed Featured mark from {updated} post(s).")
@@ -153,28 +212,48 @@ class BlogPostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(DuplicateCountMixin, ExportActionsMixin, admin.ModelAdmin):
     """Moderation console for comments."""
-    list_display = ('post', 'author', 'status', 'created_at', 'updated_at')
-    list_filter = ('status', 'created_at', 'post')
+    list_display = ('post', 'author', 'status', 'duplicate_count',
+                    'created_at', 'updated_at')
+    list_filter = ('status', DuplicateFilter, 'created_at', 'post')
     search_fields = ('post__title', 'author__username', 'body')
     autocomplete_fields = ('post', 'author')
-    actions = ['mark_pending', 'mark_approved', 'mark_rejected']
+    readonly_fields = ('duplicate_of',)
+    list_select_related = ('post', 'author')
+    actions = ['mark_pending', 'mark_approved', 'mark_rejected',
+               'export_csv', 'export_jsonl']
+    export_kind = 'comments'
+
+    def _update_status(self, queryset, status):
+        """
+        Bulk status change. queryset.update() sends no signals, so purge the
+        cached pages of the affected posts here (looked up first: the
+        changelist filters may stop matching once the status changes).
+        """
+        post_ids = set(queryset.values_list('post_id', flat=True))
+        posts = list(BlogPost.objects.filter(pk__in=post_ids).only('slug'))
+        updated = queryset.update(status=status, updated_at=timezone.now())
+        for post in posts:
+            purge_engagement(post)
+        return updated
 
     def mark_pending(self, request, queryset):
-        updated = queryset.update(status=Comment.STATUS_PENDING)
+        updated = self._update_status(queryset, Comment.STATUS_PENDING)
         self.message_user(
             request, f"Queued {updated} comment(s) in stasis (Pending).")
     mark_pending.short_description = 'Mark selected comments as pending'
 
     def mark_approved(self, request, queryset):
-        updated = queryset.update(status=Comment.STATUS_APPROVED)
+        updated = self._update_status(queryset, Comment.STATUS_APPROVED)
         self.message_user(
             request, f"Cleared {updated} comment(s) for orbit (Approved).")
     mark_approved.short_description = 'Mark selected comments as approved'
 
     def mark_rejected(self, request, queryset):
-        updated = queryset.update(status=Comment.STATUS_REJECTED)
+        """Rejecting an original also rejects its near-duplicates."""
+        updated = self._update_status(
+            self.with_duplicates(queryset), Comment.STATUS_REJECTED)
         self.message_user(
             request, f"Cast {updated} comment(s) into the void (Rejected).")
     mark_rejected.short_description = 'Mark selected comments as rejected'
@@ -195,7 +274,7 @@ class CommentReactionAdmin(admin.ModelAdmin):
 
 
 @admin.register(CommentReport)
-class CommentReportAdmin(admin.ModelAdmin):
+class CommentReportAdmin(ExportActionsMixin, admin.ModelAdmin):
     list_display = ('comment', 'reported_by',
                     'reason', 'resolved', 'created_at')
     list_filter = ('reason', 'resolved', 'created_at')
@@ -205,9 +284,28 @@ class CommentReportAdmin(admin.ModelAdmin):
         'reported_by__username',
     )
     readonly_fields = ('comment', 'reported_by', 'notes', 'created_at')
-    actions = ['mark_resolved']
+    list_select_related = ('comment__post', 'reported_by')
+    actions = ['mark_resolved', 'export_csv', 'export_jsonl']
+    export_kind = 'reports'
 
     def mark_resolved(self, request, queryset):
         updated = queryset.update(resolved=True)
         self.message_user(request, f"Marked {updated} report(s) as resolved.")
     mark_resolved.short_description = 'Mark reports as resolved'
+
+
+@admin.register(ModerationDecision)
+class ModerationDecisionAdmin(admin.ModelAdmin):
+    """Read-only audit log of automatic pre-moderation verdicts."""
+    list_display = ('kind', 'object_id', 'author', 'action', 'score', 'created_at')
+    list_filter = ('action', 'kind', 'created_at')
+    search_fields = ('author__username',)
+    list_select_related = ('author',)
+    readonly_fields = ('kind', 'object_id', 'author', 'action',
+                       'score', 'signals', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,9 +1,22 @@
 # blog/emails.py
-"""Email helpers for the blog application."""
+"""
+Email helpers for the blog application.
+
+With ``BLOG_EMAIL_BACKGROUND`` (the default outside DEBUG) ``_send_email``
+hands the message to a small thread pool and returns at once, so a slow
+SendGrid or SMTP round trip no longer holds the request (or, under ASGI,
+the sync thread) that triggered it. Messages are built from the model
+instances before they are queued; the pool only talks to the mail
+provider, never to the database. Queued mail is flushed when the worker
+process exits normally, within gunicorn's graceful timeout. Without the
+setting mail goes out inline, which is what the tests rely on
+(``mail.outbox``).
+"""
 
 from __future__ import annotations
 
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Iterable, Sequence
 
 from django.conf import settings
@@ -22,6 +35,9 @@ logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+# Threads start on the first submitted message
+_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="blog-email")
+
 
 def _resolve_recipients(emails: Iterable[str]) -> list[str]:
     """Return a clean list of email addresses, removing blanks and duplicates."""
@@ -41,13 +57,39 @@ def _send_email(
     recipients: Sequence[str],
     *,
     html_body: str | None = None,
-) -> None:
-    """Send email using SendGrid if available, otherwise Django's backend."""
+) -> Future | None:
+    """
+    Send email using SendGrid if available, otherwise Django's backend.
+
+    Returns the queued Future when ``BLOG_EMAIL_BACKGROUND`` is set.
+    """
     recipient_list = _resolve_recipients(recipients)
     if not recipient_list:
         logger.info("Skipping email '%s' - no recipients", subject)
-        return
+        return None
+
+    if getattr(settings, "BLOG_EMAIL_BACKGROUND", False):
+        future = _background.submit(
+            _deliver, subject, plain_body, recipient_list, html_body)
+        future.add_done_callback(_log_failure)
+        return future
+
+    _deliver(subject, plain_body, recipient_list, html_body)
+    return None
 
+
+def _log_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background email failed: %s", exc, exc_info=exc)
+
+
+def _deliver(
+    subject: str,
+    plain_body: str,
+    recipient_list: list[str],
+    html_body: str | None,
+) -> None:
     from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
 
     api_key = getattr(settings, "SENDGRID_API_KEY", "")
@@ -0,0 +1,157 @@
+# blog/feed.py
+"""
+Personal feed of posts from followed authors.
+
+Fan-out on write: when a post is approved, one ``FeedEntry`` row is written
+per follower of its author, so reading a feed is a single keyset query on
+``(user, -published_at, -post)``. Unpublishing a post removes its rows.
+
+Authors with more than ``BLOG_FEED_FANOUT_LIMIT`` followers are not fanned
+out: writing that many rows per post costs more than it saves. Their posts
+are read at request time instead (fan-out on read) and merged with the
+stored entries.
+
+Pages are addressed by an opaque cursor, ``<published_at µs>.<post pk>`` of
+the last post shown, so page N costs the same as page 1 and posts approved
+while someone scrolls do not shift the pages.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from accounts.models import Follow
+
+from .models import BlogPost, FeedEntry
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def fanout_limit():
+    return getattr(settings, 'BLOG_FEED_FANOUT_LIMIT', 5000)
+
+
+def page_size():
+    return getattr(settings, 'BLOG_FEED_PAGE_SIZE', 20)
+
+
+def encode_cursor(post):
+    micros = (post.published_at - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{post.pk}'
+
+
+def decode_cursor(raw):
+    """(published_at, pk) from a cursor string; None for a missing or bad one."""
+    try:
+        micros, pk = (raw or '').split('.')
+        published_at = EPOCH + timedelta(microseconds=int(micros))
+        return published_at, int(pk)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _before(cursor, field='published_at', pk_field='pk'):
+    published_at, pk = cursor
+    return Q(**{f'{field}__lt': published_at}) | Q(
+        **{field: published_at, f'{pk_field}__lt': pk})
+
+
+def fans_out(author_id):
+    """True when ``author_id``'s posts are written into follower feeds."""
+    return Follow.objects.filter(followed_id=author_id).count() <= fanout_limit()
+
+
+def fan_out_post(post, batch_size=1000):
+    """Write ``post`` into its author's followers' feeds; returns the row count."""
+    if post.status != BlogPost.STATUS_APPROVED or not post.published_at:
+        return 0
+    if not fans_out(post.author_id):
+        return 0
+    follower_ids = Follow.objects.filter(
+        followed_id=post.author_id).values_list('follower_id', flat=True)
+    rows = [FeedEntry(user_id=user_id, post_id=post.pk, published_at=post.published_at)
+            for user_id in follower_ids.iterator(chunk_size=batch_size)]
+    FeedEntry.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    return len(rows)
+
+
+def withdraw_post(post):
+    """Remove a post that left the approved set from every feed."""
+    FeedEntry.objects.filter(post_id=post.pk).delete()
+
+
+def backfill(follower_id, author_id, limit=None):
+    """Seed a new follower's feed with the author's latest posts."""
+    if not fans_out(author_id):
+        return
+    recent = BlogPost.approved.filter(author_id=author_id).order_by(
+        '-published_at', '-pk').values_list('pk', 'published_at')[:limit or page_size()]
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=follower_id, post_id=pk, published_at=published_at)
+         for pk, published_at in recent],
+        ignore_conflicts=True,
+    )
+
+
+def unfollow_cleanup(follower_id, author_id):
+    FeedEntry.objects.filter(user_id=follower_id, post__author_id=author_id).delete()
+
+
+def _pulled_authors(user):
+    """Followed authors too popular to fan out; read at request time."""
+    return (
+        Follow.objects.filter(follower=user)
+        .annotate(audience=Count('followed__followers'))
+        .filter(audience__gt=fanout_limit())
+        .values_list('followed_id', flat=True)
+    )
+
+
+def _entries(user, cursor, size):
+    entries = FeedEntry.objects.filter(
+        user=user, post__status=BlogPost.STATUS_APPROVED)
+    if cursor:
+        entries = entries.filter(_before(cursor, pk_field='post_id'))
+    return entries.select_related('post__author').order_by('-published_at', '-post_id')[:size + 1]
+
+
+def _pulled_posts(pulled, cursor, size):
+    extra = BlogPost.approved.select_related('author').filter(author_id__in=pulled)
+    if cursor:
+        extra = extra.filter(_before(cursor))
+    return extra.order_by('-published_at', '-pk')[:size + 1]
+
+
+def _page(posts, extra, size):
+    if extra:
+        seen = {post.pk for post in posts}
+        posts.extend(post for post in extra if post.pk not in seen)
+        posts.sort(key=lambda post: (post.published_at, post.pk), reverse=True)
+
+    page, more = posts[:size], len(posts) > size
+    return page, encode_cursor(page[-1]) if more else None
+
+
+def feed_page(user, cursor=None, size=None):
+    """
+    One page of ``user``'s feed, newest first.
+
+    Returns (posts, next_cursor); next_cursor is None on the last page.
+    """
+    size = size or page_size()
+    posts = [entry.post for entry in _entries(user, cursor, size)]
+    pulled = list(_pulled_authors(user))
+    extra = list(_pulled_posts(pulled, cursor, size)) if pulled else []
+    return _page(posts, extra, size)
+
+
+async def afeed_page(user, cursor=None, size=None):
+    """``feed_page`` for async views, with the async ORM."""
+    size = size or page_size()
+    posts = [entry.post async for entry in _entries(user, cursor, size)]
+    pulled = [pk async for pk in _pulled_authors(user)]
+    extra = [post async for post in _pulled_posts(pulled, cursor, size)] if pulled else []
+    return _page(posts, extra, size)
@@ -0,0 +1,154 @@
+# blog/fingerprints.py
+"""
+Near-duplicate detection for posts and comments.
+
+Text is split into overlapping three-word shingles and summarised by a
+MinHash signature: for each of ``NUM_PERM`` hash functions, the smallest
+hash over all shingles. The share of equal positions in two signatures
+estimates the Jaccard similarity of their shingle sets, so a spam comment
+with a word swapped still scores high while unrelated text scores near zero.
+
+For lookups the signature is cut into ``BANDS`` bands of ``ROWS`` values
+and each band is hashed into one indexed ``FingerprintBand`` row. Items
+sharing any band hash are candidates; only those are compared in full.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ContentFingerprint, FingerprintBand
+
+SHINGLE_SIZE = 3
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    """Fixed (a, b) pairs for the universal hashes h(x) = (a*x + b) mod p."""
+    params = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f'minhash-{i}'.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], 'big') % _PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutations()
+
+
+def _words(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def shingles(words, size=SHINGLE_SIZE):
+    if len(words) <= size:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set):
+    """Return the MinHash signature (NUM_PERM 32-bit ints) of a shingle set."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingle_set
+    ]
+    return [
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_hashes(signature):
+    """One signed 64-bit value per band; the band number is mixed in."""
+    values = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        key = f'{band}:' + ','.join(map(str, chunk))
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        values.append(int.from_bytes(digest, 'big', signed=True))
+    return values
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def signature_for(text):
+    """Return the signature of ``text``, or None when it is too short to judge."""
+    words = _words(text)
+    if len(words) < getattr(settings, 'BLOG_DUPLICATE_MIN_WORDS', 5):
+        return None
+    return minhash(shingles(words))
+
+
+def find_near_duplicate(kind, text, exclude_id=None):
+    """
+    Return the object id of the most similar recent item of ``kind`` whose
+    estimated similarity to ``text`` reaches ``BLOG_DUPLICATE_THRESHOLD``.
+    """
+    signature = signature_for(text)
+    if signature is None:
+        return None
+    threshold = getattr(settings, 'BLOG_DUPLICATE_THRESHOLD', 0.5)
+    window = getattr(settings, 'BLOG_DUPLICATE_WINDOW_DAYS', 30)
+
+    candidates = ContentFingerprint.objects.filter(
+        kind=kind,
+        created_at__gte=timezone.now() - timedelta(days=window),
+        pk__in=FingerprintBand.objects.filter(
+            value__in=band_hashes(signature)).values('fingerprint_id'),
+    )
+    if exclude_id is not None:
+        candidates = candidates.exclude(object_id=exclude_id)
+
+    best = None
+    for object_id, stored in candidates.values_list('object_id', 'signature'):
+        score = similarity(signature, stored)
+        if score >= threshold and (best is None or score > best[0]):
+            best = (score, object_id)
+    return best[1] if best else None
+
+
+def store_fingerprint(kind, object_id, text):
+    """
+    Index (or re-index) one saved post or comment.
+
+    An existing fingerprint is updated in place, so ``created_at`` keeps
+    dating the original text for the duplicate window; an unchanged
+    signature is left alone.
+    """
+    signature = signature_for(text)
+    with transaction.atomic():
+        fingerprint = ContentFingerprint.objects.filter(
+            kind=kind, object_id=object_id).first()
+        if signature is None:
+            if fingerprint is not None:
+                fingerprint.delete()
+            return None
+        if fingerprint is None:
+            fingerprint = ContentFingerprint.objects.create(
+                kind=kind, object_id=object_id, signature=signature)
+        elif fingerprint.signature == signature:
+            return fingerprint
+        else:
+            fingerprint.signature = signature
+            fingerprint.save(update_fields=['signature'])
+            fingerprint.bands.all().delete()
+        FingerprintBand.objects.bulk_create(
+            FingerprintBand(fingerprint=fingerprint, value=value)
+            for value in band_hashes(signature)
+        )
+    return fingerprint
@@ -1,11 +1,10 @@
 # blog/forms.py
-import re
-
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
 from .models import BlogPost, Comment
+from .textfilter import get_text_filter
 
 
 """
@@ -107,22 +106,16 @@ class CommentForm(forms.ModelForm):
             raise ValidationError(
                 'Your comment is too short to register on our scanners.')
 
-        lowered = body.lower()
-        for word in getattr(settings, 'BLOG_COMMENT_BANNED_WORDS', []):
-            if not word:
-                continue
-            pattern = r'\b{}\b'.format(re.escape(word))
-            if re.search(pattern, lowered):
-                raise ValidationError(
-                    'Your comment contains language that is not allowed on Game-Abyss.'
-                )
+        # One pass finds banned terms and counts links
+        result = get_text_filter().scan(body)
+        if result.matches:
+            raise ValidationError(
+                'Your comment contains language that is not allowed on Game-Abyss.'
+            )
 
         max_links = getattr(settings, 'BLOG_COMMENT_MAX_LINKS', 2)
-        if max_links >= 0:
-            link_count = len(re.findall(
-                r'https?://|www\.', body, flags=re.IGNORECASE))
-            if link_count > max_links:
-                raise ValidationError(
-                    f'Please keep the number of links to {max_links} or fewer.'
-                )
+        if max_links >= 0 and result.link_count > max_links:
+            raise ValidationError(
+                f'Please keep the number of links to {max_links} or fewer.'
+            )
         return body
@@ -0,0 +1,117 @@
+# blog/images.py
+"""
+Responsive image variants for blog post images.
+
+Variants are computed once when an image is uploaded and stored on the post,
+so templates can render a ready-made ``srcset`` without per-request work.
+
+- Cloudinary: transformation URLs (the CDN renders each size on first hit).
+- ImageField fallback: Pillow-resized WebP files saved next to the upload.
+"""
+
+from __future__ import annotations
+
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+
+from core.images import open_image, render_webp
+
+logger = logging.getLogger(__name__)
+
+# Art-directed presets used by cards and the detail page:
+# 4:3 crops for small screens, 16:9 crops for wide layouts.
+IMAGE_VARIANT_PRESETS = {
+    'mobile': {'aspect': (4, 3), 'widths': (480, 900)},
+    'wide': {'aspect': (16, 9), 'widths': (900, 1200, 1600)},
+}
+
+CLOUDINARY_BASE_TRANSFORMATION = 'f_auto,q_auto,c_fill,g_auto:subject'
+
+
+def apply_cloudinary_transformation(original_url, transformation):
+    """Insert a Cloudinary transformation right after 'upload/' in the URL."""
+    if not original_url or 'upload/' not in original_url:
+        return original_url
+    return original_url.replace('upload/', f"upload/{transformation.strip()}/", 1)
+
+
+def _format_variant(urls, aspect):
+    """Turn [(width, url), ...] into the dict stored per preset."""
+    urls = sorted(urls)
+    aspect_w, aspect_h = aspect
+    width = urls[-1][0]
+    return {
+        'srcset': ', '.join(f"{url} {width}w" for width, url in urls),
+        'src': urls[-1][1],
+        # Dimensions of ``src``, for the <img> width/height attributes
+        'width': width,
+        'height': round(width * aspect_h / aspect_w),
+    }
+
+
+def cloudinary_variants(original_url):
+    """Build transformation URLs for every preset width."""
+    variants = {}
+    for name, preset in IMAGE_VARIANT_PRESETS.items():
+        aspect_w, aspect_h = preset['aspect']
+        urls = []
+        for width in preset['widths']:
+            transformation = (
+                f"{CLOUDINARY_BASE_TRANSFORMATION},ar_{aspect_w}:{aspect_h},w_{width}"
+            )
+            urls.append(
+                (width, apply_cloudinary_transformation(original_url, transformation)))
+        variants[name] = _format_variant(urls, preset['aspect'])
+    return variants
+
+
+def local_variants(field_file):
+    """Resize an ImageField upload into WebP files for every preset width."""
+    storage = field_file.storage
+    source = open_image(field_file)
+    stem = posixpath.splitext(posixpath.basename(field_file.name))[0]
+    folder = posixpath.join(posixpath.dirname(field_file.name), 'variants')
+
+    variants = {}
+    files = []
+    for name, preset in IMAGE_VARIANT_PRESETS.items():
+        aspect_w, aspect_h = preset['aspect']
+        # Never upscale: keep widths the source can fill, at least the smallest.
+        widths = [w for w in preset['widths'] if w <= source.width]
+        widths = widths or [min(preset['widths'])]
+        urls = []
+        for width in widths:
+            height = round(width * aspect_h / aspect_w)
+            saved_name = storage.save(
+                posixpath.join(folder, f"{stem}-{name}-{width}w.webp"),
+                ContentFile(render_webp(source, (width, height))),
+            )
+            files.append(saved_name)
+            urls.append((width, storage.url(saved_name)))
+        variants[name] = _format_variant(urls, preset['aspect'])
+    variants['files'] = files
+    return variants
+
+
+def delete_local_variants(variants, storage):
+    """Remove WebP files created by local_variants."""
+    for name in (variants or {}).get('files', []):
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete image variant %s", name)
+
+
+def build_image_variants(image):
+    """Return the variant dict for a post image (Cloudinary or ImageField)."""
+    if not image:
+        return {}
+    try:
+        if hasattr(image, 'storage'):
+            return local_variants(image)
+        return cloudinary_variants(image.url)
+    except Exception as exc:  # best effort: templates fall back to the original
+        logger.warning("Could not build image variants for %s: %s", image, exc)
+        return {}
@@ -0,0 +1,88 @@
+"""
+Compare the Django and Jinja2 renders of the blog index.
+
+Creates throwaway approved posts (rolled back afterwards), loads them the
+way post_list does and renders ``blog/index.html`` with both engines at
+each size. Times are the median template time per render. The Jinja2
+engine is built from ``JINJA2_TEMPLATES`` whether or not
+``JINJA2_TEMPLATES_ENABLED`` is set.
+
+Usage:
+    python manage.py benchmark_jinja [--sizes 100 1000 10000] [--renders 5]
+"""
+
+import copy
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template import engines
+from django.test import RequestFactory
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from accounts.authors import attach_author_cards
+from blog.models import BlogPost
+
+
+def jinja_engine():
+    config = copy.deepcopy(settings.JINJA2_TEMPLATES)
+    try:
+        backend = import_string(config.pop('BACKEND'))
+    except ImportError as exc:
+        raise CommandError(f'Jinja2 is not installed: {exc}')
+    return backend(config)
+
+
+class Command(BaseCommand):
+    help = "Benchmark blog/index.html with the Django and Jinja2 engines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--renders', type=int, default=5)
+
+    def handle(self, *args, **options):
+        django_template = engines['django'].get_template('blog/index.html')
+        jinja_template = jinja_engine().get_template('blog/index.html')
+
+        with transaction.atomic():
+            author = get_user_model().objects.create_user(username='benchmark-author')
+            now = timezone.now()
+            created = 0
+            self.stdout.write(f'blog/index.html, median of {options["renders"]} renders')
+            self.stdout.write(f'{"posts":>7} {"django":>11} {"jinja2":>11} {"speed-up":>9}')
+            for size in sorted(options['sizes']):
+                BlogPost.objects.bulk_create(
+                    BlogPost(author=author, title=f'Transmission {n}', slug=f'benchmark-{n}',
+                             body='Signal from the deep. ' * 30,
+                             status=BlogPost.STATUS_APPROVED,
+                             published_at=now - timedelta(minutes=n))
+                    for n in range(created, size))
+                created = max(created, size)
+                posts = attach_author_cards(
+                    BlogPost.approved.select_related('author')
+                    .filter(author=author).order_by('-published_at')[:size])
+                context = {'posts': posts, 'sort': 'latest'}
+
+                django_ms = self._time(django_template, context, options['renders'])
+                jinja_ms = self._time(jinja_template, context, options['renders'])
+                self.stdout.write(
+                    f'{size:>7} {django_ms:>8.1f} ms {jinja_ms:>8.1f} ms '
+                    f'{django_ms / jinja_ms if jinja_ms else 0:>8.1f}x')
+            transaction.set_rollback(True)
+
+    def _time(self, template, context, renders):
+        timings = []
+        for _ in range(renders + 1):
+            request = RequestFactory().get('/blog/')
+            request.user = AnonymousUser()
+            started = time.perf_counter()
+            template.render(dict(context), request)
+            timings.append((time.perf_counter() - started) * 1000)
+        # The first render compiles and warms caches
+        return statistics.median(timings[1:])
@@ -0,0 +1,82 @@
+"""
+Measure post_detail template time with and without the render caches.
+
+Builds a throwaway post with N comments (rolled back afterwards), renders
+the page as a logged-in reader and reports the template time per render:
+
+- cached loader and cached reaction widgets (production setup);
+- cold reaction widgets: every widget rendered from the partial again;
+- no cached loader: every template re-read and recompiled per render.
+
+Usage:
+    python manage.py benchmark_templates [--comments 200] [--renders 20]
+"""
+
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import engines
+from django.test import RequestFactory
+
+from blog.models import BlogPost, Comment
+from blog.templatetags.reaction_tags import _render as render_widget
+from blog.views import post_detail
+
+
+class Command(BaseCommand):
+    help = "Benchmark post_detail rendering with and without template caches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=200)
+        parser.add_argument('--renders', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options['comments'], options['renders'])
+            transaction.set_rollback(True)
+
+    def _run(self, comment_count, renders):
+        User = get_user_model()
+        author = User.objects.create_user(username='benchmark-author')
+        reader = User.objects.create_user(username='benchmark-reader')
+        post = BlogPost.objects.create(
+            author=author, title='Benchmark transmission', body='Body ' * 200,
+            status=BlogPost.STATUS_APPROVED)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, body=f'Signal {n}',
+                    status=Comment.STATUS_APPROVED)
+            for n in range(comment_count))
+
+        path = post.get_absolute_url()
+        published = post.published_at
+        factory = RequestFactory()
+        loader = engines['django'].engine.template_loaders[0]
+        has_cached_loader = hasattr(loader, 'reset')
+
+        def render(before=None):
+            timings = []
+            for _ in range(renders):
+                if before:
+                    before()
+                request = factory.get(path)
+                request.user = reader
+                post_detail(request, published.year, published.month, published.day, post.slug)
+                timings.append(getattr(request, 'template_time', 0.0) * 1000)
+            return statistics.median(timings)
+
+        render()  # warm up: compile templates, fill the widget cache
+        results = [('cached loader + widget cache', render())]
+        results.append(('cold widget cache', render(render_widget.cache_clear)))
+        if has_cached_loader:
+            def recompile():
+                loader.reset()
+                render_widget.cache_clear()
+            results.append(('no cached loader', render(recompile)))
+
+        self.stdout.write(f'post_detail, {comment_count} comments, median of {renders} renders')
+        for label, median in results:
+            self.stdout.write(f'{label:<30} {median:8.2f} ms templates')
+        if not has_cached_loader:
+            self.stdout.write('TEMPLATE_CACHE_ENABLED is off: the loader comparison was skipped.')
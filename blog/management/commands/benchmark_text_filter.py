@@ -0,0 +1,90 @@
+"""
+Benchmark the compiled banned-term filter against the old per-word loop.
+
+A share of the generated comments (``--hit-ratio``) contains one of the
+terms, and the run fails unless both filters flag the same comments.
+
+The legacy loop leans on ``re``'s pattern cache, which holds 512 entries:
+with more terms than that it recompiles every pattern for every comment,
+so large ``--terms`` values take minutes on the legacy side.
+
+Usage:
+    python manage.py benchmark_text_filter [--terms 400] [--comments 500]
+"""
+
+import random
+import re
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.textfilter import TextFilter
+
+
+def legacy_scan(body, terms):
+    """The previous CommentForm.clean_body logic: one regex per term."""
+    lowered = body.lower()
+    for word in terms:
+        if re.search(r'\b{}\b'.format(re.escape(word)), lowered):
+            return True
+    re.findall(r'https?://|www\.', body, flags=re.IGNORECASE)
+    return False
+
+
+class Command(BaseCommand):
+    help = "Compare the compiled text filter with the legacy per-word loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terms', type=int, default=400)
+        parser.add_argument('--comments', type=int, default=500)
+        parser.add_argument('--hit-ratio', type=float, default=0.25,
+                            help='Share of comments that contain a banned term.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        def word(low=3, high=10):
+            return ''.join(rng.choice(string.ascii_lowercase)
+                           for _ in range(rng.randint(low, high)))
+
+        terms = sorted({word(5, 12) for _ in range(options['terms'])})
+
+        def comment():
+            words = [word() for _ in range(rng.randint(20, 120))]
+            if terms and rng.random() < options['hit_ratio']:
+                words.insert(rng.randint(0, len(words)), rng.choice(terms))
+            if rng.random() < 0.2:
+                words.append('see www.example.com')
+            return ' '.join(words)
+
+        comments = [comment() for _ in range(options['comments'])]
+
+        started = time.perf_counter()
+        text_filter = TextFilter(terms)
+        build_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        compiled = [bool(text_filter.scan(c).matches) for c in comments]
+        compiled_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        legacy = [legacy_scan(c, terms) for c in comments]
+        legacy_time = time.perf_counter() - started
+
+        disagreements = sum(a != b for a, b in zip(compiled, legacy))
+        if disagreements:
+            raise CommandError(
+                f"The filters disagree on {disagreements} of {len(comments)} comments.")
+        compiled_hits = legacy_hits = sum(compiled)
+
+        per_comment = 1000 / len(comments) if comments else 0
+        self.stdout.write(
+            f"{len(terms)} terms, {len(comments)} comments\n"
+            f"compiled filter: build {build_time * 1000:.1f} ms, "
+            f"scan {compiled_time * per_comment:.3f} ms/comment ({compiled_hits} hits)\n"
+            f"legacy loop:     scan {legacy_time * per_comment:.3f} ms/comment "
+            f"({legacy_hits} hits, same comments flagged)\n"
+            f"speed-up: {legacy_time / compiled_time if compiled_time else 0:.1f}x"
+        )
@@ -0,0 +1,32 @@
+"""
+Backfill the near-duplicate fingerprint index for existing posts and comments.
+
+Rows created with bulk_create skip the post_save signal that normally
+indexes them; run this afterwards (import_content does it itself unless
+given --skip-derived).
+
+Usage:
+    python manage.py build_fingerprints
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.fingerprints import store_fingerprint
+from blog.models import BlogPost, Comment, ContentFingerprint
+
+
+class Command(BaseCommand):
+    help = "Compute MinHash fingerprints (with LSH bands) for every post and comment."
+
+    def handle(self, *args, **options):
+        for kind, model in (
+            (ContentFingerprint.KIND_POST, BlogPost),
+            (ContentFingerprint.KIND_COMMENT, Comment),
+        ):
+            indexed = 0
+            rows = model.objects.order_by('pk').values_list('pk', 'body')
+            for pk, body in rows.iterator(chunk_size=500):
+                if store_fingerprint(kind, pk, body) is not None:
+                    indexed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"Indexed {indexed} {model._meta.verbose_name_plural.lower()}."))
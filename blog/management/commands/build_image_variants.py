@@ -0,0 +1,34 @@
+"""
+Backfill responsive image variants for existing blog posts.
+
+Usage:
+    python manage.py build_image_variants [--force]
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = "Precompute srcset variants for posts with images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild variants even for posts that already have them.',
+        )
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.exclude(image__isnull=True).exclude(image='')
+        if not options['force']:
+            posts = posts.filter(image_variants={})
+
+        built = 0
+        for post in posts.iterator(chunk_size=200):
+            post.refresh_image_variants()
+            if post.image_variants:
+                built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Built image variants for {built} post(s)."))
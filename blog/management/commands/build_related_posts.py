@@ -0,0 +1,26 @@
+"""
+Rebuild the precomputed "Read next" lists for every approved post.
+
+Lists are updated incrementally when a post is approved; run this nightly
+(co-reaction overlap drifts as readers react) or after bulk imports.
+
+Usage:
+    python manage.py build_related_posts [--limit 4]
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.related import build_related_posts
+
+
+class Command(BaseCommand):
+    help = "Recompute related-post recommendations from text, tags and co-reactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Related posts kept per post (default BLOG_RELATED_POSTS_LIMIT).')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        written = build_related_posts(limit=max(1, limit) if limit else None)
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} related-post row(s)."))
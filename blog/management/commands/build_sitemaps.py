@@ -0,0 +1,22 @@
+"""
+Write every sitemap shard and the sitemap index to SITEMAP_ROOT.
+
+Shards are kept current as posts are approved or withdrawn; run this after
+deploys that change URLs, after bulk imports, or when SITEMAP_ROOT is new.
+
+Usage:
+    python manage.py build_sitemaps
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.sitemaps import build_all, sitemap_root
+
+
+class Command(BaseCommand):
+    help = "Rebuild the XML sitemap index and all of its shards."
+
+    def handle(self, *args, **options):
+        written = build_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} sitemap shard(s) and the index to {sitemap_root()}."))
@@ -0,0 +1,56 @@
+"""
+Stream posts, comments or comment reports to CSV/JSONL.
+
+Usage:
+    python manage.py export_content posts --format csv --output posts.csv
+    python manage.py export_content reports --format jsonl --unresolved
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.exports import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    EXPORT_SPECS,
+    iter_export,
+)
+
+
+class Command(BaseCommand):
+    help = "Export moderation data with constant memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORT_SPECS))
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument(
+            '--output', help='File path to write (defaults to stdout).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            '--status', help='Only posts/comments with this status.')
+        parser.add_argument(
+            '--unresolved', action='store_true', help='Only open reports.')
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        model, _ = EXPORT_SPECS[kind]
+        queryset = model.objects.all()
+        if options['status'] and kind != 'reports':
+            queryset = queryset.filter(status=options['status'])
+        if options['unresolved'] and kind == 'reports':
+            queryset = queryset.filter(resolved=False)
+
+        lines = iter_export(
+            kind, options['format'], queryset, options['chunk_size'])
+
+        if options['output']:
+            count = 0
+            with open(options['output'], 'w', encoding='utf-8', newline='') as fh:
+                for line in lines:
+                    fh.write(line)
+                    count += 1
+            self.stderr.write(self.style.SUCCESS(
+                f"Wrote {count} line(s) to {options['output']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
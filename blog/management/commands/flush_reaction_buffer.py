@@ -0,0 +1,53 @@
+"""
+Apply buffered post reactions to the database.
+
+Run once (e.g. from cron) or as a long-lived worker next to the web
+process when BLOG_REACTION_BUFFER_BACKEND is "cache" (the Procfile's
+"reactions" process). The "local" backend is flushed inside each web
+process, so there is nothing for this command to do. With
+BLOG_REACTION_BUFFER_ENABLED off it exits straight away; keep the
+"reactions" process scaled to zero until the buffer is turned on.
+
+Usage:
+    python manage.py flush_reaction_buffer [--loop] [--interval 5]
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.reaction_buffer import flush, run_flusher
+
+
+class Command(BaseCommand):
+    help = "Write buffered reaction toggles to PostReaction and refresh like counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true', help='Keep flushing until interrupted.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'BLOG_REACTION_BUFFER_INTERVAL', 5),
+            help='Seconds between flushes in --loop mode.',
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'BLOG_REACTION_BUFFER_ENABLED', False):
+            self.stdout.write(
+                "The reaction buffer is disabled (BLOG_REACTION_BUFFER_ENABLED); "
+                "nothing to flush.")
+            return
+        if getattr(settings, 'BLOG_REACTION_BUFFER_BACKEND', 'cache') == 'local':
+            raise CommandError(
+                "The local reaction buffer is flushed by each web process.")
+        if not options['loop']:
+            applied = flush()
+            self.stdout.write(self.style.SUCCESS(
+                f"Flushed {applied} buffered reaction(s)."))
+            return
+        self.stdout.write(
+            f"Flushing reaction buffer every {options['interval']}s (Ctrl+C to stop).")
+        try:
+            run_flusher(options['interval'])
+        except KeyboardInterrupt:
+            flush()
@@ -0,0 +1,339 @@
+"""
+Bulk import posts and comments from a JSONL file.
+
+Each line is one object with a "type" of "post" or "comment":
+
+    {"type": "post", "ref": "old-42", "author": "mira", "title": "...",
+     "body": "...", "excerpt": "", "tags": "rpg, lore", "status": "approved",
+     "featured": false, "created_at": "2024-05-01T10:00:00Z",
+     "published_at": "2024-05-02T08:00:00Z"}
+    {"type": "comment", "post_ref": "old-42", "author": "zed", "body": "...",
+     "status": "approved", "created_at": "2024-05-03T12:00:00Z"}
+
+Comments may reference a post from the same file via "post_ref" or an
+existing post via "post_id". The file is read line by line; rows are
+written with bulk_create in chunks, so BlogPost.save() and the post_save
+notification signals never run for imported rows.
+
+The data those signals would have maintained is brought up to date once at
+the end: hot scores, near-duplicate fingerprints, follower feeds, related
+posts, sitemaps and the cached listing pages. Imported rows carry no images,
+so there are no image variants to build. ``--skip-derived`` leaves all that
+for later; then run refresh_hot_scores, build_fingerprints,
+build_related_posts and build_sitemaps.
+
+Usage:
+    python manage.py import_content export.jsonl [--batch-size 500] [--skip-derived]
+"""
+
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.feed import fan_out_post
+from blog.fingerprints import store_fingerprint
+from blog.models import BlogPost, Comment, ContentFingerprint
+from blog.purge import HOT, POSTS
+from blog.ranking import refresh_hot_scores
+from blog.related import build_related_posts
+from core.pagecache import purge
+from core.sitemaps import build_all, sitemap_root
+
+User = get_user_model()
+
+POST_STATUSES = {value for value, _ in BlogPost.STATUS_CHOICES}
+COMMENT_STATUSES = {value for value, _ in Comment.STATUS_CHOICES}
+
+
+def _parse_dt(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"invalid datetime {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Stream posts and comments from JSONL into the database with bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL file to import.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--default-author',
+            help='Username used when a row names an unknown author.',
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Do not refresh hot scores, fingerprints, feeds, related posts or sitemaps.',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = max(1, options['batch_size'])
+        self.authors = {}
+        self.default_author = None
+        if options['default_author']:
+            self.default_author = User.objects.filter(
+                username=options['default_author']).first()
+            if self.default_author is None:
+                raise CommandError(
+                    f"Unknown default author {options['default_author']!r}.")
+
+        self.post_refs = {}
+        self.taken_slugs = set()
+        self.pending_posts = []
+        self.pending_comments = []
+        self.stats = {'lines': 0, 'posts': 0, 'comments': 0, 'skipped': 0}
+        self.created_posts = []
+        self.created_comments = []
+        self.errors = []
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8') as fh:
+                for line_no, line in enumerate(fh, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    self.stats['lines'] += 1
+                    try:
+                        row = json.loads(line)
+                        row['_line'] = line_no
+                        self._queue(row)
+                    except (ValueError, KeyError, TypeError) as exc:
+                        self._skip(line_no, exc)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        self._flush_comments()
+        if not options['skip_derived']:
+            self._refresh_derived()
+        elapsed = time.perf_counter() - started
+        self._report(elapsed)
+
+    # Row handling
+
+    def _skip(self, line_no, reason):
+        self.stats['skipped'] += 1
+        if len(self.errors) < 20:
+            self.errors.append(f"line {line_no}: {reason}")
+
+    def _queue(self, row):
+        kind = row.get('type')
+        if kind == 'post':
+            self.pending_posts.append(row)
+            if len(self.pending_posts) >= self.batch_size:
+                self._flush_posts()
+        elif kind == 'comment':
+            self.pending_comments.append(row)
+            if len(self.pending_comments) >= self.batch_size:
+                self._flush_comments()
+        else:
+            raise ValueError(f"unknown row type {kind!r}")
+
+    def _resolve_authors(self, rows):
+        """Look up every new username in the batch with one query."""
+        missing = {row.get('author') for row in rows} - set(self.authors)
+        missing.discard(None)
+        if missing:
+            for user in User.objects.filter(username__in=missing):
+                self.authors[user.username] = user.pk
+            for username in missing - set(self.authors):
+                self.authors[username] = None
+
+    def _author_id(self, row):
+        author_id = self.authors.get(row.get('author'))
+        if author_id is None and self.default_author is not None:
+            author_id = self.default_author.pk
+        if author_id is None:
+            raise ValueError(f"unknown author {row.get('author')!r}")
+        return author_id
+
+    def _reserve_slugs(self, bases):
+        """Load existing slugs that could collide with this batch (two queries)."""
+        bases = set(bases) - self.taken_slugs
+        if not bases:
+            return
+        clashing = set(
+            BlogPost.objects.filter(slug__in=bases).values_list('slug', flat=True))
+        self.taken_slugs.update(clashing)
+        if clashing:
+            prefixes = Q()
+            for base in clashing:
+                prefixes |= Q(slug__startswith=f"{base}-")
+            self.taken_slugs.update(
+                BlogPost.objects.filter(prefixes).values_list('slug', flat=True))
+
+    def _unique_slug(self, base):
+        slug = base
+        counter = 2
+        while slug in self.taken_slugs:
+            slug = BlogPost.suffixed_slug(base, counter)
+            counter += 1
+        self.taken_slugs.add(slug)
+        return slug
+
+    def _build_post(self, row):
+        title = (row.get('title') or '').strip()
+        body = row.get('body') or ''
+        if not title or not body.strip():
+            raise ValueError('post needs a title and a body')
+        status = row.get('status') or BlogPost.STATUS_PENDING
+        if status not in POST_STATUSES:
+            raise ValueError(f"invalid post status {status!r}")
+
+        created_at = _parse_dt(row.get('created_at')) or timezone.now()
+        published_at = None
+        if status == BlogPost.STATUS_APPROVED:
+            published_at = _parse_dt(row.get('published_at')) or created_at
+
+        return BlogPost(
+            author_id=self._author_id(row),
+            title=title[:100],
+            excerpt=(row.get('excerpt') or '')[:250],
+            body=body,
+            tags=(row.get('tags') or '')[:100],
+            status=status,
+            featured=bool(row.get('featured')),
+            created_at=created_at,
+            published_at=published_at,
+            reading_time=BlogPost.estimate_reading_time(body),
+        )
+
+    def _flush_posts(self):
+        rows, self.pending_posts = self.pending_posts, []
+        if not rows:
+            return
+        self._resolve_authors(rows)
+
+        built = []
+        for row in rows:
+            try:
+                built.append((row, self._build_post(row)))
+            except ValueError as exc:
+                self._skip(row['_line'], exc)
+
+        bases = [
+            BlogPost.base_slug_for(post.title, post.published_at or post.created_at)
+            for _, post in built
+        ]
+        self._reserve_slugs(bases)
+        for (_, post), base in zip(built, bases):
+            post.slug = self._unique_slug(base)
+
+        with transaction.atomic():
+            created = BlogPost.objects.bulk_create([post for _, post in built])
+        for (row, _), post in zip(built, created):
+            if row.get('ref') is not None:
+                self.post_refs[str(row['ref'])] = post.pk
+        self.created_posts.extend(post.pk for post in created)
+        self.stats['posts'] += len(created)
+
+    def _build_comment(self, row):
+        body = row.get('body') or ''
+        if not body.strip():
+            raise ValueError('comment needs a body')
+        if row.get('post_ref') is not None:
+            post_id = self.post_refs.get(str(row['post_ref']))
+        else:
+            post_id = row.get('post_id')
+        if not post_id:
+            raise ValueError(f"unknown post for comment {row.get('post_ref')!r}")
+        status = row.get('status') or Comment.STATUS_PENDING
+        if status not in COMMENT_STATUSES:
+            raise ValueError(f"invalid comment status {status!r}")
+        return Comment(
+            post_id=post_id,
+            author_id=self._author_id(row),
+            body=body,
+            status=status,
+            created_at=_parse_dt(row.get('created_at')) or timezone.now(),
+        )
+
+    def _flush_comments(self):
+        # Comments may point at posts still waiting in the post buffer
+        self._flush_posts()
+        rows, self.pending_comments = self.pending_comments, []
+        if not rows:
+            return
+        self._resolve_authors(rows)
+
+        built = []
+        for row in rows:
+            try:
+                built.append((row['_line'], self._build_comment(row)))
+            except ValueError as exc:
+                self._skip(row['_line'], exc)
+
+        # Rows pointing at pre-existing posts by id: verify them in one query
+        external_ids = {c.post_id for _, c in built} - set(self.post_refs.values())
+        missing = set()
+        if external_ids:
+            missing = external_ids - set(BlogPost.objects.filter(
+                pk__in=external_ids).values_list('pk', flat=True))
+        comments = []
+        for line_no, comment in built:
+            if comment.post_id in missing:
+                self._skip(line_no, f"post {comment.post_id} does not exist")
+            else:
+                comments.append(comment)
+
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+        self.created_comments.extend((c.pk, c.post_id) for c in comments)
+        self.stats['comments'] += len(comments)
+
+    # What post_save would have maintained
+
+    def _refresh_derived(self):
+        post_ids = set(self.created_posts) | {post_id for _, post_id in self.created_comments}
+        if not post_ids:
+            return
+        refresh_hot_scores(post_ids)
+
+        for kind, model, ids in (
+            (ContentFingerprint.KIND_POST, BlogPost, self.created_posts),
+            (ContentFingerprint.KIND_COMMENT, Comment,
+             [pk for pk, _ in self.created_comments]),
+        ):
+            rows = model.objects.filter(pk__in=ids).values_list('pk', 'body')
+            for pk, body in rows.iterator(chunk_size=self.batch_size):
+                store_fingerprint(kind, pk, body)
+
+        published = BlogPost.approved.filter(pk__in=self.created_posts).only(
+            'pk', 'author_id', 'status', 'published_at')
+        if published.exists():
+            for post in published.iterator(chunk_size=self.batch_size):
+                fan_out_post(post)
+            build_related_posts()
+            if (sitemap_root() / 'sitemap.xml').exists():
+                build_all()
+        purge(POSTS, HOT)
+        self.stdout.write(
+            "Refreshed hot scores, fingerprints, feeds, related posts and sitemaps.")
+
+    # Summary
+
+    def _report(self, elapsed):
+        for error in self.errors:
+            self.stderr.write(f"Skipped {error}")
+        rows = self.stats['posts'] + self.stats['comments']
+        rate = rows / elapsed if elapsed else float(rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['posts']} post(s) and {self.stats['comments']} "
+            f"comment(s) from {self.stats['lines']} line(s); "
+            f"skipped {self.stats['skipped']}."
+        ))
+        self.stdout.write(
+            f"Elapsed {elapsed:.2f}s, {rate:.0f} rows/s "
+            f"(batch size {self.batch_size})."
+        )
@@ -0,0 +1,24 @@
+"""
+Recompute BlogPost.hot_score for every post.
+
+Scores are kept current on reaction and comment writes; run this after
+changing the ranking weights, after bulk imports, or as a periodic safety net.
+
+Usage:
+    python manage.py refresh_hot_scores [--batch-size 500]
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.ranking import refresh_hot_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute stored hot scores from reactions, comments and publish time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        changed = refresh_hot_scores(batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} hot score(s)."))
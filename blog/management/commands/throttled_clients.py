@@ -0,0 +1,40 @@
+"""
+List the clients that hit rate limits most often.
+
+Usage:
+    python manage.py throttled_clients [--limit 10] [--reset]
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.ratelimit import get_store
+
+
+class Command(BaseCommand):
+    help = "Show the most throttled users and IP addresses per rate-limit scope."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--reset', action='store_true', help='Clear the counters afterwards.')
+
+    def handle(self, *args, **options):
+        store = get_store()
+        rows = store.top(options['limit'])
+        if not rows:
+            self.stdout.write("No throttled requests recorded.")
+        else:
+            user_ids = [ident.split(':', 1)[1] for _, ident, _ in rows
+                        if ident.startswith('user:')]
+            names = dict(get_user_model().objects.filter(
+                pk__in=user_ids).values_list('pk', 'username'))
+            for scope, ident, count in rows:
+                label = ident
+                if ident.startswith('user:'):
+                    pk = int(ident.split(':', 1)[1])
+                    label = f"{names.get(pk, '?')} ({ident})"
+                self.stdout.write(f"{count:>6}  {scope:<10} {label}")
+        if options['reset']:
+            store.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters cleared."))
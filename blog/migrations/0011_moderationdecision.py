@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_blogpost_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationDecision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=16)),
+                ('object_id', models.PositiveIntegerField()),
+                ('action', models.CharField(choices=[('approve', 'Auto-approved'), ('queue', 'Queued for review'), ('reject', 'Auto-rejected')], max_length=16)),
+                ('score', models.IntegerField()),
+                ('signals', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='moderation_decisions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Moderation Decision',
+                'verbose_name_plural': 'Moderation Decisions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='blog_modera_kind_0712f9_idx')],
+            },
+        ),
+    ]
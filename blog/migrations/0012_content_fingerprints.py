@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_moderationdecision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='blog.blogpost'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='blog.comment'),
+        ),
+        migrations.CreateModel(
+            name='ContentFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=16)),
+                ('object_id', models.PositiveIntegerField()),
+                ('signature', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Content Fingerprint',
+                'verbose_name_plural': 'Content Fingerprints',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_fingerprint_per_object')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FingerprintBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(db_index=True)),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='blog.contentfingerprint')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_content_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='hot_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes(apps, schema_editor):
+    # Until now only flushed buffers kept likes; direct toggles left it alone
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    PostReaction = apps.get_model('blog', 'PostReaction')
+    positive = (
+        PostReaction.objects.filter(post_id=OuterRef('pk'), reaction__in=('like', 'love'))
+        .order_by().values('post_id').annotate(total=Count('id')).values('total')
+    )
+    BlogPost.objects.update(
+        likes=Coalesce(Subquery(positive, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_feed_entries'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_likes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# Aspect ratios of blog.images.IMAGE_VARIANT_PRESETS when heights were added
+ASPECTS = {'mobile': (4, 3), 'wide': (16, 9)}
+
+
+def add_heights(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    changed = []
+    for post in BlogPost.objects.exclude(image_variants={}).only('pk', 'image_variants'):
+        variants = post.image_variants
+        for name, (aspect_w, aspect_h) in ASPECTS.items():
+            variant = variants.get(name)
+            if variant and 'width' in variant and 'height' not in variant:
+                variant['height'] = round(variant['width'] * aspect_h / aspect_w)
+                changed.append(post)
+    BlogPost.objects.bulk_update(set(changed), ['image_variants'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_backfill_post_likes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_heights, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,7 @@ except ImportError:
 
 # Email helpers (use on_commit)
 from .emails import notify_author_post_approved, notify_author_post_rejected
+from .images import build_image_variants, delete_local_variants
 
 User = get_user_model()
 
@@ -76,6 +77,9 @@ class BlogPost(models.Model):
         image = models.ImageField(
             upload_to='blog_images/', blank=True, null=True)
 
+    # Precomputed responsive srcsets, rebuilt whenever the image changes
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
     tags = models.CharField(
         max_length=100,
         blank=True,
@@ -88,6 +92,14 @@ class BlogPost(models.Model):
         default=STATUS_PENDING,
     )
     featured = models.BooleanField(default=False)
+    # Set at submit time when the text nearly matches an earlier post
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+    )
 
     created_at = models.DateTimeField(default=timezone.now, editable=False)
     published_at = models.DateTimeField(blank=True, null=True)
@@ -98,6 +110,8 @@ class BlogPost(models.Model):
         help_text='Estimated reading time in minutes',
     )
     likes = models.PositiveIntegerField(default=0)
+    # Time-decayed engagement rank, maintained by blog/ranking.py
+    hot_score = models.FloatField(default=0, db_index=True, editable=False)
     rating = models.PositiveIntegerField(
         default=0,
         help_text='Rating out of 5 (future use)',
@@ -115,18 +129,29 @@ class BlogPost(models.Model):
         """Keep published_at in sync with status, generate slug, compute reading time, then save."""
         previous_status = None
         previous_featured = None
+        previous_image = None
+        previous_body = None
 
         if self.pk:
             previous = BlogPost.objects.filter(
-                pk=self.pk).values('status', 'featured').first()
+                pk=self.pk).values('status', 'featured', 'image', 'body').first()
             if previous:
                 previous_status = previous['status']
                 previous_featured = previous['featured']
+                previous_image = self._image_key(previous['image'])
+                previous_body = previous['body']
 
         # Flag for signals: notify when featured flips from False -> True
         self._notify_featured = bool(
             previous_featured is not None and not previous_featured and self.featured
         )
+        # Flag for signals: featured flips from True -> False
+        self._left_featured = bool(previous_featured and not self.featured)
+        # Flag for signals: the post entered or left the approved set
+        self._approval_changed = previous_status != self.status and self.STATUS_APPROVED in (
+            previous_status, self.status)
+        # Flag for signals: the fingerprinted text changed
+        self._body_changed = previous_body != self.body
 
         # Publishing rules
         if self.status == self.STATUS_APPROVED and not self.published_at:
@@ -136,12 +161,8 @@ class BlogPost(models.Model):
 
         # Slug
         if not self.slug:
-            slug_field = self._meta.get_field('slug')
-            base_slug = slugify(self.title)[:100] or 'post'
             reference_dt = self.published_at or timezone.now()
-            date_str = reference_dt.strftime('%Y-%m-%d')
-            base_without_suffix = f"{base_slug}-{date_str}"[
-                : slug_field.max_length].rstrip('-')
+            base_without_suffix = self.base_slug_for(self.title, reference_dt)
 
             existing = BlogPost.objects.exclude(
                 pk=self.pk) if self.pk else BlogPost.objects.all()
@@ -154,24 +175,21 @@ class BlogPost(models.Model):
             unique_slug = base_without_suffix
             counter = 2
             while existing.filter(slug=unique_slug).exists():
-                suffix = f"-{counter}"
-                allowed_length = slug_field.max_length - len(suffix)
-                trimmed_base = base_without_suffix[: max(
-                    allowed_length, 1)].rstrip('-')
-                if not trimmed_base:
-                    trimmed_base = base_without_suffix[:1] or 'post'
-                unique_slug = f"{trimmed_base}{suffix}"
+                unique_slug = self.suffixed_slug(base_without_suffix, counter)
                 counter += 1
 
             self.slug = unique_slug
 
         # Reading time (~200 wpm)
         if self.body:
-            words = len(self.body.split())
-            self.reading_time = max(1, words // 200)
+            self.reading_time = self.estimate_reading_time(self.body)
 
         super().save(*args, **kwargs)
 
+        # Responsive variants: only rebuilt when the stored image changes
+        if self._image_key(self.image) != previous_image:
+            self.refresh_image_variants()
+
         # Email notifications via helpers (after commit)
         if (
             previous_status is not None
@@ -187,6 +205,42 @@ class BlogPost(models.Model):
         ):
             transaction.on_commit(lambda: notify_author_post_rejected(self))
 
+    @classmethod
+    def base_slug_for(cls, title, reference_dt):
+        """Slug stem: slugified title plus the reference date."""
+        max_length = cls._meta.get_field('slug').max_length
+        base_slug = slugify(title)[:100] or 'post'
+        date_str = reference_dt.strftime('%Y-%m-%d')
+        return f"{base_slug}-{date_str}"[:max_length].rstrip('-')
+
+    @classmethod
+    def suffixed_slug(cls, base, counter):
+        """Append '-<counter>' to a slug stem, trimming it to fit max_length."""
+        max_length = cls._meta.get_field('slug').max_length
+        suffix = f"-{counter}"
+        trimmed_base = base[: max(max_length - len(suffix), 1)].rstrip('-')
+        if not trimmed_base:
+            trimmed_base = base[:1] or 'post'
+        return f"{trimmed_base}{suffix}"
+
+    @staticmethod
+    def estimate_reading_time(body):
+        """Minutes to read ``body`` at ~200 words per minute (at least 1)."""
+        return max(1, len(body.split()) // 200)
+
+    def _image_key(self, value):
+        """Comparable string form of an image value (public_id or file name)."""
+        return self._meta.get_field('image').get_prep_value(value) or None
+
+    def refresh_image_variants(self):
+        """Rebuild and store the srcset variants for the current image."""
+        field = self._meta.get_field('image')
+        if self.image_variants.get('files') and hasattr(field, 'storage'):
+            delete_local_variants(self.image_variants, field.storage)
+        self.image_variants = build_image_variants(self.image)
+        BlogPost.objects.filter(pk=self.pk).update(
+            image_variants=self.image_variants)
+
     def __str__(self):
         return self.title
 
@@ -224,6 +278,14 @@ class Comment(models.Model):
         choices=STATUS_CHOICES,
         default=STATUS_PENDING,
     )
+    # Set at submit time when the text nearly matches an earlier comment
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+    )
 
     created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
@@ -311,3 +373,132 @@ class CommentReport(models.Model):
 
     def __str__(self):
         return f"Report on comment {self.comment_id} by {self.reported_by}"
+
+
+class ContentFingerprint(models.Model):
+    """MinHash signature of a post or comment body (see blog/fingerprints.py)."""
+
+    KIND_POST = 'post'
+    KIND_COMMENT = 'comment'
+    KIND_CHOICES = [
+        (KIND_POST, 'Post'),
+        (KIND_COMMENT, 'Comment'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    signature = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Content Fingerprint'
+        verbose_name_plural = 'Content Fingerprints'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_fingerprint_per_object')
+        ]
+
+    def __str__(self):
+        return f"Fingerprint for {self.kind} {self.object_id}"
+
+
+class FingerprintBand(models.Model):
+    """One hashed band of a signature; equal values mark duplicate candidates."""
+    fingerprint = models.ForeignKey(
+        ContentFingerprint, on_delete=models.CASCADE, related_name='bands')
+    value = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Band {self.value} of {self.fingerprint_id}"
+
+
+class ModerationDecision(models.Model):
+    """Audit record of the automatic pre-moderation verdict for a submission."""
+
+    KIND_POST = 'post'
+    KIND_COMMENT = 'comment'
+    KIND_CHOICES = [
+        (KIND_POST, 'Post'),
+        (KIND_COMMENT, 'Comment'),
+    ]
+
+    ACTION_APPROVE = 'approve'
+    ACTION_QUEUE = 'queue'
+    ACTION_REJECT = 'reject'
+    ACTION_CHOICES = [
+        (ACTION_APPROVE, 'Auto-approved'),
+        (ACTION_QUEUE, 'Queued for review'),
+        (ACTION_REJECT, 'Auto-rejected'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    # Plain id rather than a FK so the audit trail outlives deleted content
+    object_id = models.PositiveIntegerField()
+    author = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='moderation_decisions')
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES)
+    score = models.IntegerField()
+    signals = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Moderation Decision'
+        verbose_name_plural = 'Moderation Decisions'
+        indexes = [models.Index(fields=['kind', 'object_id'])]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.kind} {self.object_id} (score {self.score})"
+
+
+class RelatedPost(models.Model):
+    """Precomputed "read next" entry: ``related`` ranked for ``post`` (see blog/related.py)."""
+    post = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['post', 'rank']
+        verbose_name = 'Related Post'
+        verbose_name_plural = 'Related Posts'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'related'], name='unique_related_post_pair')
+        ]
+        indexes = [models.Index(fields=['post', 'rank'])]
+
+    def __str__(self):
+        return f"{self.related_id} for {self.post_id} (#{self.rank})"
+
+
+class FeedEntry(models.Model):
+    """
+    A post fanned out to one follower's feed (see blog/feed.py).
+
+    ``published_at`` is copied from the post so the feed is read with a
+    keyset query on a single index.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed_entries')
+    post = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name='feed_entries')
+    published_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Feed Entry'
+        verbose_name_plural = 'Feed Entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-published_at', '-post'],
+                         name='blog_feed_user_keyset_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in feed of {self.user_id}"
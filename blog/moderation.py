@@ -0,0 +1,236 @@
+# blog/moderation.py
+"""
+Pre-moderation scoring for new posts and comments.
+
+Each scorer looks at one submission and returns a ``Signal`` (or None when
+it has nothing to say). Positive points look spammy, negative points look
+trustworthy. The points are summed and compared with two thresholds:
+
+- total <= ``BLOG_MODERATION_APPROVE_AT``: published straight away
+- total >= ``BLOG_MODERATION_REJECT_AT``: rejected as spam
+- anything in between: queued for staff as before
+
+Scorers are plain callables listed by dotted path in
+``BLOG_MODERATION_SCORERS``, so new checks can be plugged in from settings.
+Every verdict is stored as a ``ModerationDecision`` row for auditing.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import Count, Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .fingerprints import find_near_duplicate
+from .models import BlogPost, Comment, CommentReport, ModerationDecision
+from .textfilter import get_text_filter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCORERS = [
+    'blog.moderation.banned_words_scorer',
+    'blog.moderation.link_density_scorer',
+    'blog.moderation.author_history_scorer',
+    'blog.moderation.duplicate_scorer',
+]
+
+
+class Submission(NamedTuple):
+    """What the scorers see: the unsaved instance plus its text."""
+    kind: str
+    instance: object
+    author: object
+    text: str
+
+
+class Signal(NamedTuple):
+    scorer: str
+    points: int
+    reason: str
+
+
+class Verdict(NamedTuple):
+    action: str
+    score: int
+    signals: list
+
+    @property
+    def status(self):
+        """Model status matching the action (posts and comments share values)."""
+        return {
+            ModerationDecision.ACTION_APPROVE: Comment.STATUS_APPROVED,
+            ModerationDecision.ACTION_REJECT: Comment.STATUS_REJECTED,
+        }.get(self.action, Comment.STATUS_PENDING)
+
+
+def _word_count(text):
+    return len(re.findall(r'\w+', text))
+
+
+def _normalise(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+# Scorers
+
+def banned_words_scorer(submission):
+    """Ten points per distinct banned term."""
+    terms = get_text_filter().scan(submission.text).terms
+    if not terms:
+        return None
+    return Signal('banned_words', 10 * len(terms), f"banned terms: {', '.join(terms)}")
+
+
+def link_density_scorer(submission):
+    """Links cost two points each, plus a penalty when they crowd the text."""
+    links = get_text_filter().scan(submission.text).link_count
+    if not links:
+        return None
+    words = max(_word_count(submission.text), 1)
+    per_hundred = links * 100 / words
+    points = 2 * links
+    if per_hundred > getattr(settings, 'BLOG_MODERATION_MAX_LINK_DENSITY', 3):
+        points += 4
+    return Signal('link_density', points,
+                  f"{links} link(s), {per_hundred:.1f} per 100 words")
+
+
+def author_history_scorer(submission):
+    """Reward a clean approval record; penalise rejections and reports."""
+    author = submission.author
+    totals = {'approved': 0, 'rejected': 0}
+    for model in (BlogPost, Comment):
+        counts = model.objects.filter(author=author).aggregate(
+            approved=Count('id', filter=Q(status=model.STATUS_APPROVED)),
+            rejected=Count('id', filter=Q(status=model.STATUS_REJECTED)),
+        )
+        totals['approved'] += counts['approved']
+        totals['rejected'] += counts['rejected']
+    reports = CommentReport.objects.filter(comment__author=author).count()
+
+    points = -(min(totals['approved'], 8) // 2)
+    points += 3 * totals['rejected'] + 2 * min(reports, 5)
+    if not points:
+        return None
+    return Signal(
+        'author_history', points,
+        f"{totals['approved']} approved, {totals['rejected']} rejected, "
+        f"{reports} report(s)",
+    )
+
+
+def duplicate_scorer(submission):
+    """Repeating your own recent text, or anyone's from the last day, is suspect."""
+    instance = submission.instance
+    if instance.duplicate_of_id:
+        if instance.duplicate_of.author_id == instance.author_id:
+            return Signal('duplicate', 8, 'near-duplicate of your own submission')
+        return Signal('duplicate', 6, 'near-duplicate of another submission')
+
+    # Texts too short to fingerprint: fall back to exact matches
+    model = BlogPost if submission.kind == ModerationDecision.KIND_POST else Comment
+    body = instance.body or ''
+    normalised = _normalise(body)
+    if not normalised:
+        return None
+    own_recent = (
+        model.objects.filter(author=submission.author)
+        .order_by('-created_at')
+        .values_list('body', flat=True)[:20]
+    )
+    if any(_normalise(body) == normalised for body in own_recent):
+        return Signal('duplicate', 8, 'repeats one of your recent submissions')
+    since = timezone.now() - timedelta(days=1)
+    if model.objects.filter(body=body, created_at__gte=since).exists():
+        return Signal('duplicate', 6, 'identical to a submission from the last day')
+    return None
+
+
+# Pipeline
+
+@lru_cache(maxsize=1)
+def get_scorers():
+    paths = getattr(settings, 'BLOG_MODERATION_SCORERS', DEFAULT_SCORERS)
+    return tuple(import_string(path) for path in paths)
+
+
+@receiver(setting_changed, dispatch_uid='blog_moderation_setting_changed')
+def _reset_scorers(setting, **kwargs):
+    if setting == 'BLOG_MODERATION_SCORERS':
+        get_scorers.cache_clear()
+
+
+def score_submission(submission):
+    """Run every scorer and turn the total into a Verdict."""
+    signals = []
+    for scorer in get_scorers():
+        signal = scorer(submission)
+        if signal is not None:
+            signals.append(signal)
+    total = sum(signal.points for signal in signals)
+
+    if total >= getattr(settings, 'BLOG_MODERATION_REJECT_AT', 10):
+        action = ModerationDecision.ACTION_REJECT
+    elif total <= getattr(settings, 'BLOG_MODERATION_APPROVE_AT', -3):
+        action = ModerationDecision.ACTION_APPROVE
+    else:
+        action = ModerationDecision.ACTION_QUEUE
+    return Verdict(action, total, signals)
+
+
+def link_duplicate(instance, kind):
+    """
+    Point ``instance.duplicate_of`` at the first item of a near-duplicate
+    chain, so a spam wave collapses into one moderation item.
+    """
+    model = BlogPost if kind == ModerationDecision.KIND_POST else Comment
+    original_id = find_near_duplicate(kind, instance.body, exclude_id=instance.pk)
+    if original_id is None:
+        return None
+    original = model.objects.filter(pk=original_id).values(
+        'pk', 'duplicate_of_id').first()
+    if original is None:
+        return None
+    instance.duplicate_of_id = original['duplicate_of_id'] or original['pk']
+    return instance.duplicate_of_id
+
+
+def moderate_post(post):
+    link_duplicate(post, ModerationDecision.KIND_POST)
+    return score_submission(Submission(
+        ModerationDecision.KIND_POST, post, post.author,
+        f"{post.title}\n{post.excerpt or ''}\n{post.body}",
+    ))
+
+
+def moderate_comment(comment):
+    link_duplicate(comment, ModerationDecision.KIND_COMMENT)
+    return score_submission(Submission(
+        ModerationDecision.KIND_COMMENT, comment, comment.author, comment.body))
+
+
+def record_decision(verdict, instance):
+    """Store the verdict for a saved post or comment."""
+    kind = (ModerationDecision.KIND_POST if isinstance(instance, BlogPost)
+            else ModerationDecision.KIND_COMMENT)
+    logger.info(
+        "Moderation %s#%s by user %s: %s (score %s)",
+        kind, instance.pk, instance.author_id, verdict.action, verdict.score,
+    )
+    return ModerationDecision.objects.create(
+        kind=kind,
+        object_id=instance.pk,
+        author_id=instance.author_id,
+        action=verdict.action,
+        score=verdict.score,
+        signals=[signal._asdict() for signal in verdict.signals],
+    )
@@ -0,0 +1,44 @@
+# blog/purge.py
+"""
+Page-cache tags for blog pages and the purges that go with each write.
+
+- ``post:<slug>``: the detail page of one post.
+- ``posts``: pages listing posts (blog index, homepage featured grid).
+- ``posts:hot``: the hot ordering of the index, which moves with engagement.
+
+Post saves and deletes purge the post and every listing. Comments and
+reactions purge the post and the hot ordering only.
+"""
+
+from __future__ import annotations
+
+from core.pagecache import purge
+
+POSTS = 'posts'
+HOT = 'posts:hot'
+
+
+def post_tag(slug):
+    return f'post:{slug}'
+
+
+def index_tags(request):
+    return [POSTS, HOT] if request.GET.get('sort') == 'hot' else [POSTS]
+
+
+def detail_tags(request, year, month, day, slug):
+    return [post_tag(slug)]
+
+
+def home_tags(request, *args, **kwargs):
+    return [POSTS]
+
+
+def purge_post(post):
+    """A post was created, edited, (un)published or deleted."""
+    purge(post_tag(post.slug), POSTS, HOT)
+
+
+def purge_engagement(post):
+    """A comment or reaction on ``post`` changed."""
+    purge(post_tag(post.slug), HOT)
@@ -0,0 +1,95 @@
+# blog/ranking.py
+"""
+Hot-score ranking for posts.
+
+The score follows the Reddit "hot" formula: the log of engagement plus a
+term that grows linearly with publication time,
+
+    score = sign(s) * log10(max(|s|, 1)) + (published - EPOCH) / DECAY_SECONDS
+
+where ``s`` weighs reactions and approved comments. Each DECAY_SECONDS of
+age is worth a tenfold engagement difference. Because the time term is fixed
+at publication, a score only changes when engagement changes. So scores are
+stored in the indexed ``BlogPost.hot_score`` column. They are refreshed for
+one post after a reaction or comment write, and for all posts by
+``refresh_hot_scores`` when the weights change.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.pagecache import purge
+
+from .models import BlogPost, Comment, PostReaction
+from .purge import HOT
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# Reaction value -> engagement weight
+REACTION_WEIGHTS = {'like': 1, 'love': 2, 'dislike': -1}
+COMMENT_WEIGHT = 2
+
+
+def hot_score(engagement, published_at):
+    if published_at is None:
+        return 0.0
+    order = math.log10(max(abs(engagement), 1))
+    sign = (engagement > 0) - (engagement < 0)
+    decay = getattr(settings, 'BLOG_HOT_DECAY_SECONDS', 45000)
+    return round(sign * order + (published_at - EPOCH).total_seconds() / decay, 7)
+
+
+def _count(queryset):
+    """Rows of ``queryset`` pointing at the outer post, as a correlated subquery."""
+    rows = queryset.filter(post=OuterRef('pk')).order_by().values('post')
+    return Coalesce(
+        Subquery(rows.annotate(n=Count('pk')).values('n'), output_field=IntegerField()),
+        Value(0))
+
+
+def _engagement_rows(queryset):
+    # One subquery per total: joining reactions and comments at once would
+    # multiply the rows and need COUNT(DISTINCT) to undo it
+    annotations = {
+        f'n_{value}': _count(PostReaction.objects.filter(reaction=value))
+        for value in REACTION_WEIGHTS
+    }
+    annotations['n_comments'] = _count(Comment.objects.filter(status=Comment.STATUS_APPROVED))
+    return queryset.order_by().annotate(**annotations).values(
+        'pk', 'status', 'published_at', 'hot_score', *annotations)
+
+
+def _score_for(row):
+    if row['status'] != BlogPost.STATUS_APPROVED:
+        return 0.0
+    engagement = sum(row[f'n_{value}'] * weight
+                     for value, weight in REACTION_WEIGHTS.items())
+    engagement += row['n_comments'] * COMMENT_WEIGHT
+    return hot_score(engagement, row['published_at'])
+
+
+def refresh_hot_scores(post_ids=None, batch_size=500):
+    """
+    Recompute and store hot scores for ``post_ids`` (all posts when None).
+
+    Returns the number of posts whose score changed.
+    """
+    queryset = BlogPost.objects.all()
+    if post_ids is not None:
+        queryset = queryset.filter(pk__in=list(post_ids))
+    changed = []
+    for row in _engagement_rows(queryset).iterator(chunk_size=batch_size):
+        score = _score_for(row)
+        if score != row['hot_score']:
+            changed.append(BlogPost(pk=row['pk'], hot_score=score))
+    # bulk_update skips save() and signals, so slugs and emails are untouched
+    BlogPost.objects.bulk_update(changed, ['hot_score'], batch_size=batch_size)
+    if changed:
+        purge(HOT)
+    return len(changed)
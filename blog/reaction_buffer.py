@@ -0,0 +1,367 @@
+# blog/reaction_buffer.py
+"""
+Optional write-behind buffer for post reactions.
+
+During a launch event one featured post can take thousands of reaction
+clicks a minute, all contending on the same rows. With
+``BLOG_REACTION_BUFFER_ENABLED`` on, toggles for buffered posts (featured
+ones by default, see ``BLOG_REACTION_BUFFER_SCOPE``) only update a buffer:
+
+- each user's latest desired reaction per post (later clicks overwrite
+  earlier ones, so ten toggles become one write), and
+- running per-post deltas of the reaction totals.
+
+``flush_reaction_buffer`` (or the in-process thread started for the local
+backend) drains the buffer at a fixed interval: it upserts and deletes the
+``PostReaction`` rows in bulk and recomputes ``BlogPost.likes`` for the
+touched posts. Until then, readers merge the buffer, so a user sees their
+own reaction and the adjusted totals straight away. Unbuffered toggles
+adjust ``likes`` as they happen (``reactions.apply_like_deltas``). When a
+post leaves the buffered scope, the buffer is flushed on commit (see
+``blog.signals``) so its direct toggles start from the current rows.
+
+Backends (``BLOG_REACTION_BUFFER_BACKEND``):
+
+- ``"cache"``: the ``BLOG_REACTION_BUFFER_CACHE`` alias, which must be
+  shared by every worker and by the ``flush_reaction_buffer`` process
+  (Redis, Memcached, database). A local-memory cache is refused with
+  ImproperlyConfigured: the flusher would drain its own empty copy. Changes
+  go into a journal addressed by an atomic ``incr`` counter; the flusher
+  replays it.
+- ``"local"``: a per-process dictionary flushed by a thread in the same
+  process, for single-process deployments.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import BlogPost, PostReaction, ReactionType
+from .purge import purge_engagement
+from .ranking import refresh_hot_scores
+from .reactions import POSITIVE_REACTIONS, _result
+
+logger = logging.getLogger(__name__)
+
+# Stored in the buffer for "no reaction"
+NONE = ''
+
+# Written by the flusher into a journal slot it gave up waiting for
+SKIPPED = 'skipped'
+
+# Journal slots a writer claims before giving up on recording a toggle
+_RECORD_ATTEMPTS = 5
+
+STATE_TTL = 24 * 3600
+
+
+class LocalBuffer:
+    """Per-process buffer guarded by a lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.states = {}
+        self.deltas = defaultdict(Counter)
+        # Drained but not yet written; still merged into reads
+        self.inflight_states = {}
+        self.inflight_deltas = defaultdict(Counter)
+
+    def get_state(self, post_id, user_id):
+        key = (post_id, user_id)
+        with self.lock:
+            if key in self.states:
+                return self.states[key]
+            return self.inflight_states.get(key)
+
+    def record(self, post_id, user_id, state, deltas):
+        with self.lock:
+            self.states[(post_id, user_id)] = state
+            self.deltas[post_id].update(deltas)
+
+    def pending_deltas(self, post_id):
+        combined = Counter()
+        with self.lock:
+            combined.update(self.deltas.get(post_id, {}))
+            combined.update(self.inflight_deltas.get(post_id, {}))
+        return {value: delta for value, delta in combined.items() if delta}
+
+    def drain(self):
+        """Return (states, deltas, token) for everything recorded so far."""
+        with self.lock:
+            self.inflight_states, self.states = self.states, {}
+            self.inflight_deltas, self.deltas = self.deltas, defaultdict(Counter)
+            deltas = {post_id: dict(counter)
+                      for post_id, counter in self.inflight_deltas.items()}
+            return dict(self.inflight_states), deltas, None
+
+    def finish(self, token, drained_deltas):
+        with self.lock:
+            self.inflight_states = {}
+            self.inflight_deltas = defaultdict(Counter)
+
+
+class CacheBuffer:
+    """
+    Buffer in a shared Django cache.
+
+    ``state:<post>:<user>`` holds each user's latest reaction. Every toggle
+    also appends ``(post, user, deltas)`` to a journal slot numbered by
+    ``incr`` on ``seq``; the flusher replays slots after ``flushed``.
+    ``delta:<post>:<value>`` counters give readers the unflushed totals.
+
+    Slots are filled with ``add``. A slot still empty on two consecutive
+    flushes gets a SKIPPED marker the same way, so exactly one side wins:
+    either the flusher replays the entry or the writer sees its slot taken
+    and journals the toggle again under a new one. Deltas counted for a
+    toggle are therefore always drained by some flush.
+    """
+
+    prefix = 'reactionbuf'
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+        if isinstance(self.cache, (LocMemCache, DummyCache)):
+            raise ImproperlyConfigured(
+                f"BLOG_REACTION_BUFFER_CACHE {alias!r} is local to each process; "
+                "point it at a cache shared by the workers and the flusher, or "
+                "set BLOG_REACTION_BUFFER_BACKEND to 'local'.")
+
+    def _key(self, *parts):
+        return ':'.join([self.prefix, *map(str, parts)])
+
+    def get_state(self, post_id, user_id):
+        return self.cache.get(self._key('state', post_id, user_id))
+
+    def record(self, post_id, user_id, state, deltas):
+        self.cache.set(self._key('state', post_id, user_id), state, STATE_TTL)
+        for value, delta in deltas.items():
+            key = self._key('delta', post_id, value)
+            self.cache.add(key, 0, None)
+            self.cache.incr(key, delta)
+        seq_key = self._key('seq')
+        self.cache.add(seq_key, 0, None)
+        for _ in range(_RECORD_ATTEMPTS):
+            slot = self.cache.incr(seq_key)
+            if self.cache.add(self._key('entry', slot), (post_id, user_id, deltas), STATE_TTL):
+                return
+        raise RuntimeError(f"No free reaction journal slot after {_RECORD_ATTEMPTS} attempts")
+
+    def pending_deltas(self, post_id):
+        keys = {self._key('delta', post_id, value): value
+                for value in ReactionType.values}
+        found = self.cache.get_many(list(keys))
+        return {keys[key]: total for key, total in found.items() if total}
+
+    def drain(self):
+        """Return (states, deltas, token) for the journal slots ready to flush."""
+        flushed = self.cache.get(self._key('flushed'), 0)
+        head = self.cache.get(self._key('seq'), 0)
+        if head <= flushed:
+            return {}, {}, (flushed, flushed, set())
+        slots = [self._key('entry', n) for n in range(flushed + 1, head + 1)]
+        entries = self.cache.get_many(slots)
+
+        # A writer may have claimed a slot but not filled it yet: stop there,
+        # unless the same slot was already missing on the previous run. Then
+        # mark it skipped; if the writer filled it meanwhile, replay it after all
+        stalled = self.cache.get(self._key('stalled'))
+        last = flushed
+        skipped = set()
+        for n, slot in enumerate(slots, start=flushed + 1):
+            if slot not in entries:
+                if n != stalled:
+                    self.cache.set(self._key('stalled'), n, None)
+                    break
+                if self.cache.add(slot, SKIPPED, STATE_TTL):
+                    skipped.add(n)
+                else:
+                    entries[slot] = self.cache.get(slot)
+            last = n
+
+        pairs = set()
+        deltas = defaultdict(Counter)
+        for slot in slots[:last - flushed]:
+            entry = entries.get(slot)
+            if entry is not None and entry != SKIPPED:
+                post_id, user_id, entry_deltas = entry
+                pairs.add((post_id, user_id))
+                deltas[post_id].update(entry_deltas)
+        states = self.cache.get_many(
+            [self._key('state', post_id, user_id) for post_id, user_id in pairs])
+        resolved = {}
+        for post_id, user_id in pairs:
+            state = states.get(self._key('state', post_id, user_id))
+            if state is not None:
+                resolved[(post_id, user_id)] = state
+        deltas = {post_id: dict(counter) for post_id, counter in deltas.items()}
+        return resolved, deltas, (flushed, last, skipped)
+
+    def finish(self, token, drained_deltas):
+        flushed, last, skipped = token
+        for post_id, counter in drained_deltas.items():
+            for value, delta in counter.items():
+                if delta:
+                    key = self._key('delta', post_id, value)
+                    self.cache.add(key, 0, None)
+                    self.cache.decr(key, delta)
+        self.cache.set(self._key('flushed'), last, None)
+        # SKIPPED markers stay until they expire to keep late writers out
+        self.cache.delete_many(
+            [self._key('entry', n) for n in range(flushed + 1, last + 1)
+             if n not in skipped])
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            if getattr(settings, 'BLOG_REACTION_BUFFER_BACKEND', 'cache') == 'local':
+                _buffer = LocalBuffer()
+            else:
+                _buffer = CacheBuffer(
+                    getattr(settings, 'BLOG_REACTION_BUFFER_CACHE', 'default'))
+        return _buffer
+
+
+@receiver(setting_changed, dispatch_uid='blog_reaction_buffer_setting_changed')
+def _reset_buffer(setting, **kwargs):
+    global _buffer
+    if setting.startswith('BLOG_REACTION_BUFFER'):
+        _buffer = None
+
+
+def is_buffered_row(row):
+    """``is_buffered`` for a ``values()`` row holding the post's ``featured`` flag."""
+    if not getattr(settings, 'BLOG_REACTION_BUFFER_ENABLED', False):
+        return False
+    if getattr(settings, 'BLOG_REACTION_BUFFER_SCOPE', 'featured') == 'all':
+        return True
+    return bool(row['featured'])
+
+
+def is_buffered(post):
+    """True when reactions on ``post`` go through the write-behind buffer."""
+    return is_buffered_row({'featured': post.featured})
+
+
+def buffered_toggle(post_id, user_id, value):
+    """Toggle in the buffer, relative to the user's buffered or stored reaction."""
+    buffer = get_buffer()
+    if isinstance(buffer, LocalBuffer):
+        start_local_flusher()
+    current = buffer.get_state(post_id, user_id)
+    if current is None:
+        current = PostReaction.objects.filter(
+            post_id=post_id, user_id=user_id).values_list('reaction', flat=True).first()
+    current = current or None
+    result = _result(current, value)
+    buffer.record(post_id, user_id, result.reaction or NONE, result.deltas)
+    return result
+
+
+def merged_user_reaction(post_id, user_id, stored):
+    """The user's reaction including any unflushed toggle."""
+    state = get_buffer().get_state(post_id, user_id)
+    if state is None:
+        return stored
+    return state or None
+
+
+def merged_counts(post_id, counts):
+    """Stored totals plus unflushed deltas."""
+    merged = dict(counts)
+    for value, delta in get_buffer().pending_deltas(post_id).items():
+        merged[value] = max(0, merged.get(value, 0) + delta)
+    return merged
+
+
+def flush(buffer=None):
+    """Apply everything buffered so far; returns the number of rows touched."""
+    buffer = buffer or get_buffer()
+    states, deltas, token = buffer.drain()
+    if not states:
+        buffer.finish(token, deltas)
+        return 0
+
+    now = timezone.now()
+    upserts = [
+        PostReaction(post_id=post_id, user_id=user_id, reaction=state,
+                     created_at=now, updated_at=now)
+        for (post_id, user_id), state in states.items() if state
+    ]
+    removals = defaultdict(list)
+    for (post_id, user_id), state in states.items():
+        if not state:
+            removals[post_id].append(user_id)
+    post_ids = {post_id for post_id, _ in states}
+
+    with transaction.atomic():
+        if upserts:
+            PostReaction.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=['post', 'user'],
+                update_fields=['reaction', 'updated_at'],
+            )
+        if removals:
+            condition = Q()
+            for post_id, user_ids in removals.items():
+                condition |= Q(post_id=post_id, user_id__in=user_ids)
+            PostReaction.objects.filter(condition).delete()
+        positive = (
+            PostReaction.objects.filter(
+                post_id=OuterRef('pk'), reaction__in=POSITIVE_REACTIONS)
+            .order_by().values('post_id').annotate(total=Count('id')).values('total')
+        )
+        BlogPost.objects.filter(pk__in=post_ids).update(
+            likes=Coalesce(Subquery(positive, output_field=IntegerField()), Value(0)))
+        refresh_hot_scores(post_ids)
+    buffer.finish(token, deltas)
+    for post in BlogPost.objects.filter(pk__in=post_ids).only('slug'):
+        purge_engagement(post)
+    logger.info("Flushed %s buffered reaction(s) for %s post(s)", len(states), len(post_ids))
+    return len(states)
+
+
+def run_flusher(interval, stop_event=None):
+    """Flush every ``interval`` seconds until ``stop_event`` is set."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            flush()
+        except Exception:
+            logger.exception("Reaction buffer flush failed")
+        stop_event.wait(interval)
+
+
+_flusher_thread = None
+
+
+def start_local_flusher():
+    """Start the in-process flusher thread used by the local backend."""
+    global _flusher_thread
+    if _flusher_thread is not None and _flusher_thread.is_alive():
+        return _flusher_thread
+    interval = getattr(settings, 'BLOG_REACTION_BUFFER_INTERVAL', 5)
+    _flusher_thread = threading.Thread(
+        target=run_flusher, args=(interval,), name='reaction-buffer-flusher', daemon=True)
+    _flusher_thread.start()
+    return _flusher_thread
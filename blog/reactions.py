@@ -0,0 +1,194 @@
+# blog/reactions.py
+"""
+Reaction toggling in as few statements as the database allows.
+
+Clicking a reaction adds it, switches an existing reaction to it, or
+removes it when it was already chosen. The ORM version (get_or_create, then
+save or delete) costs up to three round trips and can hit an IntegrityError
+when a double-click races itself. ``toggle_reaction`` does the same work as:
+
+- PostgreSQL: one statement; data-modifying CTEs delete a matching row or
+  ``INSERT ... ON CONFLICT DO UPDATE`` the new value.
+- SQLite: read the user's reaction, then either a ``DELETE`` conditional on
+  it holding the same value, or ``INSERT ... ON CONFLICT DO UPDATE``
+  (SQLite 3.24+) which keeps the row and its primary key when switching.
+  Both run inside one transaction, which SQLite serialises. Lock errors are
+  retried.
+- Other backends: the ORM path under ``select_for_update``.
+
+The result says what happened and how each reaction total moved, so callers
+can adjust counters without recounting; ``apply_like_deltas`` does that for
+``BlogPost.likes``.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import NamedTuple
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import BlogPost, CommentReaction, PostReaction
+
+ADDED = 'added'
+SWITCHED = 'switched'
+REMOVED = 'removed'
+
+# Reactions that count towards BlogPost.likes
+POSITIVE_REACTIONS = ('like', 'love')
+
+# SQLite reports contention as "database is locked" / "database table is locked"
+_SQLITE_RETRIES = 8
+
+
+class ToggleResult(NamedTuple):
+    action: str
+    reaction: str | None
+    previous: str | None
+
+    @property
+    def deltas(self):
+        """{reaction value: +1/-1} for every total that changed."""
+        changes = {}
+        if self.previous:
+            changes[self.previous] = -1
+        if self.reaction:
+            changes[self.reaction] = changes.get(self.reaction, 0) + 1
+        return {value: delta for value, delta in changes.items() if delta}
+
+
+def _result(previous, value):
+    if previous == value:
+        return ToggleResult(REMOVED, None, previous)
+    if previous is None:
+        return ToggleResult(ADDED, value, None)
+    return ToggleResult(SWITCHED, value, previous)
+
+
+def _columns(model):
+    target = 'post' if model is PostReaction else 'comment'
+    return (
+        model._meta.db_table,
+        model._meta.get_field(target).column,
+        model._meta.get_field('user').column,
+    )
+
+
+def _toggle_postgresql(model, target_id, user_id, value, now):
+    table, target_col, user_col = _columns(model)
+    qn = connection.ops.quote_name
+    table, target_col, user_col = qn(table), qn(target_col), qn(user_col)
+    sql = f"""
+        WITH old AS (
+            SELECT reaction FROM {table}
+            WHERE {target_col} = %(target)s AND {user_col} = %(user)s
+        ),
+        removed AS (
+            DELETE FROM {table}
+            WHERE {target_col} = %(target)s AND {user_col} = %(user)s
+              AND reaction = %(value)s
+            RETURNING reaction
+        ),
+        upserted AS (
+            INSERT INTO {table} ({target_col}, {user_col}, reaction, created_at, updated_at)
+            SELECT %(target)s, %(user)s, %(value)s, %(now)s, %(now)s
+            WHERE NOT EXISTS (SELECT 1 FROM removed)
+            ON CONFLICT ({target_col}, {user_col})
+            DO UPDATE SET reaction = EXCLUDED.reaction, updated_at = EXCLUDED.updated_at
+            RETURNING reaction
+        )
+        SELECT (SELECT reaction FROM old), (SELECT reaction FROM removed)
+    """
+    params = {'target': target_id, 'user': user_id, 'value': value, 'now': now}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        previous, removed = cursor.fetchone()
+    if removed:
+        return ToggleResult(REMOVED, None, removed)
+    return _result(previous, value)
+
+
+def _toggle_sqlite(model, target_id, user_id, value, now):
+    table, target_col, user_col = _columns(model)
+    qn = connection.ops.quote_name
+    table, target_col, user_col = qn(table), qn(target_col), qn(user_col)
+    now = connection.ops.adapt_datetimefield_value(now)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT reaction FROM {table} WHERE {target_col} = %s AND {user_col} = %s",
+            [target_id, user_id],
+        )
+        row = cursor.fetchone()
+        previous = row[0] if row else None
+        if previous == value:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {target_col} = %s AND {user_col} = %s "
+                f"AND reaction = %s",
+                [target_id, user_id, value],
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {table} ({target_col}, {user_col}, reaction, created_at, updated_at) "
+                f"VALUES (%s, %s, %s, %s, %s) "
+                f"ON CONFLICT ({target_col}, {user_col}) "
+                f"DO UPDATE SET reaction = excluded.reaction, updated_at = excluded.updated_at",
+                [target_id, user_id, value, now, now],
+            )
+    return _result(previous, value)
+
+
+def _toggle_orm(model, target_id, user_id, value, now):
+    target = 'post_id' if model is PostReaction else 'comment_id'
+    lookup = {target: target_id, 'user_id': user_id}
+    with transaction.atomic():
+        existing = model.objects.select_for_update().filter(**lookup).first()
+        previous = existing.reaction if existing else None
+        if existing and previous == value:
+            existing.delete()
+        elif existing:
+            existing.reaction = value
+            existing.save(update_fields=['reaction', 'updated_at'])
+        else:
+            try:
+                with transaction.atomic():
+                    model.objects.create(reaction=value, **lookup)
+            except IntegrityError:
+                # A concurrent click created it first; switch that row instead
+                model.objects.filter(**lookup).update(reaction=value, updated_at=now)
+    return _result(previous, value)
+
+
+def toggle_reaction(model, target_id, user_id, value):
+    """
+    Add, switch or remove ``user_id``'s reaction on a post or comment.
+
+    ``model`` is PostReaction or CommentReaction; returns a ToggleResult.
+    """
+    if model not in (PostReaction, CommentReaction):
+        raise ValueError(f"Unsupported reaction model: {model!r}")
+    now = timezone.now()
+    if connection.vendor == 'postgresql':
+        return _toggle_postgresql(model, target_id, user_id, value, now)
+    if connection.vendor != 'sqlite':
+        return _toggle_orm(model, target_id, user_id, value, now)
+
+    # Retrying only makes sense when we own the transaction
+    attempts = 1 if connection.in_atomic_block else _SQLITE_RETRIES
+    for attempt in range(attempts):
+        try:
+            return _toggle_sqlite(model, target_id, user_id, value, now)
+        except OperationalError as exc:
+            if 'locked' not in str(exc) or attempt == attempts - 1:
+                raise
+            time.sleep(0.005 * 2 ** attempt)
+
+
+def apply_like_deltas(post_id, deltas):
+    """Move ``BlogPost.likes`` by the positive part of a toggle's ``deltas``."""
+    change = sum(deltas.get(value, 0) for value in POSITIVE_REACTIONS)
+    if change:
+        BlogPost.objects.filter(pk=post_id).update(
+            likes=Greatest(F('likes') + change, Value(0)))
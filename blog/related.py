@@ -0,0 +1,275 @@
+# blog/related.py
+"""
+Precomputed "Read next" recommendations.
+
+Three signals are mixed into one similarity between approved posts:
+
+- text: cosine of TF-IDF vectors over title and excerpt (body opening when
+  there is no excerpt);
+- tags: Jaccard overlap of the comma-separated tags;
+- co-reactions: cosine over the sets of users who liked or loved each post.
+
+Vectors are plain ``{term: weight}`` dicts: NumPy is not a dependency of
+this project, and for a blog-sized corpus sparse dicts plus an inverted
+index (only posts sharing a term, tag or fan are compared) are fast enough.
+
+``build_related_posts`` rebuilds every list; ``update_related_for_post``
+scores one newly approved post against the rest and splices it into every
+list it beats, or backfills the lists that showed a withdrawn post. Both
+load the whole corpus, so approvals go through ``schedule_related_update``:
+with ``BLOG_RELATED_BACKGROUND`` (the default outside DEBUG) one background
+thread works through the queued posts with a single corpus per batch, off
+the moderator's request. The detail page reads ``RelatedPost`` rows ordered
+by rank with a single indexed query.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import BlogPost, PostReaction, RelatedPost
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS = {'text': 0.5, 'tags': 0.3, 'co_reactions': 0.2}
+
+POSITIVE_REACTIONS = ('like', 'love')
+
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in into is it its of on or '
+    'our that the their this to was were will with you your'.split()
+)
+
+
+def related_limit():
+    return getattr(settings, 'BLOG_RELATED_POSTS_LIMIT', 4)
+
+
+def _tokens(text):
+    return [word for word in re.findall(r'[a-z0-9]+', (text or '').lower())
+            if len(word) > 2 and word not in STOP_WORDS]
+
+
+def _tags(raw):
+    return {tag.strip().lower() for tag in (raw or '').split(',') if tag.strip()}
+
+
+def _order(item):
+    """Sort key for (score, pk) pairs: best first, newer posts on ties."""
+    score, other = item
+    return -score, -other
+
+
+class Corpus:
+    """Feature vectors for every approved post."""
+
+    def __init__(self):
+        rows = BlogPost.approved.order_by().values_list(
+            'pk', 'title', 'excerpt', 'body', 'tags')
+        term_counts = {}
+        self.tags = {}
+        for pk, title, excerpt, body, tags in rows:
+            text = f"{title} {excerpt or (body or '')[:300]}"
+            term_counts[pk] = Counter(_tokens(text))
+            self.tags[pk] = _tags(tags)
+
+        total = len(term_counts)
+        document_frequency = Counter()
+        for counts in term_counts.values():
+            document_frequency.update(counts.keys())
+        idf = {term: math.log((1 + total) / (1 + df)) + 1
+               for term, df in document_frequency.items()}
+
+        self.vectors = {}
+        for pk, counts in term_counts.items():
+            vector = {term: count * idf[term] for term, count in counts.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            self.vectors[pk] = {term: w / norm for term, w in vector.items()}
+
+        self.fans = defaultdict(set)
+        for post_id, user_id in PostReaction.objects.filter(
+                post_id__in=term_counts, reaction__in=POSITIVE_REACTIONS
+        ).values_list('post_id', 'user_id'):
+            self.fans[post_id].add(user_id)
+
+        # Inverted indexes: only posts sharing something get compared
+        self.by_term = defaultdict(set)
+        self.by_tag = defaultdict(set)
+        self.by_fan = defaultdict(set)
+        for pk, vector in self.vectors.items():
+            for term in vector:
+                self.by_term[term].add(pk)
+            for tag in self.tags[pk]:
+                self.by_tag[tag].add(pk)
+        for pk, users in self.fans.items():
+            for user_id in users:
+                self.by_fan[user_id].add(pk)
+
+    def __contains__(self, pk):
+        return pk in self.vectors
+
+    def candidates(self, pk):
+        found = set()
+        for term in self.vectors[pk]:
+            found |= self.by_term[term]
+        for tag in self.tags[pk]:
+            found |= self.by_tag[tag]
+        for user_id in self.fans.get(pk, ()):
+            found |= self.by_fan[user_id]
+        found.discard(pk)
+        return found
+
+    def similarity(self, a, b):
+        va, vb = self.vectors[a], self.vectors[b]
+        if len(va) > len(vb):
+            va, vb = vb, va
+        text = sum(weight * vb.get(term, 0.0) for term, weight in va.items())
+
+        tags_a, tags_b = self.tags[a], self.tags[b]
+        tags = len(tags_a & tags_b) / len(tags_a | tags_b) if tags_a and tags_b else 0.0
+
+        fans_a, fans_b = self.fans.get(a, set()), self.fans.get(b, set())
+        co = 0.0
+        if fans_a and fans_b:
+            co = len(fans_a & fans_b) / math.sqrt(len(fans_a) * len(fans_b))
+
+        return (WEIGHTS['text'] * text + WEIGHTS['tags'] * tags
+                + WEIGHTS['co_reactions'] * co)
+
+    def top_related(self, pk, limit):
+        scored = [(self.similarity(pk, other), other) for other in self.candidates(pk)]
+        scored = [(score, other) for score, other in scored if score > 0]
+        scored.sort(key=_order)
+        return scored[:limit]
+
+
+def _rows(pk, scored):
+    return [RelatedPost(post_id=pk, related_id=other, score=round(score, 6), rank=rank)
+            for rank, (score, other) in enumerate(scored, start=1)]
+
+
+def build_related_posts(limit=None):
+    """Rebuild the whole RelatedPost table; returns the number of rows written."""
+    limit = limit or related_limit()
+    corpus = Corpus()
+    rows = []
+    for pk in corpus.vectors:
+        rows.extend(_rows(pk, corpus.top_related(pk, limit)))
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def update_related_for_post(pk, limit=None, corpus=None):
+    """
+    Bring the read-next lists up to date after ``pk`` was approved or withdrawn.
+
+    ``pk`` is scored once against every post sharing a term, tag or fan, and
+    its own list is the top of those scores. The scores are symmetric, but
+    the lists are not: another post's list keeps pk when pk beats the N-th
+    score it already shows, even if that post is not in pk's own top N. So
+    every scored post is checked against its own N-th entry. Posts that lose
+    pk, because pk was withdrawn or an edit lowered its score, are recomputed
+    so their lists stay full. ``corpus`` may be shared by several updates.
+    """
+    limit = limit or related_limit()
+    corpus = corpus or Corpus()
+    showing = set(RelatedPost.objects.filter(related_id=pk).values_list('post_id', flat=True))
+    scores = {}
+    if pk in corpus:
+        for other in corpus.candidates(pk):
+            score = corpus.similarity(pk, other)
+            if score > 0:
+                scores[other] = score
+
+    existing = defaultdict(list)
+    for post_id, related_id, score in (
+            RelatedPost.objects.filter(post_id__in=set(scores) | showing)
+            .exclude(related_id=pk).values_list('post_id', 'related_id', 'score')):
+        existing[post_id].append((score, related_id))
+
+    lists = {}
+    for other, score in scores.items():
+        current = sorted(existing[other], key=_order)
+        if len(current) < limit or _order((score, pk)) < _order(current[limit - 1]):
+            lists[other] = sorted(current + [(score, pk)], key=_order)[:limit]
+    for other in showing - lists.keys():
+        lists[other] = corpus.top_related(other, limit) if other in corpus else []
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=[pk, *lists]).delete()
+        rows = []
+        if pk in corpus:
+            own = sorted(((score, other) for other, score in scores.items()), key=_order)
+            rows = _rows(pk, own[:limit])
+        for other, scored in lists.items():
+            rows.extend(_rows(other, scored))
+        RelatedPost.objects.bulk_create(rows)
+
+
+# One thread, so queued updates never write the same lists concurrently
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='blog-related')
+_queued = set()
+_queued_lock = threading.Lock()
+
+
+def schedule_related_update(pk):
+    """
+    ``update_related_for_post(pk)``, in the background thread when
+    ``BLOG_RELATED_BACKGROUND`` is set. Posts queued while an update waits
+    join its batch.
+    """
+    if not getattr(settings, 'BLOG_RELATED_BACKGROUND', False):
+        update_related_for_post(pk)
+        return
+    with _queued_lock:
+        start = not _queued
+        _queued.add(pk)
+    if start:
+        _background.submit(_update_queued).add_done_callback(_log_failure)
+
+
+def _update_queued():
+    with _queued_lock:
+        pks = sorted(_queued)
+        _queued.clear()
+    try:
+        corpus = Corpus()
+        for pk in pks:
+            update_related_for_post(pk, corpus=corpus)
+    finally:
+        # This thread's connections are not closed by any request cycle
+        connections.close_all()
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background related-post update failed: %s", exc, exc_info=exc)
+
+
+def _related_rows(post, limit):
+    return (
+        RelatedPost.objects.filter(post=post, related__status=BlogPost.STATUS_APPROVED)
+        .select_related('related__author')
+        .order_by('rank')[:limit or related_limit()]
+    )
+
+
+def related_posts_for(post, limit=None):
+    """Top related posts for the detail page, in one indexed query."""
+    return [row.related for row in _related_rows(post, limit)]
+
+
+async def arelated_posts_for(post, limit=None):
+    """``related_posts_for`` with the async ORM."""
+    return [row.related async for row in _related_rows(post, limit)]
@@ -4,26 +4,48 @@ Signals for the blog app.
 - on_post_created: notify superadmins when a new post is created
 - on_comment_created: notify superadmins when a new comment is created
 - on_comment_report_created: notify staff when a comment is reported
+- index_*_fingerprint / drop_*_fingerprint: keep the near-duplicate index in sync
+- refresh_*_hot_score: keep BlogPost.hot_score current after comment/post writes
+- update_related_posts: splice a post into (or out of) the read-next lists
+- update_follower_feeds / *_follow_feed: keep FeedEntry rows in step with approvals and follows
+- purge_*_pages: drop cached anonymous pages showing the changed post or comment
+- update_sitemap_*: rewrite the sitemap shard holding a published or withdrawn post
+
+Near-duplicates (``duplicate_of`` set) and auto-rejected spam do not email
+anyone; the original item already sits in the moderation queue.
 """
 
 from __future__ import annotations
 
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from accounts.models import Follow
+from core.sitemaps import update_for_post
+
 from .emails import (
     notify_superadmins_new_post,
     notify_staff_comment_report,
     notify_superadmins_new_comment,
 )
-from .models import BlogPost, Comment, CommentReport
+from .feed import backfill, fan_out_post, unfollow_cleanup, withdraw_post
+from .fingerprints import store_fingerprint
+from .models import BlogPost, Comment, CommentReport, ContentFingerprint
+from .purge import purge_engagement, purge_post
+from .reaction_buffer import flush as flush_reaction_buffer, is_buffered, is_buffered_row
+from .ranking import refresh_hot_scores
+from .related import schedule_related_update
 
 
 @receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_created_notify")
 def on_post_created(sender, instance: BlogPost, created: bool, **kwargs):
     """Send notification to superadmins when a new post is submitted."""
-    if not created:
+    if (
+        not created
+        or instance.status == BlogPost.STATUS_REJECTED
+        or instance.duplicate_of_id
+    ):
         return
     transaction.on_commit(lambda: notify_superadmins_new_post(instance))
 
@@ -31,7 +53,11 @@ def on_post_created(sender, instance: BlogPost, created: bool, **kwargs):
 @receiver(post_save, sender=Comment, dispatch_uid="blog_comment_created_notify")
 def on_comment_created(sender, instance: Comment, created: bool, **kwargs):
     """Send notification to superadmins when a new comment is submitted."""
-    if not created:
+    if (
+        not created
+        or instance.status == Comment.STATUS_REJECTED
+        or instance.duplicate_of_id
+    ):
         return
     transaction.on_commit(lambda: notify_superadmins_new_comment(instance))
 
@@ -46,3 +72,128 @@ def on_comment_report_created(sender, instance: CommentReport, created: bool, **
     if not created:
         return
     transaction.on_commit(lambda: notify_staff_comment_report(instance))
+
+
+def _body_changed(instance, created, update_fields):
+    """
+    New rows and saves naming ``body`` re-index. A full save only does when
+    the model flagged a body change (BlogPost.save); for the rest
+    store_fingerprint compares signatures and leaves an unchanged one alone.
+    """
+    if created:
+        return True
+    if update_fields is not None:
+        return 'body' in update_fields
+    return getattr(instance, '_body_changed', True)
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_fingerprint")
+def index_post_fingerprint(sender, instance: BlogPost, created: bool, update_fields=None, **kwargs):
+    if _body_changed(instance, created, update_fields):
+        store_fingerprint(ContentFingerprint.KIND_POST, instance.pk, instance.body)
+
+
+@receiver(post_save, sender=Comment, dispatch_uid="blog_comment_fingerprint")
+def index_comment_fingerprint(sender, instance: Comment, created: bool, update_fields=None, **kwargs):
+    if _body_changed(instance, created, update_fields):
+        store_fingerprint(ContentFingerprint.KIND_COMMENT, instance.pk, instance.body)
+
+
+@receiver(post_delete, sender=BlogPost, dispatch_uid="blog_post_fingerprint_delete")
+def drop_post_fingerprint(sender, instance: BlogPost, **kwargs):
+    ContentFingerprint.objects.filter(
+        kind=ContentFingerprint.KIND_POST, object_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Comment, dispatch_uid="blog_comment_fingerprint_delete")
+def drop_comment_fingerprint(sender, instance: Comment, **kwargs):
+    ContentFingerprint.objects.filter(
+        kind=ContentFingerprint.KIND_COMMENT, object_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_hot_score")
+def refresh_post_hot_score(sender, instance: BlogPost, created: bool, update_fields=None, **kwargs):
+    """Publishing or unpublishing changes the score; featured flips do not."""
+    if update_fields is None or {'status', 'published_at'} & set(update_fields):
+        refresh_hot_scores([instance.pk])
+
+
+@receiver(post_save, sender=Comment, dispatch_uid="blog_comment_hot_score")
+def refresh_comment_hot_score(sender, instance: Comment, update_fields=None, **kwargs):
+    if update_fields is None or 'status' in update_fields:
+        refresh_hot_scores([instance.post_id])
+
+
+@receiver(post_delete, sender=Comment, dispatch_uid="blog_comment_hot_score_delete")
+def refresh_hot_score_after_comment_delete(sender, instance: Comment, **kwargs):
+    refresh_hot_scores([instance.post_id])
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_reaction_buffer")
+def flush_unbuffered_post(sender, instance: BlogPost, **kwargs):
+    """
+    Unfeaturing a post ends its buffering: write what is still buffered so
+    direct toggles start from current rows and no later flush overwrites them.
+    """
+    if (getattr(instance, "_left_featured", False)
+            and is_buffered_row({"featured": True}) and not is_buffered(instance)):
+        transaction.on_commit(flush_reaction_buffer)
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_related")
+def update_related_posts(sender, instance: BlogPost, **kwargs):
+    """Approving or unpublishing a post updates the precomputed read-next lists."""
+    if getattr(instance, "_approval_changed", False):
+        pk = instance.pk
+        transaction.on_commit(lambda: schedule_related_update(pk))
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_feed_fanout")
+def update_follower_feeds(sender, instance: BlogPost, **kwargs):
+    """Fan a newly approved post out to followers; withdraw it when unpublished."""
+    if not getattr(instance, "_approval_changed", False):
+        return
+    if instance.status == BlogPost.STATUS_APPROVED:
+        transaction.on_commit(lambda: fan_out_post(instance))
+    else:
+        transaction.on_commit(lambda: withdraw_post(instance))
+
+
+@receiver(post_save, sender=Follow, dispatch_uid="blog_follow_feed_backfill")
+def backfill_follow_feed(sender, instance: Follow, created: bool, **kwargs):
+    if created:
+        backfill(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_delete, sender=Follow, dispatch_uid="blog_follow_feed_cleanup")
+def clean_unfollow_feed(sender, instance: Follow, **kwargs):
+    unfollow_cleanup(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_page_purge")
+@receiver(post_delete, sender=BlogPost, dispatch_uid="blog_post_page_purge_delete")
+def purge_post_pages(sender, instance: BlogPost, **kwargs):
+    purge_post(instance)
+
+
+@receiver(post_save, sender=Comment, dispatch_uid="blog_comment_page_purge")
+@receiver(post_delete, sender=Comment, dispatch_uid="blog_comment_page_purge_delete")
+def purge_comment_pages(sender, instance: Comment, **kwargs):
+    post = BlogPost.objects.filter(pk=instance.post_id).only('slug').first()
+    if post is not None:
+        purge_engagement(post)
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid="blog_post_sitemap")
+def update_sitemap_on_save(sender, instance: BlogPost, **kwargs):
+    """Approvals, withdrawals and edits of live posts change the posts sitemap."""
+    if getattr(instance, "_approval_changed", False) or instance.status == BlogPost.STATUS_APPROVED:
+        pk, author_id = instance.pk, instance.author_id
+        transaction.on_commit(lambda: update_for_post(pk, author_id))
+
+
+@receiver(post_delete, sender=BlogPost, dispatch_uid="blog_post_sitemap_delete")
+def update_sitemap_on_delete(sender, instance: BlogPost, **kwargs):
+    if instance.status == BlogPost.STATUS_APPROVED:
+        pk, author_id = instance.pk, instance.author_id
+        transaction.on_commit(lambda: update_for_post(pk, author_id))
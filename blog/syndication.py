@@ -0,0 +1,222 @@
+# blog/syndication.py
+"""
+RSS, Atom and JSON Feed endpoints for approved posts (all, per author, per tag).
+
+Feed readers and bots poll these every few minutes. Each response carries
+an ``ETag`` and ``Last-Modified`` taken from a stamp of the posts table: the
+latest ``published_at``/``updated_at`` plus the approved count. An unchanged
+blog answers conditional polls with ``304 Not Modified`` after that one
+aggregate query, without loading or rendering any posts.
+
+The stamp is recomputed on every request rather than cached. A cached copy
+lives in one worker's memory, so the others would keep answering 304 after
+a new post. Read from the table, it moves with any write that reaches it:
+``save()``, ``bulk_create`` (``auto_now`` fills ``updated_at``) and deletes.
+Code that changes feed content with ``queryset.update()`` must set
+``updated_at`` as well.
+
+The stamp covers the whole table, so an edit to any post invalidates every
+feed. Posts change rarely compared to how often feeds are polled, and one
+shared stamp is simpler than tracking which feeds a post belongs to.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from calendar import timegm
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.db.models import Count, Max, Q
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed, SyndicationFeed
+from django.utils.http import http_date, quote_etag
+
+from .models import BlogPost
+
+User = get_user_model()
+
+
+def feed_length():
+    return getattr(settings, 'BLOG_SYNDICATION_ITEMS', 20)
+
+
+def _totals():
+    return {
+        'published': Max('published_at'),
+        'updated': Max('updated_at'),
+        'approved': Count('pk', filter=Q(status=BlogPost.STATUS_APPROVED)),
+    }
+
+
+def _stamp(totals):
+    last_modified = max(
+        filter(None, (totals['published'], totals['updated'])), default=None)
+    raw = f"{totals['approved']}:{last_modified.isoformat() if last_modified else ''}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16], last_modified
+
+
+def feed_stamp():
+    """(etag, last_modified) for the current set of posts."""
+    return _stamp(BlogPost.objects.aggregate(**_totals()))
+
+
+async def afeed_stamp():
+    """``feed_stamp`` with the async ORM API."""
+    return _stamp(await BlogPost.objects.aaggregate(**_totals()))
+
+
+class JSONFeed(SyndicationFeed):
+    """JSON Feed 1.1 (https://www.jsonfeed.org/version/1.1/)."""
+
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def write(self, outfile, encoding):
+        feed = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+            'language': self.feed['language'],
+            'items': [self._item(item) for item in self.items],
+        }
+        outfile.write(json.dumps(feed, ensure_ascii=False))
+
+    @staticmethod
+    def _item(item):
+        entry = {
+            'id': item['unique_id'] or item['link'],
+            'url': item['link'],
+            'title': item['title'],
+            'content_text': item['description'],
+        }
+        if item['pubdate']:
+            entry['date_published'] = item['pubdate'].isoformat()
+        if item['updateddate']:
+            entry['date_modified'] = item['updateddate'].isoformat()
+        if item['author_name']:
+            entry['authors'] = [{'name': item['author_name']}]
+        if item['categories']:
+            entry['tags'] = list(item['categories'])
+        return entry
+
+
+def _tags(post):
+    return [tag.strip() for tag in (post.tags or '').split(',') if tag.strip()]
+
+
+class PostsFeed(Feed):
+    """Latest approved posts (RSS 2.0)."""
+
+    feed_type = Rss201rev2Feed
+    title = 'Game Abyss'
+    description = 'Fresh transmissions from the Abyss: reviews, news and player thoughts.'
+
+    def link(self, obj=None):
+        return reverse('blog:index')
+
+    def posts(self, obj):
+        return BlogPost.approved.select_related('author')
+
+    def items(self, obj=None):
+        return self.posts(obj).order_by('-published_at', '-pk')[:feed_length()]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt or item.body[:300]
+
+    def item_link(self, item):
+        return item.get_absolute_url()
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return _tags(item)
+
+
+class AuthorPostsFeed(PostsFeed):
+    """Latest approved posts by one author."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Game Abyss · {obj.username}'
+
+    def description(self, obj):
+        return f'Transmissions from {obj.username}.'
+
+    def link(self, obj):
+        return reverse('accounts:profile', args=[obj.username])
+
+    def posts(self, obj):
+        return super().posts(obj).filter(author=obj)
+
+
+class TagPostsFeed(PostsFeed):
+    """Latest approved posts carrying one tag."""
+
+    def get_object(self, request, tag):
+        return tag.strip().lower()
+
+    def title(self, obj):
+        return f'Game Abyss · #{obj}'
+
+    def description(self, obj):
+        return f'Transmissions tagged #{obj}.'
+
+    def posts(self, obj):
+        # Whole entries of the comma-separated list only ("rpg" must not match "arpg")
+        pattern = r'(^|,)\s*' + re.escape(obj) + r'\s*(,|$)'
+        return super().posts(obj).filter(tags__iregex=pattern)
+
+
+def _variant(feed_class, feed_type):
+    return type(f'{feed_class.__name__}{feed_type.__name__}', (feed_class,), {'feed_type': feed_type})
+
+
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed, 'json': JSONFeed}
+
+
+def feed_view(feed_class, fmt):
+    """
+    An async feed view answering conditional requests from the posts stamp.
+
+    ``contrib.syndication`` renders synchronously, so only a poll that
+    misses the stamp leaves the event loop to build the feed.
+    """
+    feed = sync_to_async(_variant(feed_class, FEED_TYPES[fmt])())
+
+    async def cached_view(request, **kwargs):
+        etag, last_modified = await afeed_stamp()
+        etag = quote_etag(etag)
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await feed(request, **kwargs)
+        # As django.views.decorators.http.condition would
+        if request.method in ('GET', 'HEAD'):
+            if timestamp and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(timestamp)
+            response.headers.setdefault('ETag', etag)
+        patch_cache_control(
+            response, public=True, max_age=getattr(settings, 'BLOG_SYNDICATION_MAX_AGE', 300))
+        return response
+
+    return cached_view
@@ -1,5 +1,7 @@
 from django import template
 
+from blog.images import apply_cloudinary_transformation
+
 register = template.Library()
 
 
@@ -9,7 +11,8 @@ def cloudinary_variant(original_url, transformation):
     Insert a Cloudinary transformation right after 'upload/' in the URL.
     Example:
       {{ image.url|cloudinary_variant:"f_auto,q_auto,c_fill,g_auto:subject,ar_16:9,w_1200" }}
+
+    Posts with precomputed ``image_variants`` should use those instead;
+    this filter remains the fallback for images uploaded before variants existed.
     """
-    if not original_url or 'upload/' not in original_url:
-        return original_url
-    return original_url.replace('upload/', f"upload/{transformation.strip()}/", 1)
+    return apply_cloudinary_transformation(original_url, transformation)
@@ -0,0 +1,56 @@
+from functools import lru_cache
+
+from django import template
+from django.dispatch import receiver
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.autoreload import file_changed
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+WIDGET_TEMPLATE = "shared/_reaction_widget.html"
+# Stands in for the CSRF token in cached markup; swapped for the real one per request
+CSRF_SENTINEL = "__reaction_widget_csrf__"
+OPTION_FIELDS = ("value", "icon", "count", "active")
+
+
+@lru_cache(maxsize=4096)
+def _render(url_name, pk, next_url, options, authenticated):
+    """Markup for one widget state; ``options`` is a tuple of OPTION_FIELDS tuples."""
+    return get_template(WIDGET_TEMPLATE).render({
+        "options": [dict(zip(OPTION_FIELDS, option)) for option in options],
+        "action": reverse(url_name, args=[pk]),
+        "next": next_url,
+        "authenticated": authenticated,
+        "csrf_token": CSRF_SENTINEL,
+    })
+
+
+@receiver(file_changed, dispatch_uid="reaction_widget_reset")
+def _reset_on_template_change(sender, file_path, **kwargs):
+    # Development autoreload: drop markup rendered from an old template
+    _render.cache_clear()
+
+
+@register.simple_tag(takes_context=True)
+def reaction_widget(context, url_name, pk, display, anchor=""):
+    """
+    Reaction buttons (or read-only badges for visitors) for one target.
+    Example:
+      {% reaction_widget "blog:react_comment" comment.pk comment.reaction_display "comment" %}
+
+    ``anchor`` adds ``#<anchor>-<pk>`` to the ``next`` URL.
+
+    The markup only depends on the target, its counts, the viewer's reaction
+    and the page URL, so each combination is rendered once per process and
+    reused for every comment and request showing the same state.
+    """
+    request = context["request"]
+    authenticated = request.user.is_authenticated
+    next_url = request.get_full_path() + (f"#{anchor}-{pk}" if anchor else "")
+    options = tuple(tuple(option[field] for field in OPTION_FIELDS) for option in display)
+    html = _render(url_name, pk, next_url, options, authenticated)
+    if authenticated:
+        html = html.replace(CSRF_SENTINEL, str(context.get("csrf_token", "")))
+    return mark_safe(html)
@@ -1,10 +1,56 @@
+import importlib.util
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import mail
-from django.test import TestCase
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, connection, models
+from django.db.models.fields.files import FieldFile
+from django.template.loader import get_template
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.urls import reverse
+from asgiref.sync import iscoroutinefunction
+from PIL import Image
+
+from accounts.models import Follow
+from core.ratelimit import Bucket, CacheStore
 
-from .models import BlogPost, Comment, CommentReport
+from .emails import _send_email
+from .feed import feed_page
+from .fingerprints import find_near_duplicate, signature_for, similarity
+from .forms import CommentForm
+from .images import cloudinary_variants, local_variants
+from .models import (
+    BlogPost,
+    Comment,
+    CommentReport,
+    ContentFingerprint,
+    FeedEntry,
+    ModerationDecision,
+    PostReaction,
+    RelatedPost,
+)
+from .moderation import Signal
+from .reaction_buffer import LocalBuffer, flush, get_buffer
+from .reactions import ADDED, REMOVED, SWITCHED, toggle_reaction
+from .related import build_related_posts, related_posts_for
+from .templatetags.reaction_tags import CSRF_SENTINEL, _render as _render_widget
+from .textfilter import TextFilter, get_text_filter
+from . import related, views
 
 
 class BlogPostModelTests(TestCase):
@@ -199,6 +245,18 @@ class NotificationEmailTests(TestCase):
         self.assertIn("team.gameabyss@gmail.com", email.to)
         self.assertIn("Comment reported", email.subject)
 
+    @override_settings(BLOG_EMAIL_BACKGROUND=True)
+    def test_background_delivery_returns_before_sending(self):
+        mail.outbox = []
+        future = _send_email("Queued", "Body", ["team.gameabyss@gmail.com"])
+        future.result(timeout=5)
+        self.assertEqual([email.subject for email in mail.outbox], ["Queued"])
+
+    def test_delivery_is_inline_by_default_in_tests(self):
+        mail.outbox = []
+        self.assertIsNone(_send_email("Inline", "Body", ["team.gameabyss@gmail.com"]))
+        self.assertEqual(len(mail.outbox), 1)
+
 
 class CommentReportFlowTests(TestCase):
     def setUp(self):
@@ -584,3 +642,1227 @@ class PostCommentEditPermissionsTests(TestCase):
         self.assertRedirects(response, super_post.get_absolute_url())
         super_comment.refresh_from_db()
         self.assertEqual(super_comment.body, "Super updated")
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.author = get_user_model().objects.create_user(
+            username="painter", password="pass"
+        )
+
+    def _field_file(self, size=(1400, 1000)):
+        storage = FileSystemStorage(location=self.media_root, base_url="/media/")
+        buffer = BytesIO()
+        Image.new("RGB", size, "purple").save(buffer, format="JPEG")
+        name = storage.save("blog_images/cover.jpg", ContentFile(buffer.getvalue()))
+        field = models.ImageField(storage=storage)
+        return FieldFile(None, field, name)
+
+    def test_cloudinary_variants_build_srcsets(self):
+        url = "https://res.cloudinary.com/demo/image/upload/v1/cover.jpg"
+        variants = cloudinary_variants(url)
+        self.assertIn("ar_4:3,w_480/v1/cover.jpg 480w", variants["mobile"]["srcset"])
+        self.assertIn("ar_16:9,w_1600/v1/cover.jpg 1600w", variants["wide"]["srcset"])
+        self.assertTrue(variants["wide"]["src"].endswith("w_1600/v1/cover.jpg"))
+
+    def test_local_variants_resize_to_webp_without_upscaling(self):
+        variants = local_variants(self._field_file())
+        self.assertEqual(variants["wide"]["width"], 1200)
+        self.assertEqual(variants["wide"]["height"], 675)
+        self.assertEqual(len(variants["files"]), 4)
+        storage = FileSystemStorage(location=self.media_root)
+        with storage.open(variants["files"][0]) as fh:
+            image = Image.open(fh)
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (480, 360))
+
+    def test_templates_render_precomputed_srcset(self):
+        post = BlogPost.objects.create(
+            author=self.author,
+            title="Pictured",
+            body="Body",
+            status=BlogPost.STATUS_APPROVED,
+        )
+        variants = cloudinary_variants(
+            "https://res.cloudinary.com/demo/image/upload/v1/cover.jpg")
+        BlogPost.objects.filter(pk=post.pk).update(
+            image="image/upload/v1/cover.jpg", image_variants=variants)
+
+        response = self.client.get(reverse("blog:index"))
+        self.assertContains(response, variants["wide"]["srcset"])
+        self.assertContains(response, variants["mobile"]["srcset"])
+        self.assertContains(response, 'width="1600"')
+        self.assertContains(response, 'height="900"')
+
+
+class AuthorCardListingTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(
+            username="author", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author,
+            title="Crowded Post",
+            body="Content",
+            status=BlogPost.STATUS_APPROVED,
+        )
+
+    def _add_comments(self, count):
+        User = get_user_model()
+        for i in range(count):
+            commenter = User.objects.create_user(
+                username=f"commenter{Comment.objects.count()}", password="pass")
+            Comment.objects.create(
+                post=self.post,
+                author=commenter,
+                body="Hello",
+                status=Comment.STATUS_APPROVED,
+            )
+
+    def _detail_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.post.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_post_detail_queries_do_not_grow_with_comment_authors(self):
+        self._add_comments(1)
+        baseline, _ = self._detail_queries()
+        self._add_comments(4)
+        queries, response = self._detail_queries()
+        self.assertEqual(queries, baseline)
+        self.assertContains(response, "comp-rarity-badge--common", count=6)
+
+
+class ContentExportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        self.author = User.objects.create_user(
+            username="writer", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author,
+            title="Exported, with comma",
+            body="Content",
+            status=BlogPost.STATUS_APPROVED,
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.author, body="Exported comment")
+
+    def test_command_streams_csv_with_joined_columns(self):
+        out = StringIO()
+        call_command("export_content", "posts", "--chunk-size", "1", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("id,title,slug,author,status"))
+        self.assertIn('"Exported, with comma"', lines[1])
+        self.assertIn(",writer,approved,", lines[1])
+
+    def test_admin_action_streams_jsonl(self):
+        self.client.login(username="admin", password="pass")
+        response = self.client.post(
+            reverse("admin:blog_comment_changelist"),
+            {"action": "export_jsonl", "_selected_action": [self.comment.pk]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["post_title"], self.post.title)
+        self.assertEqual(rows[0]["author"], "writer")
+
+
+class ImportContentTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(
+            username="mira", email="mira@example.com", password="pass")
+        User.objects.create_superuser(
+            username="council", email="team.gameabyss@gmail.com", password="pass")
+        self.existing = BlogPost.objects.create(
+            author=self.author,
+            title="Launch Day",
+            body="Existing",
+            status=BlogPost.STATUS_APPROVED,
+            published_at=timezone.make_aware(timezone.datetime(2024, 5, 2, 8)),
+        )
+
+    def _write(self, rows):
+        handle = tempfile.NamedTemporaryFile(
+            "w", suffix=".jsonl", delete=False, encoding="utf-8")
+        with handle:
+            for row in rows:
+                handle.write(json.dumps(row) + "\n")
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_import_bulk_creates_posts_and_comments_without_emails(self):
+        path = self._write([
+            {"type": "post", "ref": "a", "author": "mira", "title": "Launch Day",
+             "body": "word " * 450, "status": "approved",
+             "published_at": "2024-05-02T10:00:00Z"},
+            {"type": "post", "ref": "b", "author": "mira", "title": "Launch Day",
+             "body": "Second", "status": "approved",
+             "published_at": "2024-05-02T11:00:00Z"},
+            {"type": "comment", "post_ref": "a", "author": "mira", "body": "Hello"},
+            {"type": "comment", "post_ref": "a", "author": "ghost", "body": "Boo"},
+            {"type": "comment", "post_ref": "zzz", "author": "mira", "body": "Lost"},
+        ])
+        out = StringIO()
+        mail.outbox = []
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_content", path, "--batch-size", "1",
+                         stdout=out, stderr=StringIO())
+
+        slugs = set(BlogPost.objects.values_list("slug", flat=True))
+        self.assertEqual(slugs, {
+            "launch-day-2024-05-02",
+            "launch-day-2024-05-02-2",
+            "launch-day-2024-05-02-3",
+        })
+        imported = BlogPost.objects.exclude(pk=self.existing.pk).order_by("pk")
+        self.assertEqual(imported[0].reading_time, 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn("Imported 2 post(s) and 1 comment(s)", out.getvalue())
+        self.assertIn("skipped 2", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+        # Derived data the skipped signals would have written
+        self.assertTrue(all(post.hot_score > 0 for post in imported))
+        self.assertTrue(ContentFingerprint.objects.filter(
+            kind=ContentFingerprint.KIND_POST, object_id=imported[0].pk).exists())
+        self.assertIn(imported[1], related_posts_for(imported[0]))
+
+
+class TextFilterTests(TestCase):
+    def test_scan_reports_terms_positions_and_links(self):
+        text_filter = TextFilter(["scam", "scam artist", "spam"])
+        result = text_filter.scan("A Scam artist! spam www.x.io http://y.io scammer")
+        self.assertEqual(
+            [(m.term, m.start, m.end) for m in result.matches],
+            [("scam artist", 2, 13), ("spam", 15, 19)],
+        )
+        self.assertEqual(result.terms, ["scam artist", "spam"])
+        self.assertEqual(result.link_count, 2)
+
+    def test_benchmark_checks_both_filters_on_real_hits(self):
+        out = StringIO()
+        call_command("benchmark_text_filter", "--terms", "50", "--comments", "40",
+                     "--hit-ratio", "0.5", stdout=out)
+        hits = re.search(r"\((\d+) hits, same comments flagged\)", out.getvalue())
+        self.assertGreater(int(hits.group(1)), 0)
+
+    def test_comment_form_uses_configured_terms(self):
+        with override_settings(BLOG_COMMENT_BANNED_WORDS=["griefer"]):
+            form = CommentForm(data={"body": "Total GRIEFER move"})
+            self.assertFalse(form.is_valid())
+        form = CommentForm(data={"body": "Total griefer move"})
+        self.assertTrue(form.is_valid())
+
+    def test_terms_file_is_reloaded_when_modified(self):
+        handle = tempfile.NamedTemporaryFile(
+            "w", suffix=".txt", delete=False, encoding="utf-8")
+        with handle:
+            handle.write("cheater  # aimbot users\n")
+        self.addCleanup(os.remove, handle.name)
+
+        with override_settings(BLOG_COMMENT_BANNED_WORDS=[],
+                               BLOG_COMMENT_BANNED_WORDS_FILE=handle.name):
+            self.assertEqual(get_text_filter().terms, ("cheater",))
+            with open(handle.name, "a", encoding="utf-8") as fh:
+                fh.write("smurf\n")
+            mtime = os.stat(handle.name).st_mtime + 5
+            os.utime(handle.name, (mtime, mtime))
+            self.assertEqual(get_text_filter().terms, ("cheater", "smurf"))
+
+
+def always_spam_scorer(submission):
+    return Signal("test", 50, "flagged by test scorer")
+
+
+class ModerationPipelineTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_superuser(
+            username="council", email="team.gameabyss@gmail.com", password="pass")
+        self.author = User.objects.create_user(
+            username="rookie", email="rookie@example.com", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Open Thread", body="Say hi",
+            status=BlogPost.STATUS_APPROVED)
+        self.client.login(username="rookie", password="pass")
+
+    def test_new_author_is_queued_and_logged(self):
+        self.client.post(self.post.get_absolute_url(), {"body": "First contact!"})
+        comment = Comment.objects.get()
+        self.assertEqual(comment.status, Comment.STATUS_PENDING)
+        decision = ModerationDecision.objects.get()
+        self.assertEqual(
+            (decision.kind, decision.object_id, decision.action),
+            (ModerationDecision.KIND_COMMENT, comment.pk, ModerationDecision.ACTION_QUEUE),
+        )
+
+    def test_trusted_author_is_auto_approved(self):
+        for i in range(6):
+            Comment.objects.create(post=self.post, author=self.author,
+                                   body=f"Earlier take {i}",
+                                   status=Comment.STATUS_APPROVED)
+        self.client.post(self.post.get_absolute_url(), {"body": "Fresh take"})
+        self.assertEqual(Comment.objects.latest("id").status, Comment.STATUS_APPROVED)
+        decision = ModerationDecision.objects.get()
+        self.assertEqual(decision.action, ModerationDecision.ACTION_APPROVE)
+        self.assertEqual(decision.signals[0]["scorer"], "author_history")
+
+    def test_spam_post_is_rejected_without_notifying_council(self):
+        mail.outbox = []
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("blog:new"), {
+                "title": "Cheap gold",
+                "body": "Best scam deals http://a.io http://b.io",
+            })
+        post = BlogPost.objects.latest("id")
+        self.assertEqual(post.status, BlogPost.STATUS_REJECTED)
+        self.assertEqual(len(mail.outbox), 0)
+        decision = ModerationDecision.objects.get(kind=ModerationDecision.KIND_POST)
+        self.assertEqual(decision.action, ModerationDecision.ACTION_REJECT)
+        self.assertEqual(
+            {signal["scorer"] for signal in decision.signals},
+            {"banned_words", "link_density"},
+        )
+
+    def test_scorers_are_pluggable(self):
+        with override_settings(BLOG_MODERATION_SCORERS=["blog.tests.always_spam_scorer"]):
+            self.client.post(self.post.get_absolute_url(), {"body": "Innocent"})
+        self.assertEqual(Comment.objects.get().status, Comment.STATUS_REJECTED)
+
+
+class NearDuplicateTests(TestCase):
+    WAVE = ("Huge giveaway for every explorer in the abyss, claim your free "
+            "legendary skins before midnight and tell your whole guild about it")
+
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_superuser(
+            username="council", email="team.gameabyss@gmail.com", password="pass")
+        self.first = User.objects.create_user(username="first", password="pass")
+        self.second = User.objects.create_user(username="second", password="pass")
+        self.posts = [
+            BlogPost.objects.create(author=self.first, title=f"Post {i}",
+                                    body="Body", status=BlogPost.STATUS_APPROVED)
+            for i in range(2)
+        ]
+
+    def test_signatures_are_close_for_small_edits(self):
+        edited = self.WAVE.replace("midnight", "noon")
+        unrelated = "Patch notes for the new raid boss include three fresh mechanics"
+        original = signature_for(self.WAVE)
+        self.assertGreaterEqual(similarity(original, signature_for(edited)), 0.5)
+        self.assertLess(similarity(original, signature_for(unrelated)), 0.2)
+        self.assertIsNone(signature_for("Great post!"))
+
+    def test_fingerprint_index_follows_saves_and_deletes(self):
+        comment = Comment.objects.create(
+            post=self.posts[0], author=self.first, body=self.WAVE)
+        kind = ContentFingerprint.KIND_COMMENT
+        self.assertEqual(find_near_duplicate(kind, self.WAVE + "!"), comment.pk)
+        comment.delete()
+        self.assertIsNone(find_near_duplicate(kind, self.WAVE))
+
+    def test_resaving_keeps_the_fingerprint_date(self):
+        post = BlogPost.objects.create(author=self.first, title="Wave", body=self.WAVE)
+        kind = ContentFingerprint.KIND_POST
+        stamp = timezone.now() - timezone.timedelta(days=60)
+        ContentFingerprint.objects.filter(kind=kind, object_id=post.pk).update(created_at=stamp)
+
+        post.status = BlogPost.STATUS_APPROVED
+        post.save()
+        post.body = self.WAVE.replace("midnight", "noon")
+        post.save()
+        fingerprint = ContentFingerprint.objects.get(kind=kind, object_id=post.pk)
+        self.assertEqual(fingerprint.created_at, stamp)
+        self.assertEqual(fingerprint.signature, signature_for(post.body))
+
+    def test_spam_wave_collapses_without_extra_emails(self):
+        self.client.login(username="first", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.posts[0].get_absolute_url(), {"body": self.WAVE})
+        original = Comment.objects.get()
+        self.assertIsNone(original.duplicate_of)
+
+        mail.outbox = []
+        self.client.login(username="second", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.posts[1].get_absolute_url(),
+                             {"body": self.WAVE.replace("guild", "clan")})
+        copy = Comment.objects.latest("id")
+        self.assertEqual(copy.duplicate_of, original)
+        self.assertEqual(len(mail.outbox), 0)
+        decision = ModerationDecision.objects.get(object_id=copy.pk)
+        self.assertIn("duplicate", [s["scorer"] for s in decision.signals])
+
+        self.client.login(username="council", password="pass")
+        self.client.post(reverse("admin:blog_comment_changelist"), {
+            "action": "mark_rejected",
+            "_selected_action": [original.pk],
+        })
+        copy.refresh_from_db()
+        self.assertEqual(copy.status, Comment.STATUS_REJECTED)
+
+
+@override_settings(
+    RATELIMIT_STORE="local",
+    RATELIMITS={"reactions": {"rate": "2/m"}},
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="clicker", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.user, title="Hot Take", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+        self.client.login(username="clicker", password="pass")
+
+    def test_bucket_refills_over_time(self):
+        bucket = Bucket("2/m")
+        state, wait = bucket.spend(None, now=0)
+        state, wait = bucket.spend(state, now=0)
+        self.assertEqual(wait, 0)
+        state, wait = bucket.spend(state, now=0)
+        self.assertAlmostEqual(wait, 30)
+        _, wait = bucket.spend(state, now=30)
+        self.assertEqual(wait, 0)
+
+    def test_reaction_flood_gets_429_and_is_reported(self):
+        url = reverse("blog:react_post", args=[self.post.pk])
+        for _ in range(2):
+            response = self.client.post(url, {"reaction": "like"})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {"reaction": "like"})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+        out = StringIO()
+        call_command("throttled_clients", stdout=out)
+        self.assertIn(f"reactions  clicker (user:{self.user.pk})", out.getvalue())
+
+    @override_settings(RATELIMIT_STORE="cache")
+    def test_cache_store_counts_per_client_and_locks_buckets(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        store = CacheStore()
+        for ident in ("ip:1", "ip:1", "ip:2"):
+            store.record("reports", ident)
+        self.assertEqual(store.top(), [("reports", "ip:1", 2), ("reports", "ip:2", 1)])
+        store.reset_stats()
+        self.assertEqual(store.top(), [])
+
+        bucket = Bucket("2/m")
+        self.assertEqual(store.take("ratelimit:reports:ip:1", bucket, now=0), 0)
+        cache.add("ratelimit:reports:ip:1:lock", 1, 1)
+        self.assertGreater(store.take("ratelimit:reports:ip:1", bucket, now=0), 0)
+
+
+class AjaxActionTests(TestCase):
+    JSON = {"HTTP_ACCEPT": "application/json"}
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username="writer", password="pass")
+        self.reader = User.objects.create_user(username="reader", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Patch Day", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.author, body="First!",
+            status=Comment.STATUS_APPROVED)
+        self.client.login(username="reader", password="pass")
+
+    def test_post_reaction_returns_counts_and_state(self):
+        url = reverse("blog:react_post", args=[self.post.pk])
+        response = self.client.post(url, {"reaction": "love"}, **self.JSON)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["reaction"], "love")
+        self.assertEqual(data["counts"], {"like": 0, "love": 1, "dislike": 0})
+
+        data = self.client.post(url, {"reaction": "love"}, **self.JSON).json()
+        self.assertIsNone(data["reaction"])
+        self.assertEqual(data["counts"]["love"], 0)
+
+    def test_comment_reaction_errors_are_json(self):
+        url = reverse("blog:react_comment", args=[self.comment.pk])
+        response = self.client.post(url, {"reaction": "meh"}, **self.JSON)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["ok"])
+
+    def test_report_and_delete_return_json(self):
+        url = reverse("blog:report_comment", args=[self.comment.pk])
+        data = self.client.post(url, {"reason": "spam"}, **self.JSON).json()
+        self.assertTrue(data["reported"] and data["hidden"])
+
+        self.client.login(username="writer", password="pass")
+        url = reverse("blog:delete_comment", args=[self.comment.pk])
+        data = self.client.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest").json()
+        self.assertEqual(data["id"], self.comment.pk)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_plain_form_post_still_redirects(self):
+        url = reverse("blog:react_post", args=[self.post.pk])
+        response = self.client.post(url, {"reaction": "like"})
+        self.assertRedirects(response, self.post.get_absolute_url(),
+                             fetch_redirect_response=False)
+
+
+class ReactionToggleTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="toggler", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.user, title="Toggle", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+
+    def test_add_switch_remove(self):
+        toggle = lambda value: toggle_reaction(
+            PostReaction, self.post.pk, self.user.pk, value)
+
+        result = toggle("like")
+        self.assertEqual((result.action, result.deltas), (ADDED, {"like": 1}))
+        pk, created_at = PostReaction.objects.values_list("pk", "created_at").get()
+
+        result = toggle("love")
+        self.assertEqual(result.action, SWITCHED)
+        self.assertEqual(result.deltas, {"like": -1, "love": 1})
+        reaction = PostReaction.objects.get()
+        self.assertEqual((reaction.reaction, reaction.created_at), ("love", created_at))
+        self.assertEqual(reaction.pk, pk)
+
+        result = toggle("love")
+        self.assertEqual((result.action, result.deltas), (REMOVED, {"love": -1}))
+        self.assertFalse(PostReaction.objects.exists())
+
+
+class ReactionToggleConcurrencyTests(TransactionTestCase):
+    THREADS = 8
+    CLICKS = 15
+
+    def test_parallel_toggles_stay_consistent(self):
+        User = get_user_model()
+        users = [User.objects.create_user(username=f"fan{i}", password="pass")
+                 for i in range(self.THREADS)]
+        post = BlogPost.objects.create(
+            author=users[0], title="Launch", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+        totals = {}
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def hammer(user):
+            try:
+                start.wait()
+                for click in range(self.CLICKS):
+                    # Every thread also double-clicks on behalf of user 0
+                    for uid in (user.pk, users[0].pk):
+                        result = toggle_reaction(
+                            PostReaction, post.pk, uid, ("like", "love")[click % 2])
+                        with lock:
+                            for value, delta in result.deltas.items():
+                                totals[value] = totals.get(value, 0) + delta
+            except Exception as exc:  # surfaced in the main thread
+                errors.append(exc)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=hammer, args=(u,)) for u in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stored = {}
+        for reaction in PostReaction.objects.filter(post=post):
+            stored[reaction.reaction] = stored.get(reaction.reaction, 0) + 1
+        self.assertEqual({k: v for k, v in totals.items() if v}, stored)
+        self.assertLessEqual(PostReaction.objects.filter(post=post).count(), self.THREADS)
+
+
+@override_settings(
+    BLOG_REACTION_BUFFER_ENABLED=True,
+    BLOG_REACTION_BUFFER_BACKEND="cache",
+    BLOG_REACTION_BUFFER_CACHE="reactions",
+    BLOG_REACTION_BUFFER_SCOPE="featured",
+    CACHES={
+        **settings.CACHES,
+        "reactions": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(tempfile.gettempdir(), "blog-reaction-buffer-tests"),
+        },
+    },
+)
+class ReactionBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["reactions"].clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(caches["reactions"].clear)
+        User = get_user_model()
+        self.fan = User.objects.create_user(username="fan", password="pass")
+        self.other = User.objects.create_user(username="other", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.other, title="Launch Trailer", body="Body",
+            status=BlogPost.STATUS_APPROVED, featured=True)
+        PostReaction.objects.create(post=self.post, user=self.other, reaction="like")
+        self.url = reverse("blog:react_post", args=[self.post.pk])
+        self.client.login(username="fan", password="pass")
+
+    def test_toggles_are_buffered_coalesced_and_flushed(self):
+        for value in ("like", "love", "like"):
+            data = self.client.post(self.url, {"reaction": value},
+                                    HTTP_ACCEPT="application/json").json()
+        self.assertEqual(data["reaction"], "like")
+        self.assertEqual(data["counts"], {"like": 2, "love": 0, "dislike": 0})
+        self.assertEqual(PostReaction.objects.filter(user=self.fan).count(), 0)
+
+        page = self.client.get(self.post.get_absolute_url())
+        active = [o["value"] for o in page.context["post_reaction_display"] if o["active"]]
+        self.assertEqual(active, ["like"])
+
+        self.assertEqual(flush(), 1)
+        self.assertEqual(
+            PostReaction.objects.get(user=self.fan).reaction, "like")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 2)
+
+        # Removing after the flush deletes the stored row on the next flush
+        data = self.client.post(self.url, {"reaction": "like"},
+                                HTTP_ACCEPT="application/json").json()
+        self.assertEqual(data["counts"]["like"], 1)
+        flush()
+        self.assertFalse(PostReaction.objects.filter(user=self.fan).exists())
+
+    def test_unfeatured_posts_write_directly(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(featured=False, likes=1)
+        self.client.post(self.url, {"reaction": "love"})
+        self.assertEqual(PostReaction.objects.get(user=self.fan).reaction, "love")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 2)
+
+        self.client.post(self.url, {"reaction": "dislike"})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 1)
+
+    def test_unfeaturing_flushes_pending_toggles(self):
+        self.client.post(self.url, {"reaction": "love"})
+        self.assertFalse(PostReaction.objects.filter(user=self.fan).exists())
+
+        self.post.featured = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertEqual(PostReaction.objects.get(user=self.fan).reaction, "love")
+        self.assertEqual(get_buffer().pending_deltas(self.post.pk), {})
+
+        # Direct toggles now start from the flushed row and stay put
+        self.client.post(self.url, {"reaction": "love"})
+        flush()
+        self.assertFalse(PostReaction.objects.filter(user=self.fan).exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 1)
+
+    @override_settings(BLOG_REACTION_BUFFER_CACHE="default")
+    def test_local_memory_cache_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_buffer()
+
+    def test_stalled_slot_is_skipped_without_leaking_deltas(self):
+        buffer = get_buffer()
+        buffer.cache.add(buffer._key("seq"), 0, None)
+        # A writer claims slot 1 and never fills it
+        buffer.cache.incr(buffer._key("seq"))
+        buffer.record(self.post.pk, self.fan.pk, "love", {"love": 1})
+
+        self.assertEqual(flush(), 0)
+        self.assertEqual(flush(), 1)
+        self.assertEqual(buffer.pending_deltas(self.post.pk), {})
+        # Too late: the slot was given up, so the writer has to pick another
+        self.assertFalse(buffer.cache.add(buffer._key("entry", 1), "late"))
+        self.assertEqual(PostReaction.objects.get(user=self.fan).reaction, "love")
+
+    def test_local_buffer_keeps_drained_changes_visible(self):
+        buffer = LocalBuffer()
+        buffer.record(1, 2, "love", {"love": 1})
+        states, deltas, token = buffer.drain()
+        self.assertEqual(states, {(1, 2): "love"})
+        self.assertEqual(buffer.get_state(1, 2), "love")
+        self.assertEqual(buffer.pending_deltas(1), {"love": 1})
+        buffer.finish(token, deltas)
+        self.assertIsNone(buffer.get_state(1, 2))
+
+    @override_settings(BLOG_REACTION_BUFFER_ENABLED=False, BLOG_REACTION_BUFFER_CACHE="default")
+    def test_flush_command_exits_when_the_buffer_is_disabled(self):
+        out = StringIO()
+        call_command("flush_reaction_buffer", "--loop", stdout=out)
+        self.assertIn("disabled", out.getvalue())
+
+
+class HotRankingTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username="ranker", password="pass")
+        self.fans = [User.objects.create_user(username=f"voter{i}", password="pass")
+                     for i in range(3)]
+        now = timezone.now()
+        self.fresh = BlogPost.objects.create(
+            author=self.author, title="Fresh", body="Body",
+            status=BlogPost.STATUS_APPROVED, published_at=now)
+        self.loved = BlogPost.objects.create(
+            author=self.author, title="Loved", body="Body",
+            status=BlogPost.STATUS_APPROVED, published_at=now - timezone.timedelta(hours=1))
+        self.ancient = BlogPost.objects.create(
+            author=self.author, title="Ancient", body="Body",
+            status=BlogPost.STATUS_APPROVED, published_at=now - timezone.timedelta(days=30))
+
+    def test_reactions_and_comments_refresh_the_stored_score(self):
+        before = BlogPost.objects.get(pk=self.loved.pk).hot_score
+        for fan in self.fans:
+            self.client.login(username=fan.username, password="pass")
+            self.client.post(reverse("blog:react_post", args=[self.loved.pk]),
+                             {"reaction": "love"})
+        Comment.objects.create(post=self.loved, author=self.author, body="Agreed",
+                               status=Comment.STATUS_APPROVED)
+        self.loved.refresh_from_db()
+        self.assertGreater(self.loved.hot_score, before)
+
+        response = self.client.get(reverse("blog:index") + "?sort=hot")
+        titles = [post.title for post in response.context["posts"]]
+        self.assertEqual(titles, ["Loved", "Fresh", "Ancient"])
+
+    def test_trending_only_lists_recent_posts(self):
+        response = self.client.get(reverse("blog:trending"))
+        titles = [post.title for post in response.context["posts"]]
+        self.assertEqual(titles, ["Fresh", "Loved"])
+
+    def test_refresh_command_recomputes_scores(self):
+        BlogPost.objects.update(hot_score=0)
+        out = StringIO()
+        call_command("refresh_hot_scores", stdout=out)
+        self.assertIn("Updated 3 hot score(s)", out.getvalue())
+        self.assertGreater(BlogPost.objects.get(pk=self.fresh.pk).hot_score, 0)
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username="curator", password="pass")
+        self.mining = self._post("Asteroid mining guide", "Drills, lasers and asteroid mining tips", "mining,space")
+        self.belt = self._post("Mining the asteroid belt", "Where asteroid mining pays best", "mining")
+        self.pirates = self._post("Space pirates", "Boarding tactics for pirate raids", "combat")
+        self.draft = BlogPost.objects.create(
+            author=self.author, title="Asteroid mining draft", body="Asteroid mining",
+            status=BlogPost.STATUS_PENDING)
+
+    def _post(self, title, excerpt, tags):
+        return BlogPost.objects.create(
+            author=self.author, title=title, body="Body", excerpt=excerpt, tags=tags,
+            status=BlogPost.STATUS_APPROVED)
+
+    def test_build_ranks_similar_approved_posts(self):
+        build_related_posts()
+        self.assertEqual(related_posts_for(self.mining)[0], self.belt)
+        self.assertFalse(RelatedPost.objects.filter(related=self.draft).exists())
+        self.assertFalse(RelatedPost.objects.filter(post=self.mining, related=self.pirates).exists())
+
+    def test_co_reactions_link_posts_without_shared_words(self):
+        User = get_user_model()
+        for i in range(2):
+            fan = User.objects.create_user(username=f"fan{i}", password="pass")
+            PostReaction.objects.create(post=self.mining, user=fan, reaction="love")
+            PostReaction.objects.create(post=self.pirates, user=fan, reaction="like")
+        build_related_posts()
+        self.assertIn(self.pirates, related_posts_for(self.mining))
+
+    def test_approval_splices_post_into_neighbour_lists(self):
+        build_related_posts()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.status = BlogPost.STATUS_APPROVED
+            self.draft.save()
+        self.assertIn(self.draft, related_posts_for(self.mining))
+        self.assertTrue(RelatedPost.objects.filter(post=self.draft).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.status = BlogPost.STATUS_REJECTED
+            self.draft.save()
+        self.assertNotIn(self.draft, related_posts_for(self.mining))
+        self.assertFalse(RelatedPost.objects.filter(post=self.draft).exists())
+
+    @override_settings(BLOG_RELATED_POSTS_LIMIT=1)
+    def test_approval_reaches_lists_outside_its_own_top(self):
+        build_related_posts()
+        self.assertEqual(related_posts_for(self.pirates), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            raid = self._post("Asteroid mining raids", "Asteroid mining pirates", "mining")
+        self.assertNotEqual(related_posts_for(raid), [self.pirates])
+        self.assertEqual(related_posts_for(self.pirates), [raid])
+
+    @override_settings(BLOG_RELATED_POSTS_LIMIT=1)
+    def test_withdrawal_backfills_the_lists_that_showed_it(self):
+        build_related_posts()
+        with self.captureOnCommitCallbacks(execute=True):
+            twin = self._post("Asteroid mining guide", "Drills, lasers and asteroid mining tips",
+                              "mining,space")
+        self.assertEqual(related_posts_for(self.mining), [twin])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            twin.status = BlogPost.STATUS_REJECTED
+            twin.save()
+        self.assertEqual(related_posts_for(self.mining), [self.belt])
+
+    @override_settings(BLOG_RELATED_BACKGROUND=True)
+    def test_approvals_are_batched_off_the_request(self):
+        build_related_posts()
+        with mock.patch.object(related, "_background") as executor, \
+                mock.patch.object(related, "Corpus", wraps=related.Corpus) as corpus:
+            with self.captureOnCommitCallbacks(execute=True):
+                twin = self._post("Asteroid mining guide", "Asteroid mining tips", "mining")
+                self.draft.status = BlogPost.STATUS_APPROVED
+                self.draft.save()
+            corpus.assert_not_called()
+            self.assertEqual(related_posts_for(self.mining), [self.belt])
+
+            executor.submit.assert_called_once()
+            update = executor.submit.call_args.args[0]
+            with mock.patch.object(related, "connections"):
+                update()
+            corpus.assert_called_once()
+        self.assertTrue(RelatedPost.objects.filter(post=twin).exists())
+        self.assertTrue(RelatedPost.objects.filter(post=self.draft).exists())
+
+    def test_detail_page_shows_read_next(self):
+        call_command("build_related_posts", stdout=StringIO())
+        response = self.client.get(self.mining.get_absolute_url())
+        self.assertContains(response, "Read next")
+        self.assertEqual(response.context["related_posts"][0], self.belt)
+
+
+class FollowFeedTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.reader = User.objects.create_user(username="reader", password="pass")
+        self.author = User.objects.create_user(username="scribe", password="pass")
+        Follow.objects.create(follower=self.reader, followed=self.author)
+
+    def _approve(self, title, author=None, published_at=None):
+        post = BlogPost.objects.create(author=author or self.author, title=title, body="Body")
+        with self.captureOnCommitCallbacks(execute=True):
+            post.status = BlogPost.STATUS_APPROVED
+            post.published_at = published_at
+            post.save()
+        return post
+
+    def test_approval_fans_out_and_unpublishing_withdraws(self):
+        post = self._approve("Dispatch")
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, post=post).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            post.status = BlogPost.STATUS_PENDING
+            post.save()
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_feed_pages_with_a_keyset_cursor(self):
+        now = timezone.now()
+        for i in range(5):
+            self._approve(f"Log {i}", published_at=now - timezone.timedelta(minutes=i))
+        self.client.login(username="reader", password="pass")
+        with override_settings(BLOG_FEED_PAGE_SIZE=2):
+            first = self.client.get(reverse("blog:feed"))
+            titles = [post.title for post in first.context["posts"]]
+            self.assertEqual(titles, ["Log 0", "Log 1"])
+            cursor = first.context["next_cursor"]
+            second = self.client.get(reverse("blog:feed"), {"cursor": cursor})
+            self.assertEqual([post.title for post in second.context["posts"]], ["Log 2", "Log 3"])
+            last = self.client.get(reverse("blog:feed"), {"cursor": second.context["next_cursor"]})
+            self.assertEqual([post.title for post in last.context["posts"]], ["Log 4"])
+            self.assertIsNone(last.context["next_cursor"])
+
+    @override_settings(BLOG_FEED_FANOUT_LIMIT=0)
+    def test_popular_authors_are_read_at_request_time(self):
+        post = self._approve("Broadcast")
+        self.assertFalse(FeedEntry.objects.exists())
+        posts, _ = feed_page(self.reader)
+        self.assertEqual(posts, [post])
+
+    def test_new_follow_backfills_and_unfollow_clears(self):
+        User = get_user_model()
+        other = User.objects.create_user(username="other", password="pass")
+        self._approve("Archive", author=other)
+        follow = Follow.objects.create(follower=self.reader, followed=other)
+        self.assertEqual([p.title for p in feed_page(self.reader)[0]], ["Archive"])
+        follow.delete()
+        self.assertEqual(feed_page(self.reader)[0], [])
+
+
+class SyndicationFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = get_user_model().objects.create_user(username="herald", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Patch notes", body="Body", excerpt="All the changes",
+            tags="rpg, news", status=BlogPost.STATUS_APPROVED)
+        BlogPost.objects.create(
+            author=self.author, title="Secret draft", body="Body", tags="rpg")
+
+    def test_formats_list_only_approved_posts(self):
+        rss = self.client.get(reverse("blog:posts_rss"))
+        self.assertContains(rss, "Patch notes")
+        self.assertNotContains(rss, "Secret draft")
+        atom = self.client.get(reverse("blog:posts_atom"))
+        self.assertIn("application/atom+xml", atom["Content-Type"])
+        data = json.loads(self.client.get(reverse("blog:posts_json")).content)
+        self.assertEqual(data["items"][0]["title"], "Patch notes")
+        self.assertEqual(data["items"][0]["tags"], ["rpg", "news"])
+
+    def test_author_and_tag_feeds(self):
+        self.assertContains(
+            self.client.get(reverse("blog:author_rss", args=["herald"])), "Patch notes")
+        self.assertContains(self.client.get(reverse("blog:tag_rss", args=["RPG"])), "Patch notes")
+        self.assertNotContains(self.client.get(reverse("blog:tag_rss", args=["rp"])), "Patch notes")
+        self.assertEqual(self.client.get(reverse("blog:author_rss", args=["nobody"])).status_code, 404)
+
+    def test_conditional_poll_gets_304_from_one_aggregate(self):
+        first = self.client.get(reverse("blog:posts_json"))
+        etag = first["ETag"]
+        self.assertIn("Last-Modified", first)
+        self.assertIn("max-age=300", first["Cache-Control"])
+        with self.assertNumQueries(1):
+            again = self.client.get(reverse("blog:posts_json"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        self.post.title = "Patch notes v2"
+        self.post.save()
+        changed = self.client.get(reverse("blog:posts_json"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_bulk_created_posts_change_the_stamp(self):
+        etag = self.client.get(reverse("blog:posts_json"))["ETag"]
+        BlogPost.objects.bulk_create([BlogPost(
+            author=self.author, title="Imported", slug="imported", body="Body",
+            status=BlogPost.STATUS_APPROVED, published_at=timezone.now())])
+        polled = self.client.get(reverse("blog:posts_json"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(polled.status_code, 200)
+        self.assertContains(polled, "Imported")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="keeper", password="pass")
+        self.reader = User.objects.create_user(username="visitor", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Lore dump", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+        self.url = self.post.get_absolute_url()
+
+    def _revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_detail_answers_304_until_a_comment_or_reaction_lands(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("s-maxage=60", first["Cache-Control"])
+        self.assertIn("Cookie", first["Vary"])
+        self.assertEqual(self._revalidate(self.url, first).status_code, 304)
+
+        Comment.objects.create(post=self.post, author=self.reader, body="Nice",
+                               status=Comment.STATUS_APPROVED)
+        second = self._revalidate(self.url, first)
+        self.assertEqual(second.status_code, 200)
+
+        toggle_reaction(PostReaction, self.post.pk, self.reader.pk, "like")
+        self.assertEqual(self._revalidate(self.url, second).status_code, 200)
+
+    def test_detail_tag_follows_commenter_cards(self):
+        Comment.objects.create(post=self.post, author=self.reader, body="Nice",
+                               status=Comment.STATUS_APPROVED)
+        first = self.client.get(self.url)
+        self.assertEqual(self._revalidate(self.url, first).status_code, 304)
+
+        profile = self.reader.profile
+        profile.bio = "New look"
+        profile.save()
+        second = self._revalidate(self.url, first)
+        self.assertEqual(second.status_code, 200)
+
+        # Activity elsewhere moves the commenter's rarity badge
+        BlogPost.objects.create(author=self.reader, title="Elsewhere", body="Body")
+        self.assertEqual(self._revalidate(self.url, second).status_code, 200)
+
+    def test_304_skips_the_view(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self._revalidate(self.url, first)
+
+    def test_index_tag_follows_posts_and_sort(self):
+        url = reverse("blog:index")
+        latest = self.client.get(url)
+        self.assertEqual(self._revalidate(url, latest).status_code, 304)
+        hot = self.client.get(url, {"sort": "hot"})
+        self.assertNotEqual(hot["ETag"], latest["ETag"])
+        BlogPost.objects.create(author=self.author, title="Another", body="Body",
+                                status=BlogPost.STATUS_APPROVED)
+        self.assertEqual(self._revalidate(url, latest).status_code, 200)
+
+    def test_logged_in_pages_are_private_and_always_rendered(self):
+        first = self.client.get(self.url)
+        self.client.login(username="visitor", password="pass")
+        response = self._revalidate(self.url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches["pages"].clear()
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="archivist", password="pass")
+        self.reader = User.objects.create_user(username="lurker", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Cached chronicle", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+        self.url = self.post.get_absolute_url()
+
+    def test_second_anonymous_read_is_a_hit_without_queries(self):
+        self.assertEqual(self.client.get(self.url)["X-Page-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+        self.assertContains(response, "Cached chronicle")
+        revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.get(self.url)
+        self.client.login(username="lurker", password="pass")
+        response = self.client.get(self.url)
+        self.assertNotIn("X-Page-Cache", response)
+
+    def test_comment_reaction_and_edit_purge_the_page(self):
+        self.client.get(self.url)
+        Comment.objects.create(post=self.post, author=self.reader, body="Fresh take",
+                               status=Comment.STATUS_APPROVED)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertContains(response, "Fresh take")
+
+        self.client.login(username="lurker", password="pass")
+        self.client.post(reverse("blog:react_post", args=[self.post.pk]), {"reaction": "love"})
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url)["X-Page-Cache"], "MISS")
+
+        index = reverse("blog:index")
+        self.client.get(index)
+        self.assertEqual(self.client.get(index)["X-Page-Cache"], "HIT")
+        self.post.title = "Retitled chronicle"
+        self.post.save()
+        self.assertContains(self.client.get(index), "Retitled chronicle")
+
+    def test_query_string_is_part_of_the_key(self):
+        index = reverse("blog:index")
+        self.client.get(index)
+        self.assertEqual(self.client.get(index, {"sort": "hot"})["X-Page-Cache"], "MISS")
+
+
+class SitemapTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        override = override_settings(SITEMAP_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.author = get_user_model().objects.create_user(username="cartographer", password="pass")
+        self.live = BlogPost.objects.create(
+            author=self.author, title="Charted", body="Body", status=BlogPost.STATUS_APPROVED)
+        self.draft = BlogPost.objects.create(author=self.author, title="Uncharted", body="Body")
+
+    def _read(self, name):
+        with open(os.path.join(self.root, name), encoding="utf-8") as handle:
+            return handle.read()
+
+    def test_first_request_builds_index_and_shards(self):
+        response = self.client.get("/sitemap.xml")
+        self.assertEqual(response.status_code, 200)
+        index = b"".join(response.streaming_content).decode()
+        for name in ("posts-0", "profiles-0", "pages-0"):
+            self.assertIn(f"/sitemaps/{name}.xml", index)
+        posts = self._read("posts-0.xml")
+        self.assertIn(self.live.get_absolute_url(), posts)
+        self.assertIn("<lastmod>", posts)
+        self.assertNotIn("uncharted", posts)
+        self.assertIn("/user/profile/cartographer/", self._read("profiles-0.xml"))
+        self.assertEqual(self.client.get("/sitemaps/posts-0.xml").status_code, 200)
+        self.assertEqual(self.client.get("/sitemaps/posts-7.xml").status_code, 404)
+
+    def test_approval_rewrites_the_post_shard(self):
+        call_command("build_sitemaps", stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.status = BlogPost.STATUS_APPROVED
+            self.draft.save()
+        self.assertIn(self.draft.get_absolute_url(), self._read("posts-0.xml"))
+
+        live_url = self.live.get_absolute_url()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.live.delete()
+        self.assertNotIn(live_url, self._read("posts-0.xml"))
+
+
+class TemplateRenderingTests(TestCase):
+    def setUp(self):
+        _render_widget.cache_clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="bard", password="pass")
+        self.reader = User.objects.create_user(username="listener", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Ballad", body="Body",
+            status=BlogPost.STATUS_APPROVED)
+        for body in ("First", "Second", "Third"):
+            Comment.objects.create(post=self.post, author=self.author, body=body,
+                                   status=Comment.STATUS_APPROVED)
+        self.url = self.post.get_absolute_url()
+
+    def test_identical_comment_widgets_render_once_per_state(self):
+        self.client.get(self.url)
+        # One post widget and three comments, each with its own action URL
+        self.assertEqual(_render_widget.cache_info().misses, 4)
+        self.client.get(self.url)
+        self.assertEqual(_render_widget.cache_info().misses, 4)
+
+        toggle_reaction(PostReaction, self.post.pk, self.reader.pk, "like")
+        self.client.get(self.url)
+        self.assertEqual(_render_widget.cache_info().misses, 5)
+
+    def test_cached_widget_gets_the_viewers_csrf_token(self):
+        self.client.force_login(self.reader)
+        first = self.client.get(self.url)
+        self.assertNotContains(first, CSRF_SENTINEL)
+        self.assertContains(first, 'data-ajax="reaction"', count=4 * 3)
+        token = first.context["csrf_token"]
+        self.assertContains(first, f'name="csrfmiddlewaretoken" value="{token}"')
+        comment = self.post.comments.first()
+        self.assertContains(first, f'value="{self.url}#comment-{comment.pk}"')
+
+        self.client.logout()
+        anonymous = self.client.get(self.url)
+        self.assertNotContains(anonymous, 'data-ajax="reaction"')
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_server_timing_reports_template_time(self):
+        response = self.client.get(self.url)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^tpl;dur=\d+\.\d;desc="templates", total;dur=\d+\.\d$')
+        template_ms = float(timing.split(";")[1].removeprefix("dur="))
+        self.assertGreater(template_ms, 0)
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_server_timing_can_be_disabled(self):
+        self.assertFalse(self.client.get(self.url).has_header("Server-Timing"))
+
+
+@skipUnless(importlib.util.find_spec("jinja2"), "Jinja2 is not installed")
+class JinjaTemplatesTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username="scribe", password="pass")
+        self.reader = User.objects.create_user(username="pilgrim", password="pass")
+        self.post = BlogPost.objects.create(
+            author=self.author, title="Echo <one>", body="First line\n\nSecond <b>line</b>",
+            status=BlogPost.STATUS_APPROVED, featured=True)
+        Comment.objects.create(post=self.post, author=self.author, body="Welcome",
+                               status=Comment.STATUS_APPROVED)
+        toggle_reaction(PostReaction, self.post.pk, self.reader.pk, "love")
+
+    def _normalised(self, url):
+        html = self.client.get(url).content.decode()
+        html = re.sub(r'name="csrfmiddlewaretoken" value="[^"]+"', "", html)
+        return re.sub(r"\s+", " ", html).replace("> <", "><").strip()
+
+    def _both_engines(self, url):
+        django_html = self._normalised(url)
+        with override_settings(TEMPLATES=[settings.JINJA2_TEMPLATES, *settings.TEMPLATES]):
+            jinja_html = self._normalised(url)
+        return django_html, jinja_html
+
+    def test_ported_pages_render_the_same_markup(self):
+        for user in (None, self.reader, self.author):
+            if user:
+                self.client.force_login(user)
+            for url in (reverse("blog:index"), self.post.get_absolute_url(), reverse("pages:home")):
+                django_html, jinja_html = self._both_engines(url)
+                self.assertEqual(jinja_html, django_html, f"{url} as {user}")
+
+    def test_ported_templates_use_the_jinja_engine(self):
+        with override_settings(TEMPLATES=[settings.JINJA2_TEMPLATES, *settings.TEMPLATES]):
+            response = self.client.get(reverse("blog:index"))
+            self.assertRegex(response["Server-Timing"], r"^tpl;dur=")
+            self.assertEqual(
+                type(get_template("blog/index.html").backend).__name__, "TimedJinja2")
+            self.assertEqual(
+                type(get_template("pages/about.html").backend).__name__,
+                "TimedDjangoTemplates")
+
+
+class AsyncReadViewTests(TestCase):
+    """The read-heavy views are async and work through the async handler."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="herald", password="pass")
+        self.reader = User.objects.create_user(username="listener", password="pass")
+        Follow.objects.create(follower=self.reader, followed=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = BlogPost.objects.create(
+                author=self.author, title="Async dispatch", body="Body",
+                status=BlogPost.STATUS_APPROVED)
+        Comment.objects.create(post=self.post, author=self.reader, body="Loud and clear",
+                               status=Comment.STATUS_APPROVED)
+
+    def test_read_views_are_coroutines(self):
+        for view in (views.post_list, views.post_detail, views.feed):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_index_detail_and_feed_render_under_asgi(self):
+        index = await self.async_client.get(reverse("blog:index"))
+        self.assertContains(index, "Async dispatch")
+        detail = await self.async_client.get(self.post.get_absolute_url())
+        self.assertContains(detail, "Loud and clear")
+        revalidated = await self.async_client.get(
+            reverse("blog:index"), headers={"if-none-match": index["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+
+        await self.async_client.aforce_login(self.reader)
+        feed = await self.async_client.get(reverse("blog:feed"))
+        self.assertContains(feed, "Async dispatch")
+        own_index = await self.async_client.get(reverse("blog:index"))
+        self.assertIn("private", own_index["Cache-Control"])
+
+    async def test_comment_submission_still_writes(self):
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.post(
+            self.post.get_absolute_url(), {"body": "Second transmission"})
+        self.assertRedirects(response, self.post.get_absolute_url(),
+                             fetch_redirect_response=False)
+        self.assertTrue(await Comment.objects.filter(body="Second transmission").aexists())
+
+    async def test_syndication_answers_conditional_polls(self):
+        url = reverse("blog:posts_rss")
+        response = await self.async_client.get(url)
+        self.assertContains(response, "Async dispatch")
+        polled = await self.async_client.get(url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(polled.status_code, 304)
@@ -0,0 +1,153 @@
+# blog/textfilter.py
+"""
+Compiled banned-term and link filter for user text.
+
+All banned terms are folded into one regex built from a prefix trie, so a
+comment is scanned once no matter how many terms are configured. Link
+markers are matched by the same pattern, giving the link count in the
+same pass.
+
+Terms come from ``BLOG_COMMENT_BANNED_WORDS`` plus, optionally, a file named
+by ``BLOG_COMMENT_BANNED_WORDS_FILE`` (one term per line). The compiled
+filter is cached and rebuilt when the setting changes or the file's
+modification time moves.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+LINK_PATTERN = r'https?://|www\.'
+
+
+class TermMatch(NamedTuple):
+    term: str
+    start: int
+    end: int
+
+
+class ScanResult(NamedTuple):
+    matches: list
+    link_count: int
+
+    @property
+    def terms(self):
+        """Distinct banned terms found, in order of first appearance."""
+        return list(dict.fromkeys(match.term for match in self.matches))
+
+
+def _trie_regex(terms):
+    """
+    Build a regex alternation from a prefix trie of ``terms``.
+
+    Shared prefixes are matched once, and longer terms are tried before
+    their own prefixes (``scam artist`` wins over ``scam``).
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        ends_here = '' in node
+        branches = [re.escape(char) + emit(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            body = branches[0]
+        else:
+            body = '(?:' + '|'.join(branches) + ')'
+        if ends_here:
+            return f'(?:{body})?'
+        return body
+
+    return emit(trie)
+
+
+class TextFilter:
+    """Scan text for banned terms (with positions) and links in one pass."""
+
+    def __init__(self, terms):
+        cleaned = {term.strip().lower() for term in terms if term and term.strip()}
+        self.terms = tuple(sorted(cleaned))
+        parts = []
+        if self.terms:
+            parts.append(rf'(?P<term>\b(?:{_trie_regex(self.terms)})\b)')
+        parts.append(f'(?P<link>{LINK_PATTERN})')
+        self.pattern = re.compile('|'.join(parts), re.IGNORECASE)
+
+    def scan(self, text):
+        matches = []
+        link_count = 0
+        for match in self.pattern.finditer(text or ''):
+            if match.lastgroup == 'link':
+                link_count += 1
+            else:
+                matches.append(TermMatch(match.group().lower(),
+                                         match.start(), match.end()))
+        return ScanResult(matches, link_count)
+
+
+def _load_terms():
+    """Return (terms, file mtime) from settings and the optional terms file."""
+    terms = list(getattr(settings, 'BLOG_COMMENT_BANNED_WORDS', []))
+    path = getattr(settings, 'BLOG_COMMENT_BANNED_WORDS_FILE', '')
+    mtime = None
+    if path:
+        try:
+            mtime = os.stat(path).st_mtime
+            with open(path, encoding='utf-8') as fh:
+                terms.extend(line.split('#', 1)[0] for line in fh)
+        except OSError as exc:
+            logger.warning("Cannot read banned words file %s: %s", path, exc)
+    return terms, mtime
+
+
+_lock = threading.Lock()
+_cached = {'filter': None, 'mtime': None}
+
+
+def _file_mtime():
+    path = getattr(settings, 'BLOG_COMMENT_BANNED_WORDS_FILE', '')
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def get_text_filter():
+    """Return the shared TextFilter, rebuilding it if its sources changed."""
+    current = _cached['filter']
+    if current is not None and _cached['mtime'] == _file_mtime():
+        return current
+    with _lock:
+        terms, mtime = _load_terms()
+        _cached['filter'] = TextFilter(terms)
+        _cached['mtime'] = mtime
+        return _cached['filter']
+
+
+def reset_text_filter():
+    _cached['filter'] = None
+    _cached['mtime'] = None
+
+
+@receiver(setting_changed, dispatch_uid='blog_textfilter_setting_changed')
+def _reload_on_setting_change(setting, **kwargs):
+    if setting in ('BLOG_COMMENT_BANNED_WORDS', 'BLOG_COMMENT_BANNED_WORDS_FILE'):
+        reset_text_filter()
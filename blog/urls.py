@@ -4,12 +4,30 @@ URL configuration for the blog app.
 
 from django.urls import path
 from . import views
+from .syndication import AuthorPostsFeed, PostsFeed, TagPostsFeed, feed_view
 
 app_name = "blog"
 
 urlpatterns = [
     # Blog homepage (list of approved posts)
     path("", views.post_list, name="index"),
+    path("trending/", views.trending, name="trending"),
+    path("feed/", views.feed, name="feed"),
+
+    # Syndication: RSS, Atom and JSON Feed for all posts, one author or one tag
+    *[
+        path(f"feeds/{fmt}/", feed_view(PostsFeed, fmt), name=f"posts_{fmt}")
+        for fmt in ("rss", "atom", "json")
+    ],
+    *[
+        path(f"feeds/author/<str:username>/{fmt}/",
+             feed_view(AuthorPostsFeed, fmt), name=f"author_{fmt}")
+        for fmt in ("rss", "atom", "json")
+    ],
+    *[
+        path(f"feeds/tag/<str:tag>/{fmt}/", feed_view(TagPostsFeed, fmt), name=f"tag_{fmt}")
+        for fmt in ("rss", "atom", "json")
+    ],
 
     # Create a new post
     path("new/", views.new_post, name="new"),
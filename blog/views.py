@@ -1,11 +1,39 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.db.models import (
+    Count, DateTimeField, F, Func, IntegerField, Max, OuterRef, Q, Subquery, Sum,
+)
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+from accounts.authors import aattach_author_cards, attach_author_cards
+from accounts.models import UserProfile
+from core.conditional import aload_user, conditional_page, make_etag
+from core.pagecache import cache_anonymous_page
+from core.ratelimit import ratelimit
+
+from .feed import afeed_page, decode_cursor
 from .forms import BlogPostForm, PublicBlogPostForm, CommentForm
+from .moderation import moderate_comment, moderate_post, record_decision
+from .reaction_buffer import (
+    buffered_toggle,
+    is_buffered,
+    is_buffered_row,
+    merged_counts,
+    merged_user_reaction,
+)
+from .ranking import refresh_hot_scores
+from .reactions import REMOVED, apply_like_deltas, toggle_reaction
+from .purge import detail_tags, index_tags, purge_engagement
+from .related import arelated_posts_for
+from .syndication import feed_stamp
 from .models import (
     BlogPost,
     Comment,
@@ -13,6 +41,7 @@ from .models import (
     CommentReport,
     PostReaction,
     ReactionType,
+    RelatedPost,
 )
 
 # Icon map used by the template to render reaction buttons
@@ -34,7 +63,42 @@ REACTION_OPTIONS = [
 
 REACTION_VALUES = {opt['value'] for opt in REACTION_OPTIONS}
 
+# Index orderings; "hot" reads the indexed hot_score column (blog/ranking.py)
+POST_ORDERINGS = {
+    'latest': ('-published_at', '-updated_at'),
+    'hot': ('-hot_score', '-published_at'),
+}
+
+
+def wants_json(request):
+    """True for fetch/XHR calls from the progressive-enhancement script."""
+    return (
+        'application/json' in request.headers.get('Accept', '')
+        or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    )
+
+
+def _reaction_counts(queryset):
+    """Totals per reaction type in one grouped query."""
+    counts = {opt['value']: 0 for opt in REACTION_OPTIONS}
+    for row in queryset.order_by().values('reaction').annotate(total=Count('id')):
+        counts[row['reaction']] = row['total']
+    return counts
+
+
+def _action_response(request, level, text, redirect_url, status=200, **data):
+    """
+    Answer a moderation/reaction action: JSON for scripts, otherwise a flash
+    message and a redirect back to the page.
+    """
+    if wants_json(request):
+        return JsonResponse(
+            {'ok': status < 400, 'message': text, **data}, status=status)
+    getattr(messages, level)(request, text)
+    return redirect(redirect_url)
 
+
+@ratelimit('posts')
 def new_post(request):
     """Launch a new signal into the Abyss: staff goes live, explorers queue in orbit (pending)."""
     if not request.user.is_authenticated:
@@ -46,18 +110,30 @@ def new_post(request):
             post = form.save(commit=False)
             post.author = request.user
 
+            verdict = None
             if request.user.is_staff or request.user.is_superuser:
                 post.status = BlogPost.STATUS_APPROVED
+            else:
+                verdict = moderate_post(post)
+                post.status = verdict.status
+
+            if post.status == BlogPost.STATUS_APPROVED:
                 messages.success(
                     request, "Deployed. Your post is live on the front page.")
+            elif post.status == BlogPost.STATUS_REJECTED:
+                messages.error(
+                    request,
+                    "Transmission blocked. Our filters flagged this post as spam.",
+                )
             else:
-                post.status = BlogPost.STATUS_PENDING
                 messages.info(
                     request,
                     "Transmission received. Your post is in review and will surface once approved.",
                 )
 
             post.save()
+            if verdict is not None:
+                record_decision(verdict, post)
             return redirect('blog:index')
     else:
         form = PublicBlogPostForm()
@@ -65,64 +141,216 @@ def new_post(request):
     return render(request, 'blog/new_post.html', {'form': form})
 
 
-def post_list(request):
+def _post_list_validators(request):
+    """
+    The posts stamp plus what the author cards show (avatars, activity
+    counts); the hot ordering also moves with reactions.
+    """
+    etag, last_modified = feed_stamp()
+    comments = Comment.objects.count()
+    profiles = UserProfile.objects.aggregate(last=Max('updated_at'))['last']
+    if request.GET.get('sort') == 'hot':
+        total = BlogPost.approved.aggregate(total=Sum('hot_score'))['total']
+        return make_etag(etag, 'hot', total, comments, profiles), None
+    last_modified = max(filter(None, (last_modified, profiles)), default=None)
+    return make_etag(etag, request.GET.urlencode(), comments, profiles), last_modified
+
+
+def _latest(queryset, link):
+    """(count, newest updated_at) of ``queryset`` rows pointing at the outer post."""
+    rows = queryset.filter(**{link: OuterRef('pk')}).order_by().values(link)
+    return (
+        Subquery(rows.annotate(n=Count('pk')).values('n'), output_field=IntegerField()),
+        Subquery(rows.annotate(last=Max('updated_at')).values('last')),
+    )
+
+
+def _shown_authors(field):
+    """Rows whose ``field`` is the outer post's author or one of its commenters."""
+    commenters = Comment.objects.filter(
+        post=OuterRef(OuterRef('pk')), status=Comment.STATUS_APPROVED).values('author_id')
+    return Q(**{field: OuterRef('author_id')}) | Q(**{f'{field}__in': commenters})
+
+
+def _totals(queryset, **columns):
+    """(count, ``MAX`` of each date column) of ``queryset`` as single-value subqueries."""
+    rows = queryset.order_by()
+    totals = [Subquery(
+        rows.annotate(n=Func(F('pk'), function='COUNT', output_field=IntegerField()))
+        .values('n'))]
+    for column in columns.values():
+        totals.append(Subquery(
+            rows.annotate(last=Func(F(column), function='MAX', output_field=DateTimeField()))
+            .values('last')))
+    return totals
+
+
+def _post_detail_validators(request, year, month, day, slug):
+    """
+    One query: the post row plus counts/latest edits of what the page shows,
+    including the author cards (avatars and post/comment counts behind the
+    rarity badges) of the post author and every commenter.
+    """
+    comments = Comment.objects.filter(status=Comment.STATUS_APPROVED)
+    annotations = {}
+    for name, (queryset, link) in {
+        'comments': (comments, 'post'),
+        'reactions': (PostReaction.objects.all(), 'post'),
+        'comment_reactions': (
+            CommentReaction.objects.filter(comment__status=Comment.STATUS_APPROVED),
+            'comment__post'),
+        'related': (RelatedPost.objects.all(), 'post'),
+    }.items():
+        annotations[f'{name}_n'], annotations[f'{name}_last'] = _latest(queryset, link)
+    annotations['author_posts_n'], annotations['author_posts_last'] = _totals(
+        BlogPost.objects.filter(_shown_authors('author_id')), last='updated_at')
+    annotations['author_comments_n'], annotations['author_comments_last'] = _totals(
+        Comment.objects.filter(_shown_authors('author_id')), last='updated_at')
+    _, annotations['profiles_last'] = _totals(
+        UserProfile.objects.filter(_shown_authors('user_id')), last='updated_at')
+    row = (
+        BlogPost.objects.filter(
+            slug=slug, published_at__year=year, published_at__month=month,
+            published_at__day=day)
+        .annotate(**annotations)
+        .values('pk', 'status', 'featured', 'updated_at', *annotations)
+        .first()
+    )
+    if row is None or row['status'] != BlogPost.STATUS_APPROVED:
+        return None
+    if is_buffered_row(row):
+        # Unflushed reactions live in the buffer, not in these aggregates
+        return None
+    stamps = [row['updated_at']] + [
+        row[f'{name}_last'] for name in (
+            'comments', 'reactions', 'comment_reactions', 'related',
+            'author_posts', 'author_comments', 'profiles')]
+    last_modified = max(stamp for stamp in stamps if stamp)
+    return make_etag(*(row[key] for key in sorted(row))), last_modified
+
+
+@cache_anonymous_page(index_tags)
+@conditional_page(_post_list_validators)
+async def post_list(request):
     """Surface-level index: only signals approved by the Council breach the Abyss."""
-    posts = BlogPost.approved.order_by('-published_at', '-updated_at')
-    return render(request, 'blog/index.html', {'posts': posts})
+    sort = 'hot' if request.GET.get('sort') == 'hot' else 'latest'
+    ordering = POST_ORDERINGS[sort]
+    posts = await aattach_author_cards(
+        BlogPost.approved.select_related('author').order_by(*ordering)
+    )
+    # Templates may still follow lazy relations, which the event loop forbids
+    return await sync_to_async(render)(request, 'blog/index.html', {'posts': posts, 'sort': sort})
+
+
+def trending(request):
+    """Hottest approved posts from the last few days, by stored hot score."""
+    window = getattr(settings, 'BLOG_TRENDING_WINDOW_DAYS', 7)
+    limit = getattr(settings, 'BLOG_TRENDING_LIMIT', 24)
+    posts = attach_author_cards(
+        BlogPost.approved.select_related('author')
+        .filter(published_at__gte=timezone.now() - timedelta(days=window))
+        .order_by(*POST_ORDERINGS['hot'])[:limit]
+    )
+    return render(request, 'blog/index.html', {'posts': posts, 'sort': 'trending'})
 
 
-def post_detail(request, year, month, day, slug):
+@login_required
+async def feed(request):
+    """Transmissions from the explorers you follow, newest first."""
+    user = await aload_user(request)
+    posts, next_cursor = await afeed_page(user, decode_cursor(request.GET.get('cursor')))
+    await aattach_author_cards(posts)
+    return await sync_to_async(render)(request, 'blog/index.html', {
+        'posts': posts,
+        'sort': 'feed',
+        'next_cursor': next_cursor,
+    })
+
+
+@ratelimit('comments')
+@cache_anonymous_page(detail_tags)
+@conditional_page(_post_detail_validators)
+async def post_detail(request, year, month, day, slug):
     """Deep-scan a single signal; only stable (approved) transmissions are public."""
-    qs = BlogPost.objects.filter(slug=slug).filter(
+    qs = BlogPost.objects.select_related('author').filter(slug=slug).filter(
         published_at__year=year,
         published_at__month=month,
         published_at__day=day,
     )
-    post = get_object_or_404(qs)
+    post = await aget_object_or_404(qs)
+    user = await aload_user(request)
 
-    if (post.status != BlogPost.STATUS_APPROVED) and request.user != post.author:
+    if (post.status != BlogPost.STATUS_APPROVED) and user != post.author:
         return HttpResponse('Not found', status=404)
 
     comment_form = CommentForm()
 
     if request.method == 'POST':
-        # New comment submission
-        comment_form = CommentForm(request.POST)
-        if not request.user.is_authenticated:
-            messages.error(
-                request, 'Log in to add your signal to the constellation.')
-        elif comment_form.is_valid():
-            comment = comment_form.save(commit=False)
-            comment.post = post
-            comment.author = request.user
-            if request.user.is_staff or request.user.is_superuser:
-                comment.status = Comment.STATUS_APPROVED
-                comment.save()
+        # Writes (moderation, signals, notifications) stay synchronous
+        comment_form, response = await sync_to_async(_submit_comment)(request, post)
+        if response is not None:
+            return response
+
+    context = await _post_detail_context(request, post, comment_form)
+    return await sync_to_async(render)(request, 'blog/post_detail.html', context)
+
+
+def _submit_comment(request, post):
+    """Handle a new comment; returns (form, redirect or None to re-render)."""
+    comment_form = CommentForm(request.POST)
+    if not request.user.is_authenticated:
+        messages.error(
+            request, 'Log in to add your signal to the constellation.')
+    elif comment_form.is_valid():
+        comment = comment_form.save(commit=False)
+        comment.post = post
+        comment.author = request.user
+        if request.user.is_staff or request.user.is_superuser:
+            comment.status = Comment.STATUS_APPROVED
+            comment.save()
+            messages.success(
+                request, "Comment deployed. It's live for all explorers.")
+        else:
+            verdict = moderate_comment(comment)
+            comment.status = verdict.status
+            comment.save()
+            record_decision(verdict, comment)
+            if comment.status == Comment.STATUS_APPROVED:
                 messages.success(
                     request, "Comment deployed. It's live for all explorers.")
+            elif comment.status == Comment.STATUS_REJECTED:
+                messages.error(
+                    request,
+                    "Comment blocked. Our filters flagged it as spam.",
+                )
             else:
-                comment.status = Comment.STATUS_PENDING
-                comment.save()
                 messages.success(
                     request,
                     "Thanks, explorer. Your comment is in orbit and will appear after approval.",
                 )
-            return redirect(post.get_absolute_url())
-        else:
-            messages.error(
-                request,
-                'We could not accept that comment. Please review the highlighted issues.',
-            )
+        return comment_form, redirect(post.get_absolute_url())
+    else:
+        messages.error(
+            request,
+            'We could not accept that comment. Please review the highlighted issues.',
+        )
+    return comment_form, None
+
 
+async def _post_detail_context(request, post, comment_form):
+    """Everything post_detail.html shows, read with the async ORM."""
     # Fetch comments and their related reactions/reports efficiently
-    approved_comments = list(
+    approved_comments = [
+        comment async for comment in
         post.comments.approved()
         .select_related('author')
         .prefetch_related('reactions__user', 'reports__reported_by')
-    )
+    ]
+    # Avatars and rarity badges for the post author and every commenter
+    await aattach_author_cards([post, *approved_comments])
 
     # Compute post reaction totals and current user's reaction
-    post_reactions = list(post.reactions.select_related('user'))
+    post_reactions = [r async for r in post.reactions.select_related('user')]
     post_reaction_totals = {opt['value']: 0 for opt in REACTION_OPTIONS}
     for r in post_reactions:
         post_reaction_totals[r.reaction] = post_reaction_totals.get(
@@ -135,6 +363,14 @@ def post_detail(request, year, month, day, slug):
                 user_post_reaction = r.reaction
                 break
 
+    # Unflushed write-behind toggles (viral posts only)
+    if is_buffered(post):
+        post_reaction_totals = await sync_to_async(merged_counts)(
+            post.pk, post_reaction_totals)
+        if request.user.is_authenticated:
+            user_post_reaction = await sync_to_async(merged_user_reaction)(
+                post.pk, request.user.id, user_post_reaction)
+
     post_reaction_display = [
         {**opt, 'count': post_reaction_totals.get(
             opt['value'], 0), 'active': (opt['value'] == user_post_reaction)}
@@ -183,13 +419,14 @@ def post_detail(request, year, month, day, slug):
                         c.user_reported = True
                         break
 
-    context = {
+    return {
         'post': post,
         'comments': approved_comments,
         'comment_form': comment_form,
         'post_reaction_display': post_reaction_display,
+        # Precomputed offline (blog/related.py); one indexed query
+        'related_posts': await arelated_posts_for(post),
     }
-    return render(request, 'blog/post_detail.html', context)
 
 
 @login_required
@@ -263,6 +500,7 @@ def edit_comment(request, pk):
 
 @login_required
 @require_POST
+@ratelimit('reactions')
 def react_to_post(request, pk):
     """Add/replace/remove the current user's reaction on a post."""
     post = get_object_or_404(BlogPost, pk=pk)
@@ -270,26 +508,37 @@ def react_to_post(request, pk):
     redirect_url = request.POST.get('next') or post.get_absolute_url()
 
     if reaction_value not in REACTION_VALUES:
-        messages.error(request, 'Invalid reaction.')
-        return redirect(redirect_url)
-
-    reaction, created = PostReaction.objects.get_or_create(
-        post=post, user=request.user)
+        return _action_response(
+            request, 'error', 'Invalid reaction.', redirect_url, status=400)
 
     # Toggle: if same reaction posted again, remove it
-    if not created and reaction.reaction == reaction_value:
-        reaction.delete()
-        messages.info(request, 'Reaction removed.')
+    buffered = is_buffered(post)
+    if buffered:
+        result = buffered_toggle(post.pk, request.user.pk, reaction_value)
+    else:
+        result = toggle_reaction(
+            PostReaction, post.pk, request.user.pk, reaction_value)
+        apply_like_deltas(post.pk, result.deltas)
+        refresh_hot_scores([post.pk])
+        # Buffered toggles purge cached pages when the buffer is flushed
+        purge_engagement(post)
+    if result.action == REMOVED:
+        level, text = 'info', 'Reaction removed.'
     else:
-        reaction.reaction = reaction_value
-        reaction.save(update_fields=['reaction', 'updated_at'])
-        messages.success(request, 'Reaction recorded!')
+        level, text = 'success', 'Reaction recorded!'
 
-    return redirect(redirect_url)
+    extra = {}
+    if wants_json(request):
+        counts = _reaction_counts(post.reactions.all())
+        if buffered:
+            counts = merged_counts(post.pk, counts)
+        extra = {'reaction': result.reaction, 'counts': counts}
+    return _action_response(request, level, text, redirect_url, **extra)
 
 
 @login_required
 @require_POST
+@ratelimit('reactions')
 def react_to_comment(request, pk):
     """Add/replace/remove the current user's reaction on a comment."""
     comment = get_object_or_404(Comment, pk=pk)
@@ -298,31 +547,34 @@ def react_to_comment(request, pk):
 
     # Only staff can react to non-approved comments
     if comment.status != Comment.STATUS_APPROVED and not request.user.is_staff:
-        messages.error(request, 'You cannot react to a non-approved comment.')
-        return redirect(redirect_url)
+        return _action_response(
+            request, 'error', 'You cannot react to a non-approved comment.',
+            redirect_url, status=403)
 
     reaction_value = request.POST.get('reaction')
     if reaction_value not in REACTION_VALUES:
-        messages.error(request, 'Invalid reaction.')
-        return redirect(redirect_url)
-
-    reaction, created = CommentReaction.objects.get_or_create(
-        comment=comment, user=request.user)
+        return _action_response(
+            request, 'error', 'Invalid reaction.', redirect_url, status=400)
 
     # Toggle: if same reaction posted again, remove it
-    if not created and reaction.reaction == reaction_value:
-        reaction.delete()
-        messages.info(request, 'Comment reaction removed.')
+    result = toggle_reaction(
+        CommentReaction, comment.pk, request.user.pk, reaction_value)
+    purge_engagement(comment.post)
+    if result.action == REMOVED:
+        level, text = 'info', 'Comment reaction removed.'
     else:
-        reaction.reaction = reaction_value
-        reaction.save(update_fields=['reaction', 'updated_at'])
-        messages.success(request, 'Comment reaction recorded!')
+        level, text = 'success', 'Comment reaction recorded!'
 
-    return redirect(redirect_url)
+    extra = {}
+    if wants_json(request):
+        extra = {'reaction': result.reaction,
+                 'counts': _reaction_counts(comment.reactions.all())}
+    return _action_response(request, level, text, redirect_url, **extra)
 
 
 @login_required
 @require_POST
+@ratelimit('reports')
 def report_comment(request, pk):
     """Report a comment; if reported, the comment goes back to pending for moderation."""
     comment = get_object_or_404(Comment, pk=pk)
@@ -333,15 +585,16 @@ def report_comment(request, pk):
         raise PermissionDenied('Staff members cannot report comments.')
 
     if comment.author_id == request.user.id:
-        messages.error(request, 'You cannot report your own comment.')
-        return redirect(redirect_url)
+        return _action_response(
+            request, 'error', 'You cannot report your own comment.',
+            redirect_url, status=403)
 
     reason = request.POST.get('reason')
     notes = (request.POST.get('notes') or '').strip()
 
     if reason not in CommentReport.Reason.values:
-        messages.error(request, 'Invalid report reason.')
-        return redirect(redirect_url)
+        return _action_response(
+            request, 'error', 'Invalid report reason.', redirect_url, status=400)
 
     report, created = CommentReport.objects.get_or_create(
         comment=comment,
@@ -353,12 +606,13 @@ def report_comment(request, pk):
         # Put the comment back into moderation
         comment.status = Comment.STATUS_PENDING
         comment.save(update_fields=['status', 'updated_at'])
-        messages.success(
-            request, 'Thanks for the report. The moderation team has been notified.')
-    else:
-        messages.info(request, 'You already reported this comment.')
-
-    return redirect(redirect_url)
+        return _action_response(
+            request, 'success',
+            'Thanks for the report. The moderation team has been notified.',
+            redirect_url, reported=True, hidden=True)
+    return _action_response(
+        request, 'info', 'You already reported this comment.',
+        redirect_url, reported=True, hidden=False)
 
 
 @login_required
@@ -371,9 +625,11 @@ def delete_comment(request, pk):
     if not (request.user.is_staff or request.user == comment.author):
         raise PermissionDenied('You cannot delete this comment.')
 
+    comment_id = comment.pk
     comment.delete()
-    messages.success(request, 'Comment deleted.')
-    return redirect(redirect_url)
+    return _action_response(
+        request, 'success', 'Comment deleted.', redirect_url,
+        deleted=True, id=comment_id)
 
 
 @login_required
@@ -0,0 +1,155 @@
+# core/conditional.py
+"""
+Conditional GET for public pages.
+
+``conditional_page(validators)`` wraps a view with a function that returns
+``(etag, last_modified)`` for a request, usually from one or two aggregate
+queries. The view itself runs only when the client's ``If-None-Match`` /
+``If-Modified-Since`` headers do not match. A match gets a ``304`` before
+any context is built.
+
+Only anonymous GET/HEAD requests without pending flash messages are
+validated. Pages for logged-in users carry per-user state (reactions,
+edit buttons, CSRF tokens), so they are always rendered and marked private.
+
+For anonymous pages the response gets ``Vary: Cookie`` and
+``Cache-Control: public, max-age=0, s-maxage=N``. Browsers always revalidate,
+and a CDN in front of the app may reuse a page for N seconds
+(``CONDITIONAL_SHARED_MAX_AGE``) for cookie-less clients. A response that
+sets a cookie or used the CSRF token is downgraded to private.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+
+def has_pending_messages(request):
+    """True when the messages framework has something queued for this request."""
+    storage = getattr(request, '_messages', None)
+    if storage is None:
+        return False
+    return bool(storage._queued_messages or storage._loaded_messages)
+
+
+async def aload_user(request):
+    """
+    Resolve ``request.user`` from async code. Later synchronous checks and
+    templates then read the loaded user instead of querying for it.
+    """
+    if hasattr(request, 'auser'):
+        request.user = await request.auser()
+    return request.user
+
+
+def is_anonymous_read(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not has_pending_messages(request)
+    )
+
+
+def make_etag(*parts):
+    """
+    Short stable tag from the values that determine a page.
+
+    ``CONDITIONAL_ETAG_VERSION`` (the release) is mixed in so a deploy that
+    changes templates does not keep serving 304s for the old markup.
+    """
+    parts = (getattr(settings, 'CONDITIONAL_ETAG_VERSION', ''), *parts)
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _cacheable(request, response):
+    return not response.cookies and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+
+
+def mark_public(request, response):
+    """Cache headers for an anonymous page a shared cache may reuse."""
+    patch_vary_headers(response, ('Cookie',))
+    if _cacheable(request, response):
+        patch_cache_control(
+            response, public=True, max_age=0,
+            s_maxage=getattr(settings, 'CONDITIONAL_SHARED_MAX_AGE', 60))
+    else:
+        patch_cache_control(response, private=True, max_age=0)
+
+
+def _mark_private(request, response):
+    if request.method in ('GET', 'HEAD') and request.user.is_authenticated:
+        patch_vary_headers(response, ('Cookie',))
+        patch_cache_control(response, private=True)
+    return response
+
+
+def _check(request, found):
+    """(etag, timestamp, 304 response or None) for what ``validators`` found."""
+    etag, last_modified = found
+    etag = quote_etag(etag) if etag else None
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    return etag, timestamp, response
+
+
+def _mark_validated(request, response, etag, timestamp):
+    if response.status_code in (200, 304):
+        if etag and not response.has_header('ETag'):
+            response.headers['ETag'] = etag
+        if timestamp and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(timestamp)
+        mark_public(request, response)
+    return response
+
+
+def conditional_page(validators):
+    """
+    Answer anonymous reads with 304 when ``validators(request, *args, **kwargs)``
+    matches the client's copy. ``validators`` may return None to skip the
+    check (e.g. for a page that is about to 404).
+
+    Async views are supported; ``validators`` stays synchronous and runs
+    through ``sync_to_async``.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async def wrapped(request, *args, **kwargs):
+                await aload_user(request)
+                if not is_anonymous_read(request):
+                    return _mark_private(request, await view(request, *args, **kwargs))
+
+                found = await sync_to_async(validators)(request, *args, **kwargs)
+                if found is None:
+                    return await view(request, *args, **kwargs)
+                etag, timestamp, response = _check(request, found)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _mark_validated(request, response, etag, timestamp)
+            return wraps(view)(wrapped)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not is_anonymous_read(request):
+                return _mark_private(request, view(request, *args, **kwargs))
+
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+            etag, timestamp, response = _check(request, found)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _mark_validated(request, response, etag, timestamp)
+        return wrapped
+    return decorator
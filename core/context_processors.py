@@ -0,0 +1,16 @@
+"""
+Template context shared by every page.
+"""
+
+from django.conf import settings
+
+
+def music_player(request):
+    """
+    Site-wide switch for the background music player in base.html.
+
+    A view hides the player on its own page by putting
+    ``music_player_enabled=False`` in its context, which takes precedence
+    over this value.
+    """
+    return {"music_player_enabled": getattr(settings, "MUSIC_PLAYER_ENABLED", True)}
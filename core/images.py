@@ -0,0 +1,37 @@
+# core/images.py
+"""
+Pillow helpers shared by every app that resizes images.
+
+Post image variants (blog/images.py), avatar thumbnails (accounts/models.py)
+and the static image widths built at collectstatic (core/storage.py) all
+open uploads and encode WebP the same way.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+WEBP_QUALITY = 80
+
+
+def render_webp(source, size):
+    """Crop/resize a Pillow image to ``size`` and return WebP bytes."""
+    fitted = ImageOps.fit(source, size, method=Image.Resampling.LANCZOS)
+    if fitted.mode not in ('RGB', 'RGBA'):
+        fitted = fitted.convert('RGBA' if 'A' in fitted.getbands() else 'RGB')
+    buffer = BytesIO()
+    fitted.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def open_image(field_file):
+    """Open an uploaded file with Pillow, honouring EXIF orientation."""
+    field_file.open('rb')
+    try:
+        image = Image.open(field_file)
+        image.load()
+    finally:
+        field_file.close()
+    return ImageOps.exif_transpose(image)
@@ -0,0 +1,84 @@
+# core/jinja2.py
+"""
+Optional Jinja2 rendering path for the busiest public pages.
+
+With ``JINJA2_TEMPLATES_ENABLED=True`` (and Jinja2 installed) settings put
+a Jinja2 engine in front of DjangoTemplates. Template lookup tries engines
+in order, so the pages ported to Jinja win. They live in ``jinja2/`` at the
+project root (base and shared partials) and in each app's ``jinja2/``
+directory:
+
+- ``blog/index.html`` (latest, hot, trending and following lists);
+- ``blog/post_detail.html``;
+- ``pages/home.html``.
+
+Every other template is not found by Jinja and falls through to the Django
+engine unchanged.
+
+The environment mirrors what the Django templates use: ``static``, ``url``
+and the ``static_extras`` / ``reaction_tags`` helpers as globals, and the
+Django filters whose output differs from Jinja's built-ins (``date``,
+``linebreaks``, ``striptags``, ``truncatechars``) plus ``cloudinary_variant``
+and ``avatar_url``. ``benchmark_jinja`` compares both engines.
+"""
+
+from __future__ import annotations
+
+from django.template import defaultfilters
+from django.template.backends.jinja2 import Jinja2, Template as Jinja2Template
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, pass_context
+
+from accounts.templatetags.avatar_extras import avatar_url
+from blog.images import apply_cloudinary_transformation
+from blog.templatetags.reaction_tags import reaction_widget
+from pages.templatetags.static_extras import static_audio, static_srcset
+
+from .timing import TimedRenderMixin
+
+
+def url(name, *args, **kwargs):
+    """``{{ url('blog:detail', post.pk) }}``, the ``{% url %}`` tag as a function."""
+    return reverse(name, args=args or None, kwargs=kwargs or None)
+
+
+def date(value, arg=None):
+    # The Django filter gets local time from the engine; do the same here
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'static_srcset': static_srcset,
+        'static_audio': static_audio,
+        'reaction_widget': pass_context(reaction_widget),
+    })
+    env.filters.update({
+        'date': date,
+        'linebreaks': defaultfilters.linebreaks_filter,
+        'striptags': defaultfilters.striptags,
+        'truncatechars': defaultfilters.truncatechars,
+        'cloudinary_variant': apply_cloudinary_transformation,
+        'avatar_url': avatar_url,
+    })
+    return env
+
+
+class TimedJinja2Template(TimedRenderMixin, Jinja2Template):
+    pass
+
+
+class TimedJinja2(Jinja2):
+    """Jinja2 backend that records render time like TimedDjangoTemplates."""
+
+    def from_string(self, template_code):
+        return TimedJinja2Template(self.env.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedJinja2Template(template.template, self)
@@ -0,0 +1,22 @@
+# core/mail.py
+"""
+Email backend for load tests: a mail provider that takes its time.
+
+``SlowEmailBackend`` waits ``SLOW_EMAIL_DELAY`` seconds per message and
+then discards it, like a congested SMTP relay would hold the sender.
+``scripts/loadtest.py --slow-email`` starts the servers with it to show
+what inline versus background delivery (``BLOG_EMAIL_BACKGROUND``) does to
+the pages served alongside.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+
+
+class SlowEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        messages = list(email_messages)
+        time.sleep(getattr(settings, 'SLOW_EMAIL_DELAY', 1.0) * len(messages))
+        return len(messages)
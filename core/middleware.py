@@ -0,0 +1,63 @@
+# core/middleware.py
+"""
+WhiteNoise for both server modes.
+
+WhiteNoise's middleware is synchronous only. Under ASGI, Django would run it
+in the single sync thread and call everything below it, async views
+included, through ``async_to_sync``. Every request would then queue behind
+that thread. This subclass keeps the stock behaviour under WSGI. Under ASGI
+it looks up the file, which is a dictionary read, without leaving the event
+loop. It streams hits in chunks read off-loop and awaits the rest of the
+stack for everything else.
+"""
+
+from __future__ import annotations
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseFileResponse
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+CHUNK_SIZE = 64 * 1024
+
+
+async def _read_chunks(file):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while chunk := await read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        file.close()
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Development: finders and stat calls touch the disk
+            static_file = await sync_to_async(
+                self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = static_file.get_response(request.method, request.META)
+        http_response = WhiteNoiseFileResponse(
+            _read_chunks(response.file) if response.file else (),
+            status=int(response.status))
+        del http_response['content-type']
+        for key, value in response.headers:
+            http_response[key] = value
+        return http_response
@@ -0,0 +1,182 @@
+# core/pagecache.py
+"""
+Full-page cache for anonymous readers.
+
+``cache_anonymous_page(tags)`` stores the rendered response of anonymous
+GET/HEAD requests in the ``PAGE_CACHE_ALIAS`` cache for
+``PAGE_CACHE_TIMEOUT`` seconds. A hit skips the view and template entirely.
+It still answers ``If-None-Match`` / ``If-Modified-Since`` with 304, using
+the validators stored with the page (see core/conditional.py).
+
+The cache is skipped for:
+
+- logged-in users and requests with pending flash messages;
+- responses that are not 200, set a cookie, used the CSRF token or are
+  marked private.
+
+Purging works through generations. ``tags(request, *args, **kwargs)``
+names what a page shows, e.g. ``["post:<slug>"]``. Each tag has a counter
+in the cache, and the current counters are part of the page key.
+``purge(*tags)`` increments the counters, so every page showing those tags
+misses on its next request. Old entries simply expire. Without ``tags``
+the page is tagged with its own path.
+
+Counters never expire. If one is evicted anyway, the page falls back to
+generation 0 and may serve a stale copy for at most ``PAGE_CACHE_TIMEOUT``.
+
+The backend is whatever ``CACHES[PAGE_CACHE_ALIAS]`` configures: file-based
+(single host only), a Redis-compatible server, or local memory (see
+``PAGE_CACHE_BACKEND`` in settings). The counters have to be seen by every
+process that serves or purges pages, so settings refuse local memory with
+more than one worker and files with more than one host.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from .conditional import aload_user, is_anonymous_read
+
+GENERATION_PREFIX = 'page:gen:'
+
+
+def page_cache_enabled():
+    return getattr(settings, 'PAGE_CACHE_ENABLED', False)
+
+
+def get_page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def _generations(store, tags):
+    keys = [GENERATION_PREFIX + tag for tag in tags]
+    found = store.get_many(keys)
+    return [found.get(key, 0) for key in keys]
+
+
+def _key(request, generations):
+    generations = ','.join(map(str, generations))
+    url = f'{request.get_host()}{request.get_full_path()}'
+    digest = hashlib.sha1(f'{url}|{generations}'.encode()).hexdigest()
+    return f'page:{digest}'
+
+
+def page_key(request, tags, store=None):
+    store = store or get_page_cache()
+    return _key(request, _generations(store, tags))
+
+
+async def apage_key(request, tags, store=None):
+    store = store or get_page_cache()
+    keys = [GENERATION_PREFIX + tag for tag in tags]
+    found = await store.aget_many(keys)
+    return _key(request, [found.get(key, 0) for key in keys])
+
+
+def purge(*tags):
+    """Invalidate every cached page carrying any of ``tags``."""
+    if not tags:
+        return
+    store = get_page_cache()
+    for tag in tags:
+        key = GENERATION_PREFIX + tag
+        store.add(key, 0, None)
+        try:
+            store.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(): a fresh counter is as good
+            store.set(key, 1, None)
+
+
+def _storable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def _revalidate(request, response):
+    """304 for a cached page when the client already has this version."""
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response,
+    )
+
+
+def _hit(request, cached):
+    cached.headers['X-Page-Cache'] = 'HIT'
+    return _revalidate(request, cached)
+
+
+def _keep(request, response, key, store):
+    """Store ``response`` under ``key`` if it may be shared; True when kept."""
+    if not _storable(request, response):
+        return False
+    patch_vary_headers(response, ('Cookie',))
+    timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+    if getattr(response, 'is_rendered', True):
+        store.set(key, response, timeout)
+    else:
+        # TemplateResponse (class-based views): store once rendered
+        response.add_post_render_callback(
+            lambda rendered: store.set(key, rendered, timeout))
+    response.headers['X-Page-Cache'] = 'MISS'
+    return True
+
+
+def cache_anonymous_page(tags=None):
+    """
+    Serve anonymous reads of the wrapped view from the page cache.
+
+    Async views are supported. Cache reads and writes stay off the event
+    loop: lookups use the cache's async API and the store goes through
+    ``sync_to_async``.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async def wrapped(request, *args, **kwargs):
+                await aload_user(request)
+                if not page_cache_enabled() or not is_anonymous_read(request):
+                    return await view(request, *args, **kwargs)
+
+                store = get_page_cache()
+                page_tags = tags(request, *args, **kwargs) if tags else [request.path]
+                key = await apage_key(request, page_tags, store)
+                cached = await store.aget(key)
+                if cached is not None:
+                    return _hit(request, cached)
+
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(_keep)(request, response, key, store)
+                return response
+            return wraps(view)(wrapped)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not page_cache_enabled() or not is_anonymous_read(request):
+                return view(request, *args, **kwargs)
+
+            store = get_page_cache()
+            page_tags = tags(request, *args, **kwargs) if tags else [request.path]
+            key = page_key(request, page_tags, store)
+            cached = store.get(key)
+            if cached is not None:
+                return _hit(request, cached)
+
+            response = view(request, *args, **kwargs)
+            _keep(request, response, key, store)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,272 @@
+# core/ratelimit.py
+"""
+Token-bucket rate limiting for write endpoints.
+
+Each scope in ``RATELIMITS`` (e.g. ``"reactions"``) has a rate such as
+``"30/m"`` and an optional ``burst``. Every client gets a bucket holding up
+to ``burst`` tokens that refills at the given rate; a request spends one
+token or is answered with 429 and a ``Retry-After`` header. Clients are
+keyed by user id when logged in and by IP address otherwise.
+
+Buckets live in the ``RATELIMIT_CACHE_ALIAS`` cache (``RATELIMIT_STORE =
+"cache"``) or in a per-process dictionary (``"local"``). Limits only hold
+across workers when that alias is shared (Redis, Memcached, database). The
+default local-memory cache, like the local store, gives each worker its own
+buckets, so a client may get up to ``WEB_CONCURRENCY`` times the configured
+rate.
+
+The cache store updates a bucket under a short lock taken with ``add``, so
+concurrent requests cannot both spend the last token. A request that cannot
+get the lock is treated as throttled.
+
+Throttled requests are counted per client so the noisiest ones can be
+listed with ``python manage.py throttled_clients``. In the cache each client
+has its own counter, bumped with ``incr`` and forgotten after
+``RATELIMIT_STATS_TTL`` seconds. A ring of ``RATELIMIT_STATS_MAX_CLIENTS``
+slots remembers which counters exist.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+
+from .conditional import aload_user
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+STATS_PREFIX = 'ratelimit:throttled:'
+
+# Attempts (and the pause between them) at a bucket's lock before giving up
+_LOCK_ATTEMPTS = 5
+_LOCK_PAUSE = 0.002
+
+
+def parse_rate(rate):
+    """``"30/m"`` -> (30, 60). Periods may carry a count, e.g. ``"100/5m"``."""
+    count, _, period = rate.partition('/')
+    multiplier = int(period[:-1] or 1)
+    return int(count), multiplier * _PERIODS[period[-1]]
+
+
+class Bucket:
+    """Token-bucket arithmetic, shared by both stores."""
+
+    def __init__(self, rate, burst=None):
+        count, seconds = parse_rate(rate)
+        self.capacity = burst or count
+        self.refill = count / seconds  # tokens per second
+
+    def spend(self, state, now):
+        """Return (new state, retry_after); retry_after is 0 when allowed."""
+        tokens, stamp = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - stamp) * self.refill)
+        if tokens >= 1:
+            return (tokens - 1, now), 0
+        return (tokens, now), (1 - tokens) / self.refill
+
+    @property
+    def ttl(self):
+        """Seconds until an idle bucket is full again and can be forgotten."""
+        return math.ceil(self.capacity / self.refill) + 1
+
+
+class CacheStore:
+    """Buckets and throttle counts kept in a Django cache alias."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def take(self, key, bucket, now):
+        lock = f"{key}:lock"
+        for attempt in range(_LOCK_ATTEMPTS):
+            if self.cache.add(lock, 1, 1):
+                break
+            time.sleep(_LOCK_PAUSE * 2 ** attempt)
+        else:
+            # Another request from this client holds the bucket right now
+            return 1 / bucket.refill
+        try:
+            state, retry_after = bucket.spend(self.cache.get(key), now)
+            self.cache.set(key, state, bucket.ttl)
+        finally:
+            self.cache.delete(lock)
+        return retry_after
+
+    def _stats_ttl(self):
+        return getattr(settings, 'RATELIMIT_STATS_TTL', 86400)
+
+    def _slots(self):
+        size = getattr(settings, 'RATELIMIT_STATS_MAX_CLIENTS', 1000)
+        return [f"{STATS_PREFIX}slot:{n}" for n in range(size)]
+
+    def record(self, scope, ident):
+        label = f"{scope}|{ident}"
+        counter = STATS_PREFIX + label
+        if self.cache.add(counter, 0, self._stats_ttl()):
+            # First throttle in this window: remember the label in the ring
+            self.cache.add(STATS_PREFIX + 'seq', 0, None)
+            slots = self._slots()
+            slot = slots[self.cache.incr(STATS_PREFIX + 'seq') % len(slots)]
+            self.cache.set(slot, label, self._stats_ttl())
+        try:
+            self.cache.incr(counter)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(counter, 1, self._stats_ttl())
+
+    def _labels(self):
+        return set(self.cache.get_many(self._slots()).values())
+
+    def top(self, limit=10):
+        labels = self._labels()
+        counts = self.cache.get_many([STATS_PREFIX + label for label in labels])
+        stats = Counter({key[len(STATS_PREFIX):]: count for key, count in counts.items()})
+        return [(*label.split('|', 1), count) for label, count in stats.most_common(limit)]
+
+    def reset_stats(self):
+        labels = self._labels()
+        self.cache.delete_many(
+            [STATS_PREFIX + label for label in labels] + self._slots())
+
+
+class LocalMemoryStore:
+    """Per-process stand-in for when no shared cache is configured."""
+
+    max_buckets = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+        self.stats = Counter()
+
+    def take(self, key, bucket, now):
+        with self.lock:
+            state, retry_after = bucket.spend(self.buckets.pop(key, None), now)
+            self.buckets[key] = state
+            while len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        return retry_after
+
+    def record(self, scope, ident):
+        with self.lock:
+            self.stats[f"{scope}|{ident}"] += 1
+
+    def top(self, limit=10):
+        with self.lock:
+            common = self.stats.most_common(limit)
+        return [(*label.split('|', 1), count) for label, count in common]
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats.clear()
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if getattr(settings, 'RATELIMIT_STORE', 'cache') == 'local':
+            _store = LocalMemoryStore()
+        else:
+            _store = CacheStore(getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default'))
+    return _store
+
+
+@receiver(setting_changed, dispatch_uid='core_ratelimit_setting_changed')
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting.startswith('RATELIMIT'):
+        _store = None
+
+
+def client_ident(request):
+    """``user:<id>`` for logged-in users, ``ip:<address>`` otherwise."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    address = request.META.get('REMOTE_ADDR', '')
+    if getattr(settings, 'RATELIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            address = forwarded.split(',')[0].strip()
+    return f"ip:{address}"
+
+
+def check_rate(request, scope):
+    """Spend one token for this client; return seconds to wait, 0 if allowed."""
+    if not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return 0
+    config = getattr(settings, 'RATELIMITS', {}).get(scope)
+    if not config:
+        return 0
+    bucket = Bucket(config['rate'], config.get('burst'))
+    ident = client_ident(request)
+    store = get_store()
+    retry_after = store.take(f"ratelimit:{scope}:{ident}", bucket, time.time())
+    if retry_after:
+        store.record(scope, ident)
+        logger.info("Rate limit hit for %s on %s", ident, scope)
+    return retry_after
+
+
+THROTTLED_MESSAGE = 'Too many requests. Take a breather and try again shortly.'
+
+
+def too_many_requests(retry_after, as_json=False):
+    if as_json:
+        response = JsonResponse(
+            {'ok': False, 'message': THROTTLED_MESSAGE}, status=429)
+    else:
+        response = HttpResponse(THROTTLED_MESSAGE, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _throttled(request, retry_after):
+    as_json = 'application/json' in request.headers.get('Accept', '')
+    return too_many_requests(retry_after, as_json)
+
+
+def ratelimit(scope, methods=('POST',)):
+    """
+    View decorator applying the ``scope`` limit to the given HTTP methods.
+
+    For class-based views wrap the handler with ``method_decorator``. Async
+    views are supported; the bucket is checked through ``sync_to_async``.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async def _wrapped(request, *args, **kwargs):
+                if request.method in methods:
+                    await aload_user(request)
+                    retry_after = await sync_to_async(check_rate)(request, scope)
+                    if retry_after:
+                        return _throttled(request, retry_after)
+                return await view_func(request, *args, **kwargs)
+            return wraps(view_func)(_wrapped)
+
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check_rate(request, scope)
+                if retry_after:
+                    return _throttled(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return _wrapped
+    return decorator
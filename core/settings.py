@@ -8,16 +8,24 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
+import sys
 import warnings
 
 import dj_database_url  # For Postgres when DATABASE_URL is set
+from django.core.exceptions import ImproperlyConfigured
 
 try:  # Optional dependency for deployments
     import cloudinary
 except ImportError:  # Fallback if Cloudinary package is missing
     cloudinary = None
 
+try:  # Optional faster engine for the busiest public templates
+    import jinja2
+except ImportError:
+    jinja2 = None
+
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -62,6 +70,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.sitemaps",
 
     # Third-party apps
     "allauth",
@@ -86,8 +95,11 @@ SITE_ID = int(os.environ.get("SITE_ID", "1"))
 
 
 MIDDLEWARE = [
+    # First, so its total covers every other middleware
+    "core.timing.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise that also runs natively under ASGI (core/middleware.py)
+    "core.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -100,37 +112,137 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "core.urls"
 
+# Compiled templates stay in memory (cached loader); in development the
+# autoreloader clears them whenever a template file changes.
+# TEMPLATE_CACHE_ENABLED=False recompiles on every render, e.g. to compare
+# with `python manage.py benchmark_templates`.
+TEMPLATE_CACHE_ENABLED = os.environ.get("TEMPLATE_CACHE_ENABLED", "True") == "True"
+_TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates that records render time per request (core/timing.py)
+        "BACKEND": "core.timing.TimedDjangoTemplates",
+        "NAME": "django",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": (
+                [("django.template.loaders.cached.Loader", _TEMPLATE_LOADERS)]
+                if TEMPLATE_CACHE_ENABLED
+                else _TEMPLATE_LOADERS
+            ),
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "core.context_processors.music_player",
             ],
         },
     },
 ]
 
+# Opt-in Jinja2 engine for the blog index, post detail and home pages
+# (see core/jinja2.py). Listed first, so its ports win; every other template
+# falls through to the Django engine above.
+JINJA2_TEMPLATES_ENABLED = (
+    os.environ.get("JINJA2_TEMPLATES_ENABLED", "False") == "True"
+)
+JINJA2_TEMPLATES = {
+    "BACKEND": "core.jinja2.TimedJinja2",
+    "NAME": "jinja2",
+    "DIRS": [BASE_DIR / "jinja2"],
+    "APP_DIRS": True,
+    "OPTIONS": {
+        "environment": "core.jinja2.environment",
+        "context_processors": [
+            "django.contrib.auth.context_processors.auth",
+            "django.contrib.messages.context_processors.messages",
+            "core.context_processors.music_player",
+        ],
+    },
+}
+if JINJA2_TEMPLATES_ENABLED:
+    if jinja2 is None:
+        warnings.warn(
+            "JINJA2_TEMPLATES_ENABLED is set but Jinja2 is not installed. "
+            "Rendering every page with Django templates.",
+            RuntimeWarning,
+        )
+    else:
+        TEMPLATES.insert(0, JINJA2_TEMPLATES)
+
 WSGI_APPLICATION = "core.wsgi.application"
+# GUNICORN_ASGI=True serves core.asgi with uvicorn workers (gunicorn.conf.py)
+ASGI_APPLICATION = "core.asgi.application"
+ASGI_ENABLED = os.environ.get("GUNICORN_ASGI", "False") == "True"
 
 
 # Database
-# Default is SQLite (local dev)
+# Default is SQLite (local dev and small deployments), tuned for a server
+# with several workers:
+# - WAL lets readers continue while one request writes;
+# - synchronous=NORMAL skips the fsync per commit (safe with WAL: a power
+#   cut may lose the last commits, never corrupt the file);
+# - IMMEDIATE transactions take the write lock at BEGIN, so a concurrent
+#   writer waits up to SQLITE_TIMEOUT seconds instead of failing with
+#   "database is locked" halfway through a transaction.
+SQLITE_TIMEOUT = int(os.environ.get("SQLITE_TIMEOUT", "20"))
 DATABASES = {
-    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db.sqlite3"}
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+            "timeout": SQLITE_TIMEOUT,
+            "transaction_mode": "IMMEDIATE",
+        },
+    }
 }
 
-# If DATABASE_URL is set, override with Postgres
+# If DATABASE_URL is set, override with Postgres.
+# Persistent connections (DB_CONN_MAX_AGE seconds, checked before reuse)
+# by default. DB_POOL=True uses Django's connection pool instead, which
+# needs psycopg 3 and psycopg_pool (pip install "psycopg[binary,pool]").
+# Each worker thread holds up to one connection, or each process holds
+# DB_POOL_MAX_SIZE; keep workers x that below the server's limit.
+# Under ASGI Django advises against persistent connections, so the
+# default drops to 0 there; use DB_POOL for reuse.
+DB_CONN_MAX_AGE = int(
+    os.environ.get("DB_CONN_MAX_AGE", "0" if ASGI_ENABLED else "600")
+)
+DB_CONN_HEALTH_CHECKS = os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True"
+DB_POOL = os.environ.get("DB_POOL", "False") == "True"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "4"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
 db_url = os.environ.get("DATABASE_URL")
 if db_url:
     DATABASES["default"] = dj_database_url.parse(
-        db_url, conn_max_age=600, ssl_require=True
+        db_url,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        ssl_require=True,
     )
+    if DB_POOL:
+        if importlib.util.find_spec("psycopg_pool") is None:
+            warnings.warn(
+                "DB_POOL is set but psycopg 3 with psycopg_pool is not installed. "
+                "Using persistent connections instead.",
+                RuntimeWarning,
+            )
+        else:
+            # The pool owns connection reuse; Django requires CONN_MAX_AGE=0 with it
+            DATABASES["default"]["CONN_MAX_AGE"] = 0
+            DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+                "min_size": DB_POOL_MIN_SIZE,
+                "max_size": DB_POOL_MAX_SIZE,
+                "timeout": DB_POOL_TIMEOUT,
+            }
 
 
 # Password validation
@@ -163,8 +275,33 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 # Static root for collectstatic (Heroku)
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-# Whitenoise storage for serving static files in production
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Storage backends. Static files go through core.storage: minified,
+# fingerprinted and precompressed by WhiteNoise during collectstatic
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "core.storage.GameAbyssStaticFilesStorage",
+    },
+}
+# Serve unhashed static names when collectstatic has not run. Only while
+# developing or testing: in production a missing manifest must fail loudly
+# instead of serving assets without cache-busting under long cache headers
+TESTING = sys.argv[1:2] == ["test"]
+STATIC_MANIFEST_FALLBACK = (
+    os.environ.get("STATIC_MANIFEST_FALLBACK", str(DEBUG or TESTING)) == "True"
+)
+
+# Responsive widths rendered for static images at collectstatic time
+STATIC_IMAGE_VARIANTS = {
+    "images/game-abyss-hero.webp": (480, 960, 1600),
+}
+
+# Low-bitrate re-encodes of static audio (needs ffmpeg on the build host)
+STATIC_AUDIO_VARIANTS = {
+    "audio/audio-theme.mp3": "64k",
+}
 
 # Media files (user uploads)
 MEDIA_URL = "/media/"
@@ -193,7 +330,9 @@ PRIMARY_SUPERADMIN_EMAIL = os.environ.get(
 )
 
 if DEBUG:
-    EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+    EMAIL_BACKEND = os.environ.get(
+        "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+    )
 else:
     EMAIL_BACKEND = os.environ.get(
         "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
@@ -206,6 +345,14 @@ else:
 
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# Blog notifications go out from a background thread pool instead of the
+# request (blog/emails.py). Inline in DEBUG so the console shows them in order.
+BLOG_EMAIL_BACKGROUND = (
+    os.environ.get("BLOG_EMAIL_BACKGROUND", str(not DEBUG)) == "True"
+)
+# Seconds per message for core.mail.SlowEmailBackend (load tests only)
+SLOW_EMAIL_DELAY = float(os.environ.get("SLOW_EMAIL_DELAY", "1"))
+
 
 # Comment moderation defaults
 _banned_words_raw = os.environ.get(
@@ -214,8 +361,170 @@ _banned_words_raw = os.environ.get(
 BLOG_COMMENT_BANNED_WORDS = [
     word.strip().lower() for word in _banned_words_raw.split(",") if word.strip()
 ]
+# Optional file with one banned term per line (reloaded when it changes)
+BLOG_COMMENT_BANNED_WORDS_FILE = os.environ.get("BLOG_COMMENT_BANNED_WORDS_FILE", "")
 BLOG_COMMENT_MAX_LINKS = int(os.environ.get("BLOG_COMMENT_MAX_LINKS", "2"))
 
+# Automatic pre-moderation (see blog/moderation.py): positive scores look spammy
+BLOG_MODERATION_SCORERS = [
+    "blog.moderation.banned_words_scorer",
+    "blog.moderation.link_density_scorer",
+    "blog.moderation.author_history_scorer",
+    "blog.moderation.duplicate_scorer",
+]
+BLOG_MODERATION_APPROVE_AT = int(os.environ.get("BLOG_MODERATION_APPROVE_AT", "-3"))
+BLOG_MODERATION_REJECT_AT = int(os.environ.get("BLOG_MODERATION_REJECT_AT", "10"))
+BLOG_MODERATION_MAX_LINK_DENSITY = float(
+    os.environ.get("BLOG_MODERATION_MAX_LINK_DENSITY", "3")
+)
+
+# Hot ranking (see blog/ranking.py)
+BLOG_HOT_DECAY_SECONDS = 45000  # age worth a tenfold engagement gap (12.5h)
+BLOG_TRENDING_WINDOW_DAYS = 7
+BLOG_TRENDING_LIMIT = 24
+
+# Precomputed "Read next" lists (see blog/related.py). Approvals update them
+# from a background thread instead of the request; inline in DEBUG
+BLOG_RELATED_POSTS_LIMIT = 4
+BLOG_RELATED_BACKGROUND = (
+    os.environ.get("BLOG_RELATED_BACKGROUND", str(not DEBUG)) == "True"
+)
+
+# Followed-authors feed (see blog/feed.py): authors with more followers than
+# this are merged in at read time instead of fanned out on approval
+BLOG_FEED_FANOUT_LIMIT = int(os.environ.get("BLOG_FEED_FANOUT_LIMIT", "5000"))
+BLOG_FEED_PAGE_SIZE = 20
+
+# RSS/Atom/JSON feeds (see blog/syndication.py)
+BLOG_SYNDICATION_ITEMS = 20
+BLOG_SYNDICATION_MAX_AGE = 300  # seconds shared caches may reuse a feed
+
+# Write-behind buffer for post reactions (see blog/reaction_buffer.py). The
+# "cache" backend needs an alias shared by every worker and by the
+# flush_reaction_buffer process, e.g. "pages" with PAGE_CACHE_BACKEND=redis;
+# local-memory caches are refused. "local" flushes inside each web process
+# and is refused for more than one worker. Both are checked below CACHES.
+BLOG_REACTION_BUFFER_ENABLED = (
+    os.environ.get("BLOG_REACTION_BUFFER_ENABLED", "False") == "True"
+)
+BLOG_REACTION_BUFFER_BACKEND = os.environ.get("BLOG_REACTION_BUFFER_BACKEND", "cache")
+BLOG_REACTION_BUFFER_CACHE = os.environ.get("BLOG_REACTION_BUFFER_CACHE", "default")
+BLOG_REACTION_BUFFER_SCOPE = os.environ.get("BLOG_REACTION_BUFFER_SCOPE", "featured")
+BLOG_REACTION_BUFFER_INTERVAL = int(os.environ.get("BLOG_REACTION_BUFFER_INTERVAL", "5"))
+
+# Caches. "pages" holds the anonymous full-page cache (core/pagecache.py):
+# PAGE_CACHE_BACKEND picks files shared by the workers on one host, any
+# Redis-compatible server (needs the redis package; the default when
+# PAGE_CACHE_URL or REDIS_URL is set), or local memory. Purges only reach
+# the processes that see the same store, so local memory is refused for more
+# than one worker (WEB_CONCURRENCY, see gunicorn.conf.py), and files for more
+# than one host. Heroku gives every dyno (web, release, "heroku run") its own
+# filesystem; elsewhere set WEB_HOSTS to the number of servers.
+_MULTI_HOST = "DYNO" in os.environ or int(os.environ.get("WEB_HOSTS", "1")) > 1
+_SHARED_CACHE_URL = os.environ.get("PAGE_CACHE_URL") or os.environ.get("REDIS_URL")
+PAGE_CACHE_BACKEND = os.environ.get(
+    "PAGE_CACHE_BACKEND", "redis" if _SHARED_CACHE_URL else "file"
+)
+_PAGE_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pages",
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("PAGE_CACHE_DIR", str(BASE_DIR / ".pagecache")),
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": _SHARED_CACHE_URL or "redis://127.0.0.1:6379/1",
+    },
+}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "pages": _PAGE_CACHE_BACKENDS[PAGE_CACHE_BACKEND],
+}
+PAGE_CACHE_ALIAS = "pages"
+# Off by default while developing (DEBUG) so template edits show up at once,
+# and on several hosts until a shared (redis) backend is configured
+PAGE_CACHE_ENABLED = os.environ.get(
+    "PAGE_CACHE_ENABLED",
+    str(not DEBUG and (PAGE_CACHE_BACKEND == "redis" or not _MULTI_HOST)),
+) == "True"
+_WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+if PAGE_CACHE_ENABLED and PAGE_CACHE_BACKEND == "locmem" and _WEB_CONCURRENCY > 1:
+    raise ImproperlyConfigured(
+        "PAGE_CACHE_BACKEND=locmem cannot be purged across WEB_CONCURRENCY workers; "
+        "use the file or redis backend."
+    )
+if PAGE_CACHE_ENABLED and PAGE_CACHE_BACKEND in ("locmem", "file") and _MULTI_HOST:
+    raise ImproperlyConfigured(
+        f"PAGE_CACHE_BACKEND={PAGE_CACHE_BACKEND} is local to one host, so purges "
+        "from other dynos or servers never reach it; use the redis backend."
+    )
+# Refuse buffer setups that would lose toggles, at startup rather than on
+# the first reaction: each process would keep and flush its own buffer
+if BLOG_REACTION_BUFFER_ENABLED:
+    if BLOG_REACTION_BUFFER_BACKEND == "local":
+        if _WEB_CONCURRENCY > 1:
+            raise ImproperlyConfigured(
+                "BLOG_REACTION_BUFFER_BACKEND=local keeps a buffer per process; "
+                "with WEB_CONCURRENCY workers use the cache backend."
+            )
+    elif CACHES.get(BLOG_REACTION_BUFFER_CACHE, {}).get("BACKEND") in (
+        None,
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.dummy.DummyCache",
+        *(["django.core.cache.backends.filebased.FileBasedCache"] if _MULTI_HOST else []),
+    ):
+        raise ImproperlyConfigured(
+            f"BLOG_REACTION_BUFFER_CACHE={BLOG_REACTION_BUFFER_CACHE!r} is not a cache "
+            "shared by the workers and the flusher; point it at one (e.g. \"pages\" "
+            "with PAGE_CACHE_BACKEND=redis)."
+        )
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", "300"))
+
+# Pre-built XML sitemaps (see core/sitemaps.py)
+SITEMAP_ROOT = Path(os.environ.get("SITEMAP_ROOT", str(BASE_DIR / "sitemaps")))
+SITEMAP_PROTOCOL = os.environ.get("SITEMAP_PROTOCOL", "https")
+
+# Background music player. Views can hide it on one page by passing
+# music_player_enabled=False in their context (see core/context_processors.py)
+MUSIC_PLAYER_ENABLED = os.environ.get("MUSIC_PLAYER_ENABLED", "True") == "True"
+
+# Server-Timing header with template render time per request (core/timing.py).
+# Off in production unless asked for: the header exposes render timings
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", str(DEBUG)) == "True"
+
+# Conditional GET for anonymous pages (see core/conditional.py)
+CONDITIONAL_SHARED_MAX_AGE = int(os.environ.get("CONDITIONAL_SHARED_MAX_AGE", "60"))
+CONDITIONAL_ETAG_VERSION = os.environ.get("RELEASE_VERSION", "")
+
+# Rate limiting for write endpoints (token buckets, see core/ratelimit.py)
+RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "True") == "True"
+RATELIMIT_STORE = os.environ.get("RATELIMIT_STORE", "cache")  # or "local"
+# The default cache is local memory, one per worker: every worker then
+# allows the full rate. Point this at a shared cache to enforce it overall.
+RATELIMIT_CACHE_ALIAS = os.environ.get("RATELIMIT_CACHE_ALIAS", "default")
+RATELIMIT_STATS_TTL = 86400  # seconds a client's throttle count is kept
+RATELIMIT_STATS_MAX_CLIENTS = 1000  # clients listed by throttled_clients
+RATELIMIT_TRUST_X_FORWARDED_FOR = (
+    os.environ.get("RATELIMIT_TRUST_X_FORWARDED_FOR", "False") == "True"
+)
+RATELIMITS = {
+    "reactions": {"rate": "60/m", "burst": 20},
+    "reports": {"rate": "10/m"},
+    "comments": {"rate": "10/m", "burst": 5},
+    "posts": {"rate": "5/h", "burst": 5},
+    "contact": {"rate": "5/h", "burst": 3},
+    "follows": {"rate": "30/m", "burst": 10},
+}
+
+# Near-duplicate detection (MinHash over word shingles, see blog/fingerprints.py)
+BLOG_DUPLICATE_THRESHOLD = 0.5  # estimated Jaccard similarity
+BLOG_DUPLICATE_MIN_WORDS = 5
+BLOG_DUPLICATE_WINDOW_DAYS = 30
+
 
 # Ensure allauth builds absolute URLs with HTTPS in production
 ACCOUNT_DEFAULT_HTTP_PROTOCOL = "https" if not DEBUG else "http"
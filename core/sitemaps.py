@@ -0,0 +1,213 @@
+# core/sitemaps.py
+"""
+XML sitemaps written to files instead of built per crawl.
+
+Three sections use ``django.contrib.sitemaps``:
+
+- ``posts``: approved posts;
+- ``profiles``: authors with at least one approved post;
+- ``pages``: the static pages and the blog index.
+
+``lastmod`` comes from ``updated_at``. Posts and profiles are sharded by
+primary key: shard ``n`` holds ids ``n * SHARD_SIZE`` to
+``(n + 1) * SHARD_SIZE - 1``, so no file exceeds the 50,000-URL limit.
+An approved post always stays in the same shard, so approving it rewrites
+one post shard, its author's profile shard and the index, never the whole
+set. ``python manage.py build_sitemaps`` writes everything from scratch.
+
+Files go to ``SITEMAP_ROOT`` and are written to a temporary name, then
+renamed, so crawlers never read half a file. ``serve_sitemap`` returns them;
+the first request for the index builds the whole set when none exists yet.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps.views import SitemapIndexItem
+from django.contrib.sites.models import Site
+from django.db.models import Max, Q
+from django.http import FileResponse, Http404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+
+from blog.models import BlogPost
+
+SHARD_SIZE = 50000
+
+User = get_user_model()
+
+
+class ShardedSitemap(Sitemap):
+    """A sitemap over one primary-key range."""
+
+    limit = SHARD_SIZE
+
+    def __init__(self, shard=0):
+        self.shard = shard
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def items(self):
+        low = self.shard * SHARD_SIZE
+        return self.queryset().filter(pk__gte=low, pk__lt=low + SHARD_SIZE).order_by('pk')
+
+    def shards(self):
+        """Shard numbers that currently hold at least one item."""
+        top = self.queryset().aggregate(top=Max('pk'))['top']
+        if top is None:
+            return []
+        return [n for n in range(top // SHARD_SIZE + 1)
+                if self.__class__(n).items().exists()]
+
+
+class PostSitemap(ShardedSitemap):
+    changefreq = 'weekly'
+    priority = 0.8
+
+    def queryset(self):
+        return BlogPost.approved.all()
+
+    def lastmod(self, item):
+        return item.updated_at
+
+
+class ProfileSitemap(ShardedSitemap):
+    changefreq = 'weekly'
+    priority = 0.4
+
+    def queryset(self):
+        return User.objects.filter(is_active=True).annotate(
+            last_post=Max('blog_posts__updated_at',
+                          filter=Q(blog_posts__status=BlogPost.STATUS_APPROVED)),
+        ).filter(last_post__isnull=False)
+
+    def location(self, item):
+        return reverse('accounts:profile', args=[item.username])
+
+    def lastmod(self, item):
+        return item.last_post
+
+
+class PageSitemap(Sitemap):
+    changefreq = 'monthly'
+    priority = 0.5
+
+    def items(self):
+        return ['pages:home', 'pages:about', 'pages:contact', 'blog:index']
+
+    def location(self, item):
+        return reverse(item)
+
+    def shards(self):
+        return [0]
+
+
+SECTIONS = {
+    'posts': PostSitemap,
+    'profiles': ProfileSitemap,
+    'pages': PageSitemap,
+}
+
+_FILE_NAME = re.compile(r'^(?P<section>[a-z]+)-(?P<shard>\d+)$')
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+
+
+def _protocol():
+    return getattr(settings, 'SITEMAP_PROTOCOL', 'https')
+
+
+def _write(name, content):
+    root = sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=f'.{name}.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+        handle.write(content)
+    os.replace(tmp, root / name)
+
+
+def _sitemap(section, shard):
+    cls = SECTIONS[section]
+    return cls(shard) if issubclass(cls, ShardedSitemap) else cls()
+
+
+def write_shard(section, shard):
+    """Write one shard file; removes the file when the shard became empty."""
+    sitemap = _sitemap(section, shard)
+    path = sitemap_root() / f'{section}-{shard}.xml'
+    if section != 'pages' and not sitemap.items().exists():
+        path.unlink(missing_ok=True)
+        return None
+    domain = Site.objects.get_current().domain
+    urls = sitemap.get_urls(page=1, protocol=_protocol(), site=Site(domain=domain))
+    _write(path.name, render_to_string('sitemap.xml', {'urlset': urls}))
+    return getattr(sitemap, 'latest_lastmod', None)
+
+
+def write_index():
+    """Write sitemap.xml listing every shard file on disk."""
+    domain = Site.objects.get_current().domain
+    entries = []
+    for path in sorted(sitemap_root().glob('*-*.xml')):
+        if not _FILE_NAME.match(path.stem):
+            continue
+        location = f"{_protocol()}://{domain}{reverse('sitemap_section', args=[path.stem])}"
+        # A shard is only rewritten when its content changes: mtime is its lastmod
+        lastmod = datetime.fromtimestamp(path.stat().st_mtime, tz=dt_timezone.utc)
+        entries.append(SitemapIndexItem(location, lastmod))
+    _write('sitemap.xml', render_to_string('sitemap_index.xml', {'sitemaps': entries}))
+
+
+def build_all():
+    """Rewrite every shard and the index; returns the number of shard files."""
+    written = set()
+    for section in SECTIONS:
+        for shard in _sitemap(section, 0).shards():
+            write_shard(section, shard)
+            written.add(f'{section}-{shard}.xml')
+    for stale in sitemap_root().glob('*-*.xml'):
+        if stale.name not in written:
+            stale.unlink()
+    write_index()
+    return len(written)
+
+
+def update_for_post(post_id, author_id):
+    """
+    Incremental rebuild after a post was approved, edited or withdrawn.
+
+    Does nothing until the sitemaps exist: the first crawl (or
+    ``build_sitemaps``) builds the full set.
+    """
+    if not (sitemap_root() / 'sitemap.xml').exists():
+        return
+    write_shard('posts', post_id // SHARD_SIZE)
+    write_shard('profiles', author_id // SHARD_SIZE)
+    write_index()
+
+
+def serve_sitemap(request, name='sitemap'):
+    """Serve a pre-built sitemap file; the index request builds a missing set."""
+    match = _FILE_NAME.match(name)
+    if name != 'sitemap' and (not match or match['section'] not in SECTIONS):
+        raise Http404('No such sitemap')
+    path = sitemap_root() / f'{name}.xml'
+    if name == 'sitemap' and not path.exists():
+        build_all()
+    if not path.exists():
+        raise Http404('No such sitemap')
+    response = FileResponse(path.open('rb'), content_type='application/xml')
+    patch_cache_control(response, public=True, max_age=3600)
+    return response
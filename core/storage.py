@@ -0,0 +1,176 @@
+# core/storage.py
+"""
+Static files storage with a build step in front of WhiteNoise.
+
+``collectstatic`` copies the sources into STATIC_ROOT. Then ``post_process``:
+
+1. minifies CSS, and JS when ``rjsmin`` is installed;
+2. renders responsive WebP widths of the images in ``STATIC_IMAGE_VARIANTS``
+   (``images/x.webp`` -> ``images/x-480.webp``, ...);
+3. re-encodes the tracks in ``STATIC_AUDIO_VARIANTS`` at a low bitrate with
+   ffmpeg when it is on the PATH. Constant-bitrate MP3 seeks well with the
+   range requests WhiteNoise serves;
+4. hands everything to WhiteNoise, which fingerprints the files, rewrites
+   the ``url()`` references and writes gzip copies. It also writes Brotli
+   copies when the ``Brotli`` package is installed.
+
+The generated files go through the fingerprinting like any source file. In
+templates they are reached through ``{% static_srcset %}`` and
+``{% static_audio %}`` (pages/templatetags/static_extras.py), which fall
+back to the original file when a variant was not built (e.g. in development).
+"""
+
+from __future__ import annotations
+
+import logging
+import posixpath
+import re
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .images import render_webp
+
+try:  # optional JS minifier
+    import rjsmin
+except ImportError:  # pragma: no cover - depends on the environment
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_VARIANTS = {'images/game-abyss-hero.webp': (480, 960, 1600)}
+DEFAULT_AUDIO_VARIANTS = {'audio/audio-theme.mp3': '64k'}
+
+# String literals and comments, matched together so a "/*" inside a string
+# is not taken for a comment
+_CSS_LITERALS = re.compile(r'''("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|/\*.*?\*/)''', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_CSS_COLON = re.compile(r'(?<=[;{])([-\w]+):\s+')
+
+
+def _minify_css_code(css):
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = _CSS_COLON.sub(r'\1:', css)
+    return css.replace(';}', '}')
+
+
+def minify_css(css):
+    """
+    Conservative CSS minifier: drops comments (keeping ``/*! ... */``) and
+    whitespace around punctuation. Quoted strings are copied as they are,
+    and values are not rewritten, so it cannot change what a rule means.
+    """
+    out = []
+    code = []
+    for index, part in enumerate(_CSS_LITERALS.split(css)):
+        if index % 2 == 0:
+            code.append(part)
+        elif not part.startswith('/*') or part.startswith('/*!'):
+            out.append(_minify_css_code(''.join(code)))
+            out.append(part)
+            code = []
+    out.append(_minify_css_code(''.join(code)))
+    return ''.join(out).strip()
+
+
+def image_variant_name(name, width):
+    stem, ext = posixpath.splitext(name)
+    return f'{stem}-{width}{ext}'
+
+
+def audio_variant_name(name, bitrate):
+    stem, ext = posixpath.splitext(name)
+    return f'{stem}-{bitrate}{ext}'
+
+
+class GameAbyssStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise manifest storage plus minification and media variants."""
+
+    def stored_name(self, name):
+        # Without a collectstatic manifest (tests, fresh checkouts) serve the
+        # plain name when STATIC_MANIFEST_FALLBACK allows it; otherwise keep
+        # Django's ValueError for the missing manifest entry
+        if not self.hashed_files and getattr(settings, 'STATIC_MANIFEST_FALLBACK', False):
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self._minify(paths)
+            self._image_variants(paths)
+            self._audio_variants(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _replace(self, paths, name, content):
+        """Store ``content`` under ``name`` and hash it from STATIC_ROOT."""
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+        paths[name] = (self, name)
+
+    def _minify(self, paths):
+        for name in list(paths):
+            if name.endswith('.min.css') or name.endswith('.min.js'):
+                continue
+            if name.endswith('.css'):
+                minify = minify_css
+            elif name.endswith('.js') and rjsmin is not None:
+                minify = rjsmin.jsmin
+            else:
+                continue
+            storage, path = paths[name]
+            with storage.open(path) as handle:
+                source = handle.read().decode('utf-8')
+            self._replace(paths, name, minify(source).encode('utf-8'))
+
+    def _image_variants(self, paths):
+        variants = getattr(settings, 'STATIC_IMAGE_VARIANTS', DEFAULT_IMAGE_VARIANTS)
+        for name, widths in variants.items():
+            if name not in paths:
+                continue
+            storage, path = paths[name]
+            with storage.open(path) as handle:
+                source = Image.open(BytesIO(handle.read()))
+                source.load()
+            for width in widths:
+                if width > source.width:
+                    continue
+                height = round(source.height * width / source.width)
+                self._replace(paths, image_variant_name(name, width),
+                              render_webp(source, (width, height)))
+
+    def _audio_variants(self, paths):
+        variants = getattr(settings, 'STATIC_AUDIO_VARIANTS', DEFAULT_AUDIO_VARIANTS)
+        ffmpeg = shutil.which('ffmpeg')
+        if variants and ffmpeg is None:
+            logger.warning("ffmpeg not found; skipping low-bitrate audio variants")
+            return
+        for name, bitrate in variants.items():
+            if name not in paths:
+                continue
+            storage, path = paths[name]
+            with tempfile.TemporaryDirectory() as tmp:
+                source = posixpath.join(tmp, 'source' + posixpath.splitext(name)[1])
+                target = posixpath.join(tmp, 'encoded.mp3')
+                with storage.open(path) as handle, open(source, 'wb') as out:
+                    shutil.copyfileobj(handle, out)
+                result = subprocess.run(
+                    [ffmpeg, '-nostdin', '-loglevel', 'error', '-y', '-i', source,
+                     '-vn', '-ac', '1', '-codec:a', 'libmp3lame', '-b:a', bitrate,
+                     target],
+                    capture_output=True, check=False,
+                )
+                if result.returncode != 0:
+                    logger.warning("ffmpeg failed for %s: %s", name,
+                                   result.stderr.decode(errors='replace').strip())
+                    continue
+                with open(target, 'rb') as encoded:
+                    self._replace(paths, audio_variant_name(name, bitrate), encoded.read())
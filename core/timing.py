@@ -0,0 +1,102 @@
+# core/timing.py
+"""
+Template render time per request.
+
+``TimedDjangoTemplates`` is the stock Django template backend, except that
+each top-level render adds its duration to ``request.template_time``
+(``core.jinja2.TimedJinja2`` does the same for the optional Jinja2 engine).
+Includes and ``{% extends %}`` parents are part of that render.
+``ServerTimingMiddleware`` then reports it with the total request time:
+
+    Server-Timing: tpl;dur=4.1;desc="templates", total;dur=18.7
+
+Browser dev tools show the header under the request's Timing tab. The
+``core.timing`` logger also writes one DEBUG line per request with the
+view name, so slow templates can be found per view in the logs.
+``SERVER_TIMING_ENABLED`` turns the header and the log line on; it
+defaults to ``DEBUG``. The middleware runs natively under both WSGI and
+ASGI.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+
+class TimedRenderMixin:
+    """For backend template wrappers: add each render's duration to the request."""
+
+    def render(self, context=None, request=None):
+        if request is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            elapsed = time.perf_counter() - started
+            request.template_time = getattr(request, 'template_time', 0.0) + elapsed
+
+
+class TimedTemplate(TimedRenderMixin, Template):
+    pass
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose templates time their renders (see module docstring)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class ServerTimingMiddleware:
+    """Add template and total time to every response as ``Server-Timing``."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self._report(request, response, started)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self._report(request, response, started)
+
+    def _report(self, request, response, started):
+        # TemplateResponse renders after the view, inside get_response
+        total = (time.perf_counter() - started) * 1000
+        templates = getattr(request, 'template_time', 0.0) * 1000
+
+        response.headers['Server-Timing'] = (
+            f'tpl;dur={templates:.1f};desc="templates", total;dur={total:.1f}')
+        match = getattr(request, 'resolver_match', None)
+        logger.debug(
+            '%s %s: templates %.1f ms of %.1f ms',
+            match.view_name if match else '-', request.path, templates, total)
+        return response
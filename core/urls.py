@@ -9,6 +9,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.sitemaps import serve_sitemap
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -23,6 +25,10 @@ urlpatterns = [
 
     # Blog app
     path('blog/', include('blog.urls', namespace='blog')),
+
+    # Pre-built sitemap index and shards (see core/sitemaps.py)
+    path('sitemap.xml', serve_sitemap, name='sitemap'),
+    path('sitemaps/<str:name>.xml', serve_sitemap, name='sitemap_section'),
 ]
 
 # Serve media files during development
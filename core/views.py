@@ -7,6 +7,8 @@ from django.shortcuts import render
 
 def permission_denied_view(request, exception=None):
     """
-    Custom 403 Forbidden handler.
+    Custom 403 Forbidden handler. Error pages skip the music player.
     """
-    return render(request, "errors/403.html", status=403)
+    return render(
+        request, "errors/403.html", {"music_player_enabled": False}, status=403
+    )
@@ -0,0 +1,50 @@
+"""
+Gunicorn settings, read from the environment (loaded by the Procfile).
+
+- WEB_CONCURRENCY: worker processes. Heroku sets it per dyno size; the
+  fallback is 2 x CPUs + 1, capped at 8 so a large host does not open
+  more database connections than the plan allows.
+- GUNICORN_THREADS: threads per worker. Above 1 the workers are gthread
+  workers: requests waiting on the database or Cloudinary overlap, for
+  less memory than extra processes.
+- GUNICORN_ASGI: True serves ``core.asgi`` with uvicorn workers instead of
+  ``core.wsgi``. The read-heavy views (index, post detail, home, feeds) are
+  async, so one worker keeps serving while other requests wait on slow
+  clients, the database or the network. Threads do not apply there.
+- GUNICORN_WORKER_CLASS: overrides the worker type.
+- GUNICORN_TIMEOUT, GUNICORN_KEEPALIVE, GUNICORN_MAX_REQUESTS: the usual
+  knobs. Workers are recycled after MAX_REQUESTS (+ jitter) to bound leaks.
+
+Every thread may hold a database connection (CONN_MAX_AGE), so
+workers x threads must stay below the database connection limit, or
+DB_POOL=True should cap it per process (see DATABASES in core/settings.py).
+``python scripts/loadtest.py --gunicorn 3x1 2x4 asgi:3 ...`` compares setups.
+"""
+
+import multiprocessing
+import os
+
+
+def _int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+_asgi = os.environ.get("GUNICORN_ASGI", "False") == "True"
+wsgi_app = "core.asgi:application" if _asgi else "core.wsgi:application"
+
+workers = _int("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8))
+# Settings check per-process caches against the worker count
+os.environ["WEB_CONCURRENCY"] = str(workers)
+threads = _int("GUNICORN_THREADS", 1)
+if _asgi:
+    _default_worker = "uvicorn_worker.UvicornWorker"
+else:
+    _default_worker = "gthread" if threads > 1 else "sync"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", _default_worker)
+
+timeout = _int("GUNICORN_TIMEOUT", 30)
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+max_requests = _int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = max_requests // 10
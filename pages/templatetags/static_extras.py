@@ -0,0 +1,45 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+
+from core.storage import (
+    DEFAULT_AUDIO_VARIANTS,
+    DEFAULT_IMAGE_VARIANTS,
+    audio_variant_name,
+    image_variant_name,
+)
+
+register = template.Library()
+
+
+def _built(name):
+    """True when collectstatic produced ``name`` (listed in the manifest)."""
+    return name in getattr(staticfiles_storage, "hashed_files", {})
+
+
+@register.simple_tag
+def static_srcset(path):
+    """
+    ``srcset`` for a static image from the widths rendered by collectstatic.
+    Example:
+      <img src="{% static 'images/hero.webp' %}" srcset="{% static_srcset 'images/hero.webp' %}">
+
+    Returns an empty string until the variants exist (development).
+    """
+    variants = getattr(settings, "STATIC_IMAGE_VARIANTS", DEFAULT_IMAGE_VARIANTS)
+    candidates = []
+    for width in variants.get(path, ()):
+        name = image_variant_name(path, width)
+        if _built(name):
+            candidates.append(f"{static(name)} {width}w")
+    return ", ".join(candidates)
+
+
+@register.simple_tag
+def static_audio(path):
+    """URL of the low-bitrate encode of ``path`` when built, else of ``path``."""
+    bitrate = getattr(settings, "STATIC_AUDIO_VARIANTS", DEFAULT_AUDIO_VARIANTS).get(path)
+    if bitrate and _built(audio_variant_name(path, bitrate)):
+        return static(audio_variant_name(path, bitrate))
+    return static(path)
@@ -1,10 +1,23 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
-from blog.models import BlogPost
+from blog.models import BlogPost, Comment
+from core.storage import minify_css
+from core.views import permission_denied_view
 from .models import HelpRequest
+from .views import HomeView
 
 
 class HelpRequestModelTests(TestCase):
@@ -95,3 +108,206 @@ class HomeViewTests(TestCase):
     def test_home_shows_placeholder_when_no_featured(self):
         response = self.client.get(reverse('pages:home'))
         self.assertContains(response, 'Coming Soon')
+
+
+class ContactRateLimitTests(TestCase):
+
+    @override_settings(RATELIMIT_STORE='local',
+                       RATELIMITS={'contact': {'rate': '1/h'}})
+    def test_second_request_in_window_is_throttled(self):
+        data = {
+            'name': 'Visitor',
+            'email': 'visitor@example.com',
+            'subject': 'Hello',
+            'message': 'Just saying hi.',
+            'priority': HelpRequest.PRIORITY_MEDIUM,
+        }
+        self.client.post(reverse('pages:contact'), data)
+        response = self.client.post(reverse('pages:contact'), data)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(HelpRequest.objects.count(), 1)
+
+
+class HomeConditionalGetTests(TestCase):
+    def test_home_revalidates_against_the_featured_grid(self):
+        url = reverse("pages:home")
+        first = self.client.get(url)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        author = get_user_model().objects.create_user(username="curator", password="pass")
+        BlogPost.objects.create(author=author, title="Spotlight", body="Body",
+                                status=BlogPost.STATUS_APPROVED, featured=True)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_home_etag_follows_the_featured_author_cards(self):
+        url = reverse("pages:home")
+        author = get_user_model().objects.create_user(username="veteran", password="pass")
+        post = BlogPost.objects.create(author=author, title="Spotlight", body="Body",
+                                       status=BlogPost.STATUS_APPROVED, featured=True)
+        first = self.client.get(url)
+        self.assertContains(first, "Common")
+
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, body=f"Note {i}",
+                    status=Comment.STATUS_APPROVED)
+            for i in range(30))
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "Legendary")
+
+        author.profile.save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"]).status_code, 200)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class HomePageCacheTests(TestCase):
+    def test_featuring_a_post_purges_the_cached_home(self):
+        caches["pages"].clear()
+        url = reverse("pages:home")
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "HIT")
+
+        author = get_user_model().objects.create_user(username="editor", password="pass")
+        BlogPost.objects.create(author=author, title="Front page news", body="Body",
+                                status=BlogPost.STATUS_APPROVED, featured=True)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertContains(response, "Front page news")
+
+
+class StaticPipelineTests(TestCase):
+
+    def setUp(self):
+        self.source = Path(tempfile.mkdtemp())
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        (self.source / 'css').mkdir()
+        (self.source / 'css' / 'site.css').write_text(
+            '/* layout */\n.hero > img ,\n.hero:hover {\n  margin: 0 auto;\n}\n')
+        (self.source / 'images').mkdir()
+        Image.new('RGB', (1000, 500), 'purple').save(self.source / 'images' / 'hero.webp')
+
+    def collect(self):
+        return override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATIC_IMAGE_VARIANTS={'images/hero.webp': (400, 800, 2000)},
+            STATIC_AUDIO_VARIANTS={},
+        )
+
+    def test_minify_css_keeps_selectors_and_values(self):
+        css = '/* drop */\n/*! keep */\na :hover ,\n.b > .c {\n  color: red;\n  margin: 0 auto;\n}\n'
+        self.assertEqual(
+            minify_css(css), '/*! keep */ a :hover,.b>.c{color:red;margin:0 auto}')
+
+    def test_minify_css_leaves_strings_alone(self):
+        css = '.q::before {\n  content: "a  /* b */ ,  c";\n  font-family: \'Press  Start\' , serif;\n}\n'
+        self.assertEqual(
+            minify_css(css),
+            '.q::before{content:"a  /* b */ ,  c";font-family:\'Press  Start\',serif}')
+
+    def test_collectstatic_minifies_fingerprints_and_renders_variants(self):
+        with self.collect():
+            call_command('collectstatic', interactive=False, verbosity=0)
+            hashed = staticfiles_storage.stored_name('css/site.css')
+            self.assertNotEqual(hashed, 'css/site.css')
+            self.assertEqual(
+                (self.root / hashed).read_text(), '.hero>img,.hero:hover{margin:0 auto}')
+
+            with Image.open(self.root / 'images' / 'hero-400.webp') as variant:
+                self.assertEqual(variant.size, (400, 200))
+            # Widths above the source are not upscaled
+            self.assertFalse((self.root / 'images' / 'hero-2000.webp').exists())
+
+            srcset = Template(
+                "{% load static_extras %}{% static_srcset 'images/hero.webp' %}"
+            ).render(Context())
+            self.assertIn(' 400w', srcset)
+            self.assertIn(' 800w', srcset)
+            self.assertNotIn('2000w', srcset)
+            self.assertIn(staticfiles_storage.stored_name('images/hero-800.webp'), srcset)
+
+    def test_without_manifest_urls_are_plain_and_srcset_is_empty(self):
+        with self.collect():
+            self.assertEqual(staticfiles_storage.stored_name('css/site.css'), 'css/site.css')
+            srcset = Template(
+                "{% load static_extras %}{% static_srcset 'images/hero.webp' %}"
+            ).render(Context())
+            self.assertEqual(srcset, '')
+
+    @override_settings(STATIC_MANIFEST_FALLBACK=False)
+    def test_missing_manifest_fails_outside_development(self):
+        with self.collect():
+            with self.assertRaises(ValueError):
+                staticfiles_storage.stored_name('css/site.css')
+
+    def test_home_preloads_hero(self):
+        response = self.client.get(reverse('pages:home'))
+        self.assertContains(response, 'rel="preload"')
+        self.assertContains(response, 'fetchpriority="high"')
+        self.assertNotContains(response, 'loading="lazy">\n          </div>')
+
+
+class MusicPlayerTests(TestCase):
+
+    def test_player_and_audio_are_not_loaded_up_front(self):
+        response = self.client.get(reverse('pages:home'))
+        self.assertContains(response, 'js/music-loader.js')
+        self.assertContains(response, 'data-player-src="/static/js/music-player.js"')
+        self.assertContains(response, 'data-src="/static/audio/audio-theme.mp3"')
+        self.assertContains(response, 'preload="none"')
+        self.assertNotContains(response, ' src="/static/audio/')
+        self.assertNotContains(response, '<script src="/static/js/music-player.js"')
+
+    @override_settings(MUSIC_PLAYER_ENABLED=False)
+    def test_setting_removes_player(self):
+        response = self.client.get(reverse('pages:home'))
+        self.assertNotContains(response, 'gaMusicBtn')
+        self.assertNotContains(response, 'music-loader.js')
+
+    def test_error_page_has_no_player(self):
+        request = RequestFactory().get('/forbidden/')
+        request.user = AnonymousUser()
+        response = permission_denied_view(request)
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn(b'gaMusicBtn', response.content)
+
+    @override_settings(WHITENOISE_USE_FINDERS=True, WHITENOISE_AUTOREFRESH=True)
+    def test_audio_is_served_with_range_requests(self):
+        response = self.client.get('/static/audio/audio-theme.mp3', HTTP_RANGE='bytes=0-1023')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Range'].startswith('bytes 0-1023/'))
+        self.assertEqual(int(response['Content-Length']), 1024)
+        response.close()
+
+
+class AsgiServingTests(TestCase):
+    """The homepage and static files served through the async handler."""
+
+    def test_home_view_is_async(self):
+        self.assertTrue(HomeView.view_is_async)
+
+    async def test_home_renders_featured_posts_under_asgi(self):
+        author = await get_user_model().objects.acreate(username='async-author')
+        await BlogPost.objects.acreate(
+            author=author, title='Async Signal', body='Signal from the abyss',
+            status=BlogPost.STATUS_APPROVED, featured=True, published_at=timezone.now())
+
+        response = await self.async_client.get(reverse('pages:home'))
+
+        self.assertContains(response, 'Async Signal')
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+
+    @override_settings(WHITENOISE_USE_FINDERS=True, WHITENOISE_AUTOREFRESH=True)
+    async def test_static_files_stream_from_the_async_middleware(self):
+        response = await self.async_client.get(
+            '/static/audio/audio-theme.mp3', headers={'range': 'bytes=0-1023'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body), 1024)
@@ -1,32 +1,71 @@
 from django.shortcuts import render, redirect
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from django.views import View
 from django.contrib import messages
+from django.db.models import Count, Max
 
 from .forms import HelpRequestForm
 from .models import HelpRequest
 
-from blog.models import BlogPost
+from accounts.authors import aattach_author_cards
+from accounts.models import UserProfile
+from blog.models import BlogPost, Comment
+from blog.purge import home_tags
+from core.conditional import conditional_page, make_etag
+from core.pagecache import cache_anonymous_page
+from core.ratelimit import ratelimit
 
 HOME_FEATURED_POST_LIMIT = 6
 
 
+def _featured_posts():
+    return BlogPost.objects.filter(
+        featured=True,
+        status=BlogPost.STATUS_APPROVED,
+    ).order_by('-published_at', '-updated_at')[:HOME_FEATURED_POST_LIMIT]
+
+
+def _activity_counts(model, author_ids):
+    return sorted(
+        model.objects.filter(author_id__in=author_ids)
+        .order_by()
+        .values_list('author_id')
+        .annotate(total=Count('id'))
+    )
+
+
+def _home_validators(request, *args, **kwargs):
+    """
+    The homepage only changes with the featured grid: tag its (pk, updated_at)
+    rows plus what its author cards show (post/comment counts behind the
+    rarity badges, avatars).
+    """
+    rows = list(_featured_posts().values_list('pk', 'updated_at', 'author_id'))
+    authors = {author_id for _, _, author_id in rows}
+    profiles = UserProfile.objects.filter(user_id__in=authors).aggregate(
+        last=Max('updated_at'))['last']
+    last_modified = max(
+        filter(None, [updated for _, updated, _ in rows] + [profiles]), default=None)
+    return make_etag(
+        *rows, _activity_counts(BlogPost, authors),
+        _activity_counts(Comment, authors), profiles), last_modified
+
+
+@method_decorator(cache_anonymous_page(home_tags), name='get')
+@method_decorator(conditional_page(_home_validators), name='get')
 class HomeView(TemplateView):
-    """Render the homepage."""
+    """Render the homepage (async: the featured grid is read with the async ORM)."""
     template_name = 'pages/home.html'
 
-    def get_context_data(self, **kwargs):
+    async def get(self, request, *args, **kwargs):
         """Include the featured posts grid."""
-        context = super().get_context_data(**kwargs)
-        context['featured_posts'] = (
-            BlogPost.objects.filter(
-                featured=True,
-                status=BlogPost.STATUS_APPROVED,
-            )
-            .select_related('author')
-            .order_by('-published_at', '-updated_at')[:HOME_FEATURED_POST_LIMIT]
+        featured_posts = await aattach_author_cards(
+            _featured_posts().select_related('author')
         )
-        return context
+        # The TemplateResponse renders after the view, in the sync thread
+        return self.render_to_response(
+            self.get_context_data(featured_posts=featured_posts, **kwargs))
 
 
 class AboutView(TemplateView):
@@ -34,6 +73,7 @@ class AboutView(TemplateView):
     template_name = 'pages/about.html'
 
 
+@method_decorator(ratelimit('contact'), name='post')
 class ContactView(View):
     """Contact page backed by the HelpRequest model."""
 
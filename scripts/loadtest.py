@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+"""
+Small HTTP load test for choosing gunicorn workers, threads and server mode.
+
+Runs CONCURRENCY client threads for DURATION seconds against a set of paths
+and reports throughput, latency percentiles and errors. It only uses the
+standard library, so it runs anywhere Python does.
+
+Against a running server:
+
+    python scripts/loadtest.py --url https://staging.example.com -c 20 -d 30
+
+Comparing gunicorn setups locally (each WORKERSxTHREADS starts
+``gunicorn core.wsgi --config gunicorn.conf.py`` with WEB_CONCURRENCY and
+GUNICORN_THREADS set, loads it, then stops it):
+
+    python scripts/loadtest.py --gunicorn 3x1 5x1 2x4 4x4 -c 32 -d 20
+
+``asgi:WORKERS`` starts the same command with GUNICORN_ASGI=True (uvicorn
+workers, async views). Two conditions show where WSGI workers run out:
+
+- ``--slow-clients N``: N extra connections that send their request one
+  header line every ``--slow-delay`` seconds and read the reply as slowly,
+  like phones on a bad network without a buffering proxy in front;
+- ``--slow-email SECONDS``: ``--writers`` clients post comments as a staff
+  user while every notification email takes SECONDS
+  (core.mail.SlowEmailBackend). ``--email-background`` sets
+  BLOG_EMAIL_BACKGROUND so delivery leaves the request.
+
+The readers' numbers are the ones to compare:
+
+    python scripts/loadtest.py --gunicorn 3x1 2x4 asgi:3 --slow-clients 12
+    python scripts/loadtest.py --gunicorn 3x1 asgi:3 --slow-email 2 [--email-background]
+
+Use a database like production's: with SQLite every setup shares one writer.
+The slow-email run needs a migrated database. It adds a staff ``loadtest``
+user and a published ``loadtest`` post, and deletes them when the run ends.
+It refuses a database that is not SQLite or on localhost unless
+``--allow-remote-db`` is given, so production credentials left in the
+environment cannot leave them behind there.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import secrets
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATHS = ["/", "/blog/", "/blog/?sort=hot", "/blog/trending/", "/about/"]
+
+# Creates (or reuses) the staff user and post the slow-email writers comment
+# on, and prints "<post path> <session id>" for them to log in with. Only
+# against a local database unless LOADTEST_ALLOW_REMOTE_DB is set
+WRITER_SETUP = """
+import os
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from blog.models import BlogPost
+host = connection.settings_dict.get("HOST") or ""
+if (connection.vendor != "sqlite" and host not in ("", "localhost", "127.0.0.1", "::1")
+        and os.environ.get("LOADTEST_ALLOW_REMOTE_DB") != "True"):
+    raise SystemExit(f"Refusing to add load test data to the database on {host!r}; "
+                     "pass --allow-remote-db if that is intended.")
+user, created = get_user_model().objects.get_or_create(
+    username="loadtest", defaults={"is_staff": True})
+if created:
+    user.set_unusable_password()
+    user.save(update_fields=["password"])
+post, _ = BlogPost.objects.get_or_create(slug="loadtest", defaults={
+    "author": user, "title": "Load test", "body": "Comments land here.",
+    "status": BlogPost.STATUS_APPROVED, "published_at": timezone.now()})
+client = Client()
+client.force_login(user)
+print(post.get_absolute_url(), client.cookies["sessionid"].value)
+"""
+
+# Removes what WRITER_SETUP added: the session, the post (and the comments
+# on it) and the user, which only the script creates without a password
+WRITER_CLEANUP = """
+import os
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from blog.models import BlogPost
+Session.objects.filter(session_key=os.environ["LOADTEST_SESSION"]).delete()
+user = get_user_model().objects.filter(username="loadtest").first()
+if user is not None and not user.has_usable_password():
+    BlogPost.objects.filter(slug="loadtest", author=user).delete()
+    user.delete()
+"""
+
+
+def drive(request, concurrency, duration):
+    """Call ``request(n)`` in a loop from ``concurrency`` threads; return stats."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        n = offset
+        local_latencies, local_errors = [], []
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                request(n)
+                local_latencies.append(time.perf_counter() - started)
+            except (urllib.error.URLError, OSError) as exc:
+                local_errors.append(str(getattr(exc, "code", exc)))
+            n += concurrency
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarise(latencies, errors, duration)
+
+
+def run_load(base_url, paths, concurrency, duration):
+    """Hit ``paths`` round-robin from ``concurrency`` threads; return stats."""
+    def read(n):
+        with urllib.request.urlopen(base_url + paths[n % len(paths)], timeout=30) as response:
+            response.read()
+
+    return drive(read, concurrency, duration)
+
+
+def run_writers(base_url, writer, concurrency, duration):
+    """Post comments as the WRITER_SETUP user; each one sends a notification."""
+    post_path, session = writer
+    address = urlsplit(base_url)
+    token = secrets.token_hex(16)  # any 32 characters do as the CSRF secret
+
+    def write(n):
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=60)
+        try:
+            connection.request(
+                "POST", post_path,
+                urlencode({"csrfmiddlewaretoken": token, "body": f"Load test comment {n}."}),
+                {"Content-Type": "application/x-www-form-urlencoded",
+                 "Cookie": f"sessionid={session}; csrftoken={token}"})
+            response = connection.getresponse()
+            response.read()
+        finally:
+            connection.close()
+        if response.status != 302:  # the comment view redirects on success
+            raise OSError(f"HTTP {response.status}")
+
+    return drive(write, concurrency, duration)
+
+
+def slow_client(base_url, path, delay, stop):
+    """Trickle requests to ``path`` a header line at a time until ``stop`` is set."""
+    address = urlsplit(base_url)
+    lines = [f"GET {path} HTTP/1.1", f"Host: {address.hostname}",
+             *(f"X-Slow-{n}: {'x' * 16}" for n in range(8)), "Connection: close", ""]
+    while not stop.is_set():
+        try:
+            with socket.create_connection((address.hostname, address.port), timeout=60) as sock:
+                for line in lines:
+                    sock.sendall(f"{line}\r\n".encode())
+                    if stop.wait(delay):
+                        return
+                while sock.recv(4096) and not stop.wait(delay):
+                    pass
+        except OSError:
+            stop.wait(delay)
+
+
+def summarise(latencies, errors, duration):
+    stats = {"requests": len(latencies), "errors": len(errors),
+             "rps": len(latencies) / duration,
+             "error_kinds": sorted(set(errors))[:3]}
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100)
+        stats.update(p50=cuts[49] * 1000, p95=cuts[94] * 1000, p99=cuts[98] * 1000)
+    else:
+        stats.update(p50=0.0, p95=0.0, p99=0.0)
+    return stats
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return
+        except urllib.error.HTTPError:
+            return  # answering, even if with an error page
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start within {timeout}s")
+
+
+def manage_shell(code, **env):
+    """Run ``code`` with ``manage.py shell``; return its output or exit with its error."""
+    result = subprocess.run(
+        [sys.executable, "manage.py", "shell", "-c", code],
+        cwd=BASE_DIR, env={**os.environ, **env}, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(result.stderr.strip().splitlines()[-1] if result.stderr.strip()
+                 else f"manage.py shell exited with {result.returncode}")
+    return result.stdout
+
+
+def prepare_writer(allow_remote_db=False):
+    """Run WRITER_SETUP against the configured database; return (post path, session id)."""
+    output = manage_shell(WRITER_SETUP, LOADTEST_ALLOW_REMOTE_DB=str(allow_remote_db))
+    post_path, session = output.strip().splitlines()[-1].split()
+    return post_path, session
+
+
+def cleanup_writer(writer):
+    """Run WRITER_CLEANUP for the session ``prepare_writer`` returned."""
+    manage_shell(WRITER_CLEANUP, LOADTEST_SESSION=writer[1])
+
+
+def measure(base_url, paths, args, writer=None):
+    """Readers' stats, plus the writers' when ``writer`` is given, under slow clients."""
+    stop = threading.Event()
+    background = [
+        threading.Thread(target=slow_client, args=(base_url, paths[0], args.slow_delay, stop))
+        for _ in range(args.slow_clients)
+    ]
+    writes = {}
+    if writer:
+        background.append(threading.Thread(target=lambda: writes.update(
+            run_writers(base_url, writer, args.writers, args.duration))))
+    for thread in background:
+        thread.start()
+    try:
+        reads = run_load(base_url, paths, args.concurrency, args.duration)
+    finally:
+        stop.set()
+        for thread in background:
+            thread.join()
+    return reads, writes or None
+
+
+def run_gunicorn(setup, paths, args, writer=None):
+    mode, _, asgi_workers = setup.partition("asgi:")
+    workers, _, threads = (asgi_workers or mode).partition("x")
+    port = free_port()
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "WEB_CONCURRENCY": workers,
+        "GUNICORN_THREADS": threads or "1",
+        "GUNICORN_ASGI": str(bool(asgi_workers)),
+        "ALLOWED_HOSTS": os.environ.get("ALLOWED_HOSTS", "127.0.0.1,localhost"),
+    }
+    if writer:
+        env.update({
+            "EMAIL_BACKEND": "core.mail.SlowEmailBackend",
+            "SLOW_EMAIL_DELAY": str(args.slow_email),
+            "BLOG_EMAIL_BACKGROUND": str(args.email_background),
+            "RATELIMIT_ENABLED": "False",
+        })
+    server = subprocess.Popen(
+        ["gunicorn", "--config", "gunicorn.conf.py"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(base_url + paths[0])
+        run_load(base_url, paths, args.concurrency, min(args.duration, 3))  # warm up
+        return measure(base_url, paths, args, writer)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            # Workers still flushing background email on the way out
+            os.killpg(server.pid, signal.SIGKILL)
+            server.wait()
+
+
+def report(label, stats):
+    print(f"{label:<12} {stats['rps']:>8.1f} req/s  p50 {stats['p50']:>7.1f} ms  "
+          f"p95 {stats['p95']:>7.1f} ms  p99 {stats['p99']:>7.1f} ms  "
+          f"{stats['requests']} ok, {stats['errors']} errors")
+    for kind in stats["error_kinds"]:
+        print(f"{'':<12} error: {kind}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server")
+    target.add_argument("--gunicorn", nargs="+", metavar="SETUP",
+                        help="start gunicorn locally for each setup: WORKERSxTHREADS "
+                             "(WSGI) or asgi:WORKERS, e.g. 3x1 2x4 asgi:3")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=15.0)
+    parser.add_argument("-p", "--path", action="append", dest="paths",
+                        help=f"path to request (repeatable; default {DEFAULT_PATHS})")
+    parser.add_argument("--slow-clients", type=int, default=0,
+                        help="extra connections trickling requests in and replies out")
+    parser.add_argument("--slow-delay", type=float, default=0.5,
+                        help="seconds between a slow client's lines and reads")
+    parser.add_argument("--slow-email", type=float, metavar="SECONDS",
+                        help="with --gunicorn: comment writers, each email taking SECONDS")
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--email-background", action="store_true",
+                        help="deliver the slow emails in the background")
+    parser.add_argument("--allow-remote-db", action="store_true",
+                        help="let --slow-email add its user and post to a database "
+                             "that is not SQLite or on localhost")
+    args = parser.parse_args(argv)
+    paths = args.paths or DEFAULT_PATHS
+    if args.slow_email and args.url:
+        parser.error("--slow-email starts its own servers; use it with --gunicorn")
+
+    print(f"{args.concurrency} clients, {args.duration:g}s, paths: {' '.join(paths)}")
+    if args.slow_clients:
+        print(f"{args.slow_clients} slow clients, {args.slow_delay:g}s per line")
+    if args.url:
+        reads, _ = measure(args.url.rstrip("/"), paths, args)
+        report(args.url, reads)
+        return 0
+    writer = None
+    if args.slow_email:
+        writer = prepare_writer(args.allow_remote_db)
+        mode = "background" if args.email_background else "inline"
+        print(f"{args.writers} comment writers, {args.slow_email:g}s per email ({mode})")
+    try:
+        for setup in args.gunicorn:
+            reads, writes = run_gunicorn(setup, paths, args, writer)
+            report(setup, reads)
+            if writes:
+                report("  writes", writes)
+    finally:
+        if writer:
+            cleanup_writer(writer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+/**
+ * Game Abyss - Background Music Loader
+ *
+ * Loads music-player.js, and through it the audio track, only when it is
+ * needed: on the first click of the music button, or right away when music
+ * was left playing on the previous page. Readers who never press play
+ * download neither.
+ */
+;(function () {
+  'use strict'
+
+  const musicBtn = document.getElementById('gaMusicBtn')
+  const toastEl = document.getElementById('musicToast')
+
+  if (!musicBtn || !musicBtn.dataset.playerSrc) return
+
+  const KEY_PLAYING = 'gaMusicPlaying'
+  const KEY_TOAST = 'gaMusicToastShown'
+  let requested = false
+
+  function loadPlayer(autoplay) {
+    if (requested) return
+    requested = true
+    musicBtn.removeEventListener('click', onClick)
+    // The player starts the track at once when it was loaded by a click
+    if (autoplay) musicBtn.dataset.autoplay = 'yes'
+
+    const script = document.createElement('script')
+    script.src = musicBtn.dataset.playerSrc
+    script.async = true
+    document.body.appendChild(script)
+  }
+
+  function onClick(e) {
+    e.preventDefault()
+    loadPlayer(true)
+  }
+
+  function showToastOnce() {
+    if (!toastEl || !window.bootstrap || !bootstrap.Toast) return
+    if (localStorage.getItem(KEY_TOAST) === 'yes') return
+
+    const toast = new bootstrap.Toast(toastEl, { delay: 4000, autohide: true })
+    toast.show()
+    localStorage.setItem(KEY_TOAST, 'yes')
+  }
+
+  if (localStorage.getItem(KEY_PLAYING) === 'yes') {
+    loadPlayer(false)
+  } else {
+    musicBtn.addEventListener('click', onClick)
+    showToastOnce()
+  }
+})()
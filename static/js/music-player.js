@@ -1,5 +1,9 @@
 /**
  * Game Abyss - Background Music Player
+ *
+ * Loaded on demand by music-loader.js. The <audio> element ships without a
+ * src (only data-src, with preload="none"), so the track is requested here,
+ * once, and streamed with range requests as it plays.
  */
 ;(function () {
   'use strict'
@@ -7,27 +11,35 @@
   const music = document.getElementById('gaBgMusic')
   const musicBtn = document.getElementById('gaMusicBtn')
   const musicMute = document.getElementById('gaMusicMute')
-  const toastEl = document.getElementById('musicToast')
   const iconEl = musicBtn ? musicBtn.querySelector('i') : null
 
   if (!music || !musicBtn || !musicMute || !iconEl) return
 
   const KEY_TIME = 'gaMusicTime'
   const KEY_PLAYING = 'gaMusicPlaying'
-  const KEY_TOAST = 'gaMusicToastShown'
   const DEFAULT_VOLUME = 0.3
 
   function init() {
+    if (!music.getAttribute('src') && music.dataset.src) {
+      music.src = music.dataset.src
+    }
     music.volume = DEFAULT_VOLUME
 
     // Restore position
     const savedTime = localStorage.getItem(KEY_TIME)
     if (savedTime) music.currentTime = parseFloat(savedTime)
 
-    // Restore state
-    const shouldPlay = localStorage.getItem(KEY_PLAYING) === 'yes'
+    // Restore state, or start playing when the loader was triggered by a click
+    const shouldPlay =
+      localStorage.getItem(KEY_PLAYING) === 'yes' ||
+      musicBtn.dataset.autoplay === 'yes'
     if (shouldPlay) {
-      music.play().catch(() => updateUI(true))
+      music
+        .play()
+        .then(() => {
+          localStorage.setItem(KEY_PLAYING, 'yes')
+        })
+        .catch(() => updateUI(true))
     } else {
       updateUI(true)
     }
@@ -63,9 +75,6 @@
         localStorage.setItem(KEY_TIME, music.currentTime.toString())
       }
     })
-
-    // Show toast only once
-    showToastOnce()
   }
 
   function updateUI(isMuted) {
@@ -81,15 +90,6 @@
     iconEl.classList.toggle('fa-pause', !isMuted)
   }
 
-  function showToastOnce() {
-    if (!toastEl || !window.bootstrap || !bootstrap.Toast) return
-    if (localStorage.getItem(KEY_TOAST) === 'yes') return
-
-    const toast = new bootstrap.Toast(toastEl, { delay: 4000, autohide: true })
-    toast.show()
-    localStorage.setItem(KEY_TOAST, 'yes')
-  }
-
   document.readyState === 'loading'
     ? document.addEventListener('DOMContentLoaded', init)
     : init()
@@ -0,0 +1,95 @@
+/**
+ * Game Abyss - In-place reactions, reports and comment deletes
+ *
+ * Forms marked with data-ajax are submitted with fetch and the JSON reply
+ * updates the page, instead of reloading the whole post. Without JS (or if
+ * the reply is not JSON, e.g. a login redirect) the plain form post still works.
+ */
+;(function () {
+  'use strict'
+
+  const statusEl = document.querySelector('[data-ajax-status]')
+
+  function announce(message) {
+    if (statusEl && message) statusEl.textContent = message
+  }
+
+  async function send(form) {
+    const response = await fetch(form.action, {
+      method: 'POST',
+      body: new FormData(form),
+      credentials: 'same-origin',
+      headers: {
+        Accept: 'application/json',
+        'X-Requested-With': 'XMLHttpRequest',
+      },
+    })
+    const type = response.headers.get('Content-Type') || ''
+    if (!type.includes('application/json')) return null
+    return response.json()
+  }
+
+  function updateReactions(form, data) {
+    const group = form.closest('[data-reaction-group]')
+    if (!group) return
+    group.querySelectorAll('[data-reaction-value]').forEach((button) => {
+      const value = button.dataset.reactionValue
+      const active = value === data.reaction
+      button.classList.toggle('btn-primary', active)
+      button.classList.toggle('btn-outline-primary', !active)
+      button.setAttribute('aria-pressed', active ? 'true' : 'false')
+      const count = button.querySelector('[data-reaction-count]')
+      if (count && value in data.counts) count.textContent = data.counts[value]
+    })
+  }
+
+  function markReported(form, data) {
+    form.querySelectorAll('select, button').forEach((el) => {
+      el.disabled = true
+    })
+    const button = form.querySelector('button')
+    if (button) button.innerHTML = '<i class="fas fa-flag"></i> Reported'
+    // A fresh report sends the comment back to moderation
+    if (data.hidden) {
+      const item = form.closest('li[id^="comment-"]')
+      if (item) item.remove()
+    }
+  }
+
+  function removeComment(form) {
+    const item = form.closest('li[id^="comment-"]')
+    if (item) item.remove()
+  }
+
+  const handlers = {
+    reaction: updateReactions,
+    report: markReported,
+    delete: removeComment,
+  }
+
+  document.addEventListener('submit', async (event) => {
+    const form = event.target.closest('form[data-ajax]')
+    if (!form || !handlers[form.dataset.ajax]) return
+    event.preventDefault()
+
+    const buttons = form.querySelectorAll('button')
+    buttons.forEach((b) => (b.disabled = true))
+    let data = null
+    try {
+      data = await send(form)
+    } catch (err) {
+      data = null
+    }
+    if (data === null) {
+      // Not a JSON reply (e.g. session expired): fall back to a normal post
+      form.submit()
+      return
+    }
+    if (data.ok) handlers[form.dataset.ajax](form, data)
+    announce(data.message)
+    // Reported comments stay locked; everything else can be clicked again
+    if (!(data.ok && form.dataset.ajax === 'report')) {
+      buttons.forEach((b) => (b.disabled = false))
+    }
+  })
+})()